@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class PerfilBackend(ModelBackend):
+    """`ModelBackend` que carrega o `UserProfile` junto com o usuário.
+
+    O `AuthenticationMiddleware` resolve o usuário da sessão por
+    `get_user`; com o `select_related` o perfil (role/host) vem no mesmo
+    `JOIN` e as checagens de permissão não fazem outra consulta. Como o
+    perfil é relido a cada requisição, alterações em `UserProfile` valem já
+    na próxima chamada, sem cache para invalidar.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related("profile").get(
+                pk=user_id
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,52 @@
+import pytest
+from apps.accounts.models import UserProfile
+from apps.portifolios.models import Portfolio
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def senior(db):
+    user = User.objects.create_user(username="senior_backend", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host="alpha"
+    )
+    client = APIClient()
+    client.login(username="senior_backend", password="pass")
+    return user, client
+
+
+def test_perfil_vem_na_mesma_consulta_do_usuario(senior):
+    _user, client = senior
+
+    with CaptureQueriesContext(connection) as consultas:
+        assert client.get("/api/portfolios/").status_code == 200
+
+    sqls = [q["sql"] for q in consultas.captured_queries]
+    carga_usuario = [sql for sql in sqls if 'FROM "auth_user"' in sql]
+    assert len(carga_usuario) == 1
+    assert '"accounts_userprofile"' in carga_usuario[0]
+    assert not [sql for sql in sqls if 'FROM "accounts_userprofile"' in sql]
+
+
+def test_alteracao_do_perfil_vale_na_proxima_requisicao(senior):
+    user, client = senior
+    portfolio = Portfolio.objects.create(nome="Pbk", host="alpha", criado_por=user)
+    url = f"/api/portfolios/{portfolio.id}/"
+    assert client.patch(url, {"nome": "Pbk2"}, format="json").status_code == 200
+
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_JUNIOR
+    profile.save()
+
+    assert client.patch(url, {"nome": "Pbk3"}, format="json").status_code == 403
+
+
+def test_sessao_aberta_com_o_model_backend_continua_valida(senior):
+    user, _client = senior
+    client = APIClient()
+    client.force_login(user, backend="django.contrib.auth.backends.ModelBackend")
+
+    assert client.get("/api/portfolios/").status_code == 200
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Asset
+from .models import Asset, PriceQuote
 
 
 @admin.register(Asset)
@@ -8,3 +8,13 @@ class AssetAdmin(admin.ModelAdmin):
     list_display = ("ticker", "nome", "tipo")
 
     search_fields = ("ticker", "nome")
+
+
+@admin.register(PriceQuote)
+class PriceQuoteAdmin(admin.ModelAdmin):
+    list_display = ("asset", "data", "fechamento")
+    list_select_related = ("asset",)
+    list_filter = ("data",)
+    search_fields = ("asset__ticker",)
+    # o autocomplete evita carregar todos os ativos no formulário
+    autocomplete_fields = ("asset",)
@@ -0,0 +1,70 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assets.services import (
+    TAMANHO_LOTE_PADRAO,
+    importar_cotacoes,
+    normalizar_cabecalho,
+)
+
+OBRIGATORIAS = ("ticker", "data", "fechamento")
+
+
+def _linhas(arquivo):
+    leitor = csv.reader(arquivo)
+    cabecalho = normalizar_cabecalho(next(leitor, []))
+    faltando = [coluna for coluna in OBRIGATORIAS if coluna not in cabecalho]
+    if faltando:
+        raise CommandError(
+            f"{arquivo.name}: colunas obrigatórias ausentes: {', '.join(faltando)}"
+        )
+    for valores in leitor:
+        if valores:
+            yield leitor.line_num, dict(zip(cabecalho, valores))
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa cotações diárias de arquivos CSV (ticker,data,fechamento e, "
+        "opcionalmente, abertura,maxima,minima; aceita também date,close,"
+        "open,high,low). Cotações já existentes são atualizadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivos", nargs="+", help="Arquivos CSV")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=TAMANHO_LOTE_PADRAO,
+            help=f"Linhas gravadas por lote (padrão: {TAMANHO_LOTE_PADRAO})",
+        )
+
+    def handle(self, *args, **options):
+        total_gravadas = total_erros = 0
+        inicio = time.perf_counter()
+        for caminho in options["arquivos"]:
+            try:
+                arquivo = open(caminho, newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(f"{caminho}: {exc.strerror}")
+            with arquivo:
+                resultado = importar_cotacoes(
+                    _linhas(arquivo), tamanho_lote=options["chunk_size"]
+                )
+            for erro in resultado["amostra"]:
+                self.stdout.write(f" - {caminho}:{erro['linha']}: {erro['erro']}")
+            total_gravadas += resultado["gravadas"]
+            total_erros += resultado["erros"]
+
+        duracao = time.perf_counter() - inicio
+        taxa = total_gravadas / duracao if duracao else 0
+        mensagem = (
+            f"{total_gravadas} cotações gravadas ({taxa:.0f}/s), "
+            f"{total_erros} linhas com erro."
+        )
+        if total_erros:
+            self.stdout.write(self.style.WARNING(mensagem))
+        else:
+            self.stdout.write(self.style.SUCCESS(mensagem))
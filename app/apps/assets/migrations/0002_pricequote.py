@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="asset",
+            options={"ordering": ["id"]},
+        ),
+        migrations.CreateModel(
+            name="PriceQuote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                ("fechamento", models.DecimalField(decimal_places=4, max_digits=14)),
+                (
+                    "abertura",
+                    models.DecimalField(
+                        blank=True, decimal_places=4, max_digits=14, null=True
+                    ),
+                ),
+                (
+                    "maxima",
+                    models.DecimalField(
+                        blank=True, decimal_places=4, max_digits=14, null=True
+                    ),
+                ),
+                (
+                    "minima",
+                    models.DecimalField(
+                        blank=True, decimal_places=4, max_digits=14, null=True
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quotes",
+                        to="assets.asset",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["asset", "data"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("asset", "data"), name="quote_asset_data_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
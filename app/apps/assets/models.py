@@ -17,3 +17,36 @@ class Asset(models.Model):
 
     class Meta:
         ordering = ["id"]
+
+
+class PriceQuote(models.Model):
+    """Cotação diária de um ativo: fechamento e, se houver, OHLC do dia."""
+
+    asset: models.ForeignKey = models.ForeignKey(
+        Asset, on_delete=models.CASCADE, related_name="quotes"
+    )
+    data: models.DateField = models.DateField()
+    fechamento: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=4
+    )
+    abertura: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=4, null=True, blank=True
+    )
+    maxima: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=4, null=True, blank=True
+    )
+    minima: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=4, null=True, blank=True
+    )
+
+    def __str__(self):
+        return f"{self.asset_id} {self.data}: {self.fechamento}"
+
+    class Meta:
+        ordering = ["asset", "data"]
+        constraints = [
+            # também é o índice das consultas "última cotação até a data X"
+            models.UniqueConstraint(
+                fields=["asset", "data"], name="quote_asset_data_uniq"
+            ),
+        ]
@@ -0,0 +1,121 @@
+"""Último preço de cada ativo, servido por um `CacheLRU` do processo.
+
+As entradas valem para uma versão do escopo de cotações do cache de respostas
+(`core.cache.ESCOPO_COTACOES`), que `importar_cotacoes` incrementa a cada
+lote. Ao ver uma versão nova o processo descarta o LRU inteiro e recarrega a
+tabela de últimos preços numa consulta só; daí em diante as leituras não vão
+ao banco. Ativos sem cotação também ficam no LRU, como `SEM_COTACAO`.
+
+A versão só chega a outros processos (os demais workers, `import_quotes`) se
+o cache do Django for compartilhado entre eles; com o `LocMemCache` padrão
+cada processo só vê as próprias importações. Por isso o LRU também é
+recarregado depois de `PRECOS_LRU_TTL` segundos, o atraso máximo de uma
+cotação importada por outro processo (0 confia só na versão).
+
+Com `PRECOS_CACHE_COMPARTILHADO` as entradas também são gravadas no cache do
+Django, consultado antes do banco quando uma entrada já saiu do LRU.
+"""
+
+from threading import Lock
+from time import monotonic
+
+from core import cache as cache_respostas
+from core.lru import CacheLRU
+from core.replicas import no_primario
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .models import Asset, PriceQuote
+
+SEM_COTACAO = (None, None)
+
+_lru = CacheLRU("precos", settings.PRECOS_LRU_TAMANHO)
+_lock = Lock()
+_estado: dict = {"versao": None, "carregado_em": 0.0}
+
+
+def _do_banco(asset_ids=None):
+    """`{asset_id: (data, fechamento)}` da última cotação, numa consulta.
+
+    Lida do primário, como as respostas em cache (ver `core.replicas`).
+    """
+    cotacoes = PriceQuote.objects.filter(asset=OuterRef("pk")).order_by("-data")
+    ativos = Asset.objects.all()
+    if asset_ids is not None:
+        ativos = ativos.filter(pk__in=asset_ids)
+    linhas = ativos.annotate(
+        data_cotacao=Subquery(cotacoes.values("data")[:1]),
+        ultimo_fechamento=Subquery(cotacoes.values("fechamento")[:1]),
+    ).values_list("pk", "data_cotacao", "ultimo_fechamento")
+    with no_primario():
+        return {
+            asset_id: (data, fechamento) for asset_id, data, fechamento in linhas
+        }
+
+
+def _chave(versao, asset_id):
+    return f"preco:{versao}:{asset_id}"
+
+
+def _compartilhar(versao, precos):
+    if settings.PRECOS_CACHE_COMPARTILHADO and precos:
+        cache.set_many(
+            {_chave(versao, asset_id): preco for asset_id, preco in precos.items()},
+            timeout=settings.CACHE_RESPOSTAS_TIMEOUT,
+        )
+
+
+def _valido(versao):
+    if versao != _estado["versao"]:
+        return False
+    ttl = settings.PRECOS_LRU_TTL
+    return not ttl or monotonic() - _estado["carregado_em"] < ttl
+
+
+def _sincronizar():
+    """Versão atual das cotações; recarrega o LRU se ela mudou ou venceu."""
+    versao = cache_respostas.versao(cache_respostas.ESCOPO_COTACOES)
+    if _valido(versao):
+        return versao
+    with _lock:
+        if not _valido(versao):
+            _lru.limpar()
+            precos = _do_banco()
+            _lru.guardar_muitos(precos)
+            _compartilhar(versao, precos)
+            _estado["versao"] = versao
+            _estado["carregado_em"] = monotonic()
+    return versao
+
+
+def ultimos_precos(asset_ids):
+    """`{asset_id: (data, fechamento)}`; `SEM_COTACAO` se o ativo não tem."""
+    asset_ids = set(asset_ids)
+    versao = _sincronizar()
+    precos = _lru.obter_muitos(asset_ids)
+    faltando = asset_ids - precos.keys()
+
+    if faltando and settings.PRECOS_CACHE_COMPARTILHADO:
+        chaves = {_chave(versao, asset_id): asset_id for asset_id in faltando}
+        achados = {
+            chaves[chave]: tuple(preco)
+            for chave, preco in cache.get_many(list(chaves)).items()
+        }
+        _lru.guardar_muitos(achados)
+        precos.update(achados)
+        faltando -= achados.keys()
+
+    if faltando:
+        do_banco = _do_banco(faltando)
+        do_banco.update(
+            {asset_id: SEM_COTACAO for asset_id in faltando - do_banco.keys()}
+        )
+        _lru.guardar_muitos(do_banco)
+        _compartilhar(versao, do_banco)
+        precos.update(do_banco)
+    return precos
+
+
+def ultimo_preco(asset_id):
+    return ultimos_precos([asset_id])[asset_id]
@@ -0,0 +1,107 @@
+"""Ingestão em lote de cotações (`PriceQuote`).
+
+As linhas chegam de um leitor em streaming e são gravadas em lotes com
+`bulk_create(update_conflicts=True)`: uma cotação que já existe para o mesmo
+`(asset, data)` é sobrescrita, então reimportar o mesmo arquivo não duplica
+nada.
+"""
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from core.cache import invalidar_cotacoes
+from django.db import transaction
+
+from .models import Asset, PriceQuote
+
+TAMANHO_LOTE_PADRAO = 5000
+LIMITE_AMOSTRA_ERROS = 20
+CAMPOS_OHLC = ("abertura", "maxima", "minima")
+# cabeçalhos aceitos além dos nomes dos campos
+SINONIMOS = {
+    "date": "data",
+    "close": "fechamento",
+    "open": "abertura",
+    "high": "maxima",
+    "low": "minima",
+}
+
+
+def normalizar_cabecalho(nomes):
+    nomes = [nome.strip().lower() for nome in nomes]
+    return [SINONIMOS.get(nome, nome) for nome in nomes]
+
+
+def _decimal(dados, nome):
+    """Valor de `nome` já no formato da coluna; `ValueError` se não couber."""
+    valor = (dados.get(nome) or "").strip()
+    if not valor:
+        return None
+    numero = Decimal(valor)
+    if not numero.is_finite():
+        raise ValueError(f"{nome} não é um número finito: {valor!r}")
+    campo = PriceQuote._meta.get_field(nome)
+    numero = numero.quantize(Decimal(1).scaleb(-campo.decimal_places))
+    if len(numero.as_tuple().digits) > campo.max_digits:
+        raise ValueError(f"{nome} com mais de {campo.max_digits} dígitos: {valor!r}")
+    return numero
+
+
+def _cotacao(dados, ativos):
+    """`PriceQuote` de uma linha (ainda não gravada); `ValueError` se inválida."""
+    ticker = (dados.get("ticker") or "").strip().upper()
+    asset_id = ativos.get(ticker)
+    if asset_id is None:
+        raise ValueError(f"Ativo desconhecido: {ticker!r}")
+    try:
+        dia = date.fromisoformat((dados.get("data") or "").strip())
+        fechamento = _decimal(dados, "fechamento")
+        ohlc = {campo: _decimal(dados, campo) for campo in CAMPOS_OHLC}
+    except (InvalidOperation, ValueError) as exc:
+        raise ValueError(f"Valor inválido: {exc}") from None
+    if fechamento is None:
+        raise ValueError("Fechamento ausente")
+    return PriceQuote(asset_id=asset_id, data=dia, fechamento=fechamento, **ohlc)
+
+
+def importar_cotacoes(linhas, tamanho_lote=None):
+    """Grava cotações vindas de `linhas`, um iterável de `(numero, dados)`.
+
+    `dados` é um dicionário com `ticker`, `data` (ISO), `fechamento` e,
+    opcionalmente, `abertura`, `maxima` e `minima`. Os tickers são resolvidos
+    uma vez, antes do primeiro lote. Linhas inválidas são contadas e as
+    primeiras vão para a amostra de erros; as demais seguem.
+
+    Retorna `{"gravadas": int, "erros": int, "amostra": [...]}`.
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE_PADRAO
+    ativos = dict(Asset.objects.values_list("ticker", "id"))
+    resultado: dict = {"gravadas": 0, "erros": 0, "amostra": []}
+    linhas = iter(linhas)
+
+    while lote := list(islice(linhas, tamanho_lote)):
+        # a última linha de um mesmo (ativo, data) no lote prevalece, como
+        # prevaleceria entre lotes
+        cotacoes = {}
+        for numero, dados in lote:
+            try:
+                cotacao = _cotacao(dados, ativos)
+            except ValueError as exc:
+                resultado["erros"] += 1
+                if len(resultado["amostra"]) < LIMITE_AMOSTRA_ERROS:
+                    resultado["amostra"].append({"linha": numero, "erro": str(exc)})
+                continue
+            cotacoes[cotacao.asset_id, cotacao.data] = cotacao
+
+        with transaction.atomic():
+            PriceQuote.objects.bulk_create(
+                cotacoes.values(),
+                batch_size=tamanho_lote,
+                update_conflicts=True,
+                unique_fields=["asset", "data"],
+                update_fields=["fechamento", *CAMPOS_OHLC],
+            )
+            invalidar_cotacoes()
+        resultado["gravadas"] += len(cotacoes)
+    return resultado
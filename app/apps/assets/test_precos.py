@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets import precos
+from apps.assets.models import Asset, PriceQuote
+from apps.assets.services import importar_cotacoes
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from core.lru import CacheLRU
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def ativos(db):
+    petr = Asset.objects.create(ticker="PRC1", nome="Prc1", tipo="ACAO")
+    vale = Asset.objects.create(ticker="PRC2", nome="Prc2", tipo="ACAO")
+    sem = Asset.objects.create(ticker="PRC3", nome="Prc3", tipo="ACAO")
+    PriceQuote.objects.create(asset=petr, data=date(2025, 1, 2), fechamento="8")
+    PriceQuote.objects.create(asset=petr, data=date(2025, 1, 3), fechamento="9")
+    PriceQuote.objects.create(asset=vale, data=date(2025, 1, 2), fechamento="5")
+    return petr, vale, sem
+
+
+def test_primeira_leitura_carrega_tudo_numa_consulta(ativos):
+    petr, vale, sem = ativos
+
+    with CaptureQueriesContext(connection) as frio:
+        resultado = precos.ultimos_precos([petr.id, vale.id, sem.id])
+    with CaptureQueriesContext(connection) as quente:
+        assert precos.ultimos_precos([petr.id, vale.id, sem.id]) == resultado
+
+    assert len(frio) == 1
+    assert len(quente) == 0
+    assert resultado == {
+        petr.id: (date(2025, 1, 3), Decimal("9.0000")),
+        vale.id: (date(2025, 1, 2), Decimal("5.0000")),
+        sem.id: precos.SEM_COTACAO,
+    }
+
+
+def test_importar_cotacoes_invalida_o_lru(ativos):
+    petr, _vale, sem = ativos
+    assert precos.ultimo_preco(sem.id) == precos.SEM_COTACAO
+
+    importar_cotacoes(
+        [
+            (2, {"ticker": "PRC1", "data": "2025-01-06", "fechamento": "10"}),
+            (3, {"ticker": "PRC3", "data": "2025-01-06", "fechamento": "2"}),
+        ]
+    )
+
+    assert precos.ultimo_preco(petr.id) == (date(2025, 1, 6), Decimal("10.0000"))
+    assert precos.ultimo_preco(sem.id) == (date(2025, 1, 6), Decimal("2.0000"))
+
+
+def test_ativo_fora_do_lru_vem_do_banco_so_ele(ativos):
+    petr, vale, sem = ativos
+    precos.ultimos_precos([petr.id])
+    novo = Asset.objects.create(ticker="PRC4", nome="Prc4", tipo="ACAO")
+
+    with CaptureQueriesContext(connection) as consultas:
+        resultado = precos.ultimos_precos([petr.id, novo.id])
+
+    assert len(consultas) == 1
+    assert "assets_pricequote" in consultas[0]["sql"]
+    assert resultado[novo.id] == precos.SEM_COTACAO
+
+
+@override_settings(PRECOS_LRU_TTL=60)
+def test_lru_vence_sem_versao_nova_de_outro_processo(ativos, monkeypatch):
+    petr, _vale, _sem = ativos
+    agora = [1000.0]
+    monkeypatch.setattr(precos, "monotonic", lambda: agora[0])
+    precos.ultimo_preco(petr.id)
+    # gravada por outro processo: a versão no cache local não muda
+    PriceQuote.objects.create(asset=petr, data=date(2025, 1, 6), fechamento="11")
+
+    agora[0] += 59
+    antes = precos.ultimo_preco(petr.id)
+    agora[0] += 1
+    with CaptureQueriesContext(connection) as consultas:
+        depois = precos.ultimo_preco(petr.id)
+
+    assert antes == (date(2025, 1, 3), Decimal("9.0000"))
+    assert depois == (date(2025, 1, 6), Decimal("11.0000"))
+    assert len(consultas) == 1
+
+
+@override_settings(PRECOS_CACHE_COMPARTILHADO=True)
+def test_cache_compartilhado_atende_quando_o_lru_perde_a_entrada(ativos):
+    petr, vale, _sem = ativos
+    precos.ultimos_precos([petr.id])
+    precos._lru.limpar()
+
+    with CaptureQueriesContext(connection) as consultas:
+        resultado = precos.ultimos_precos([petr.id, vale.id])
+
+    assert len(consultas) == 0
+    assert resultado[vale.id] == (date(2025, 1, 2), Decimal("5.0000"))
+
+
+def test_lru_descarta_o_menos_usado():
+    lru = CacheLRU("teste_lru", 2)
+    lru.guardar_muitos({"a": 1, "b": 2})
+    lru.obter_muitos(["a"])
+    lru.guardar_muitos({"c": 3})
+
+    assert lru.obter_muitos(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert lru.estatisticas() == {"hits": 3, "misses": 1, "entradas": 2}
+
+
+def test_metrics_exporta_acertos_do_lru_de_precos(ativos):
+    petr, _vale, _sem = ativos
+    user = User.objects.create_user(username="admin_precos", password="pass")
+    UserProfile.objects.filter(user=user).update(role=UserProfile.ROLE_ADMIN_SUPER)
+    client = APIClient()
+    client.login(username="admin_precos", password="pass")
+    precos.ultimos_precos([petr.id])
+    precos.ultimos_precos([petr.id])
+
+    texto = client.get("/metrics").content.decode()
+
+    assert 'cache_lru_total{cache="precos",resultado="hit"} 2' in texto
+    assert 'cache_lru_total{cache="precos",resultado="miss"} 0' in texto
+    assert 'cache_lru_entradas{cache="precos"} 3' in texto
+
+
+def test_summary_de_hoje_usa_o_lru(ativos):
+    petr, vale, sem = ativos
+    user = User.objects.create_user(username="junior_precos", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_JUNIOR, host="alpha"
+    )
+    client = APIClient()
+    client.login(username="junior_precos", password="pass")
+    portfolio = Portfolio.objects.create(nome="Lru", host="alpha", criado_por=user)
+    for asset in (petr, vale, sem):
+        Holding.objects.create(
+            portfolio=portfolio,
+            asset=asset,
+            quantidade_total=Decimal("3.00"),
+            preco_medio=Decimal("7.10"),
+        )
+    precos.ultimos_precos([petr.id])
+    hoje = timezone.localdate()
+
+    with CaptureQueriesContext(connection) as consultas:
+        data = client.get(
+            f"/api/portfolios/{portfolio.id}/summary/?as_of={hoje}"
+        ).json()
+    cache.clear()
+    ontem = client.get(
+        f"/api/portfolios/{portfolio.id}/summary/?as_of={hoje - timedelta(days=1)}"
+    ).json()
+
+    assert not any("assets_pricequote" in q["sql"] for q in consultas)
+    assert data["holdings"][0]["preco_mercado"] == 9.0
+    assert data["holdings"][0]["valor_mercado"] == 27.0
+    assert data["totais"] == ontem["totais"]
+    assert data["totais"]["sem_cotacao"] == 1
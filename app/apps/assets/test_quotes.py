@@ -0,0 +1,109 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from apps.assets.models import Asset, PriceQuote
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.fixture
+def ativos(db):
+    return [
+        Asset.objects.create(ticker="PETR4", nome="Petrobras", tipo="ACAO"),
+        Asset.objects.create(ticker="HGLG11", nome="CSHG Log", tipo="FII"),
+    ]
+
+
+def _importar(tmp_path, conteudo, *args, nome="cotacoes.csv"):
+    arquivo = tmp_path / nome
+    arquivo.write_text(conteudo, encoding="utf-8")
+    saida = StringIO()
+    call_command("import_quotes", str(arquivo), *args, stdout=saida)
+    return saida.getvalue()
+
+
+CSV = (
+    "ticker,data,fechamento,abertura,maxima,minima\n"
+    "PETR4,2025-01-02,38.1200,37.50,38.40,37.10\n"
+    "PETR4,2025-01-03,38.90,,,\n"
+    "hglg11,2025-01-02,160.5,,,\n"
+)
+
+
+def test_import_grava_cotacoes_com_ohlc_opcional(ativos, tmp_path):
+    saida = _importar(tmp_path, CSV)
+
+    assert "3 cotações gravadas" in saida
+    petr4 = PriceQuote.objects.get(asset=ativos[0], data=date(2025, 1, 2))
+    assert petr4.fechamento == Decimal("38.12")
+    assert (petr4.abertura, petr4.maxima, petr4.minima) == (
+        Decimal("37.50"),
+        Decimal("38.40"),
+        Decimal("37.10"),
+    )
+    segunda = PriceQuote.objects.get(asset=ativos[0], data=date(2025, 1, 3))
+    assert segunda.abertura is None
+    assert PriceQuote.objects.filter(asset=ativos[1]).count() == 1
+
+
+def test_reimportar_e_idempotente_e_atualiza_valores(ativos, tmp_path):
+    _importar(tmp_path, CSV)
+    ids = set(PriceQuote.objects.values_list("id", flat=True))
+
+    _importar(tmp_path, CSV)
+    assert set(PriceQuote.objects.values_list("id", flat=True)) == ids
+
+    _importar(
+        tmp_path,
+        "Ticker,Date,Close\nPETR4,2025-01-03,39.00\nPETR4,2025-01-03,39.50\n",
+        "--chunk-size",
+        "1",
+        nome="correcao.csv",
+    )
+    assert PriceQuote.objects.count() == 3
+    cotacao = PriceQuote.objects.get(asset=ativos[0], data=date(2025, 1, 3))
+    assert cotacao.fechamento == Decimal("39.50")
+
+
+def test_linhas_invalidas_sao_reportadas_e_as_demais_gravadas(ativos, tmp_path):
+    saida = _importar(
+        tmp_path,
+        "ticker,data,fechamento\n"
+        "VALE3,2025-01-02,60\n"
+        "PETR4,02/01/2025,38\n"
+        "PETR4,2025-01-02,abc\n"
+        "PETR4,2025-01-06,\n"
+        "PETR4,2025-01-07,40\n",
+    )
+
+    assert "1 cotações gravadas" in saida
+    assert "4 linhas com erro" in saida
+    assert "cotacoes.csv:2: Ativo desconhecido: 'VALE3'" in saida
+    assert "cotacoes.csv:5: Fechamento ausente" in saida
+    assert PriceQuote.objects.get().data == date(2025, 1, 7)
+
+
+def test_valores_que_nao_cabem_na_coluna_sao_erros_da_linha(ativos, tmp_path):
+    saida = _importar(
+        tmp_path,
+        "ticker,data,fechamento,maxima\n"
+        "PETR4,2025-01-02,nan,\n"
+        "PETR4,2025-01-03,123456789012345,\n"
+        "PETR4,2025-01-06,38,Infinity\n"
+        "PETR4,2025-01-07,1e30,\n"
+        "PETR4,2025-01-08,38.123456,\n",
+    )
+
+    assert "1 cotações gravadas" in saida
+    assert "4 linhas com erro" in saida
+    assert "cotacoes.csv:2: Valor inválido: fechamento não é um número" in saida
+    assert "cotacoes.csv:3: Valor inválido: fechamento com mais de 14" in saida
+    assert "cotacoes.csv:4: Valor inválido: maxima não é um número" in saida
+    assert PriceQuote.objects.get().fechamento == Decimal("38.1235")
+
+
+def test_colunas_obrigatorias_ausentes(ativos, tmp_path):
+    with pytest.raises(CommandError, match="fechamento"):
+        _importar(tmp_path, "ticker,data\nPETR4,2025-01-02\n")
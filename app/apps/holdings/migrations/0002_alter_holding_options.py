@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("holdings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="holding",
+            options={"ordering": ["id"]},
+        ),
+    ]
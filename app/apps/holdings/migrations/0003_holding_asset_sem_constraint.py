@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0002_pricequote"),
+        ("holdings", "0002_alter_holding_options"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="holding",
+            name="asset",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="assets.asset",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("holdings", "0003_holding_asset_sem_constraint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HoldingSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                (
+                    "quantidade_total",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                ("preco_medio", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("ate_transacao", models.PositiveBigIntegerField()),
+                (
+                    "holding",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="holdings.holding",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["ate_transacao"], name="snapshot_ate_transacao_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("holding", "data"), name="snapshot_holding_data_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from apps.assets.models import Asset
 from apps.portifolios.models import Portfolio
+from core.shards import GerenciadorDoTenant
 from django.db import models
 from typing import cast
 
@@ -8,7 +9,10 @@ class Holding(models.Model):
     portfolio: models.ForeignKey = models.ForeignKey(
         Portfolio, on_delete=models.CASCADE, related_name="holdings"
     )
-    asset: models.ForeignKey = models.ForeignKey(Asset, on_delete=models.CASCADE)
+    # ativos ficam no banco `default`; o holding pode estar num shard
+    asset: models.ForeignKey = models.ForeignKey(
+        Asset, on_delete=models.CASCADE, db_constraint=False
+    )
     quantidade_total: models.DecimalField = models.DecimalField(
         max_digits=12, decimal_places=2, default=0
     )
@@ -16,6 +20,8 @@ class Holding(models.Model):
         max_digits=12, decimal_places=2, default=0
     )
 
+    objects = GerenciadorDoTenant()
+
     def __str__(self):
         # cast to help the type checker know these are model instances
         asset = cast(Asset, self.asset)
@@ -24,3 +30,39 @@ class Holding(models.Model):
 
     class Meta:
         ordering = ["id"]
+
+
+class HoldingSnapshot(models.Model):
+    """Posição de um holding ao fim de um dia em que ele teve transações.
+
+    Mantido por `manage.py snapshot_holdings` (ver
+    `apps.transactions.snapshots`). `ate_transacao` é o maior id do ledger
+    considerado quando o snapshot foi gerado: uma transação com data até o
+    dia do snapshot e id maior que esse foi lançada depois e o invalida.
+    """
+
+    holding: models.ForeignKey = models.ForeignKey(
+        Holding, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    data: models.DateField = models.DateField()
+    quantidade_total: models.DecimalField = models.DecimalField(
+        max_digits=12, decimal_places=2
+    )
+    preco_medio: models.DecimalField = models.DecimalField(
+        max_digits=12, decimal_places=2
+    )
+    ate_transacao: models.PositiveBigIntegerField = models.PositiveBigIntegerField()
+
+    objects = GerenciadorDoTenant()
+
+    class Meta:
+        constraints = [
+            # também é o índice da busca pelo snapshot mais próximo de uma data
+            models.UniqueConstraint(
+                fields=["holding", "data"], name="snapshot_holding_data_uniq"
+            ),
+        ]
+        indexes = [
+            # marca de onde a próxima execução incremental continua
+            models.Index(fields=["ate_transacao"], name="snapshot_ate_transacao_idx"),
+        ]
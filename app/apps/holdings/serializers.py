@@ -1,3 +1,6 @@
+from apps.transactions.snapshots import estados_em
+from core.leitura import Coluna, LeituraLeve, texto, texto_decimal
+from core.shards import banco_do_host
 from rest_framework import serializers
 
 from .models import Holding
@@ -12,3 +15,86 @@ class HoldingSerializer(serializers.ModelSerializer):
         fields = ["id", "portfolio", "asset", "quantidade_total", "preco_medio"]
 
         read_only_fields = ["id", "quantidade_total", "preco_medio"]
+
+
+class HoldingParametrosSerializer(serializers.Serializer):
+    """`as_of`: data da posição listada (quantidade e preço médio)."""
+
+    as_of = serializers.DateField(required=False)
+
+
+def as_of_pedido(request):
+    """`?as_of=` validado, ou `None`."""
+    parametros = HoldingParametrosSerializer(data=request.query_params)
+    parametros.is_valid(raise_exception=True)
+    return parametros.validated_data.get("as_of")
+
+
+class HoldingLeitura(LeituraLeve):
+    """Leitura de holdings via `values()`, com a mesma saída do
+    `HoldingSerializer` (`asset`/`portfolio` como no `__str__` dos models).
+
+    Com `?as_of=`, quantidade e preço médio são os da data, trocados por
+    página (ou lote da exportação) com `estados_em` no banco de cada host.
+    """
+
+    campos = {
+        "id": Coluna("id"),
+        "portfolio": Coluna(
+            "portfolio__nome",
+            "portfolio__host",
+            formatar=lambda nome, host: f"{nome} ({host})",
+        ),
+        "asset": Coluna(
+            "asset__ticker",
+            "asset__nome",
+            formatar=lambda ticker, nome: f"{ticker} - {nome}",
+        ),
+        "quantidade_total": Coluna("quantidade_total", formatar=texto_decimal),
+        "preco_medio": Coluna("preco_medio", formatar=texto_decimal),
+    }
+    expansoes = {
+        "portfolio": {
+            "id": Coluna("portfolio_id", formatar=texto),
+            "nome": Coluna("portfolio__nome"),
+            "host": Coluna("portfolio__host"),
+        },
+        "asset": {
+            "id": Coluna("asset_id"),
+            "ticker": Coluna("asset__ticker"),
+            "nome": Coluna("asset__nome"),
+            "tipo": Coluna("asset__tipo"),
+        },
+    }
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.as_of = as_of_pedido(request)
+        nomes = {nome for nome, _coluna in self.saida}
+        self.na_data = self.as_of is not None and bool(
+            nomes & {"quantidade_total", "preco_medio"}
+        )
+
+    def _lookups(self):
+        lookups = super()._lookups()
+        if self.na_data:
+            lookups = sorted({*lookups, "portfolio__host"})
+        return lookups
+
+    def serializar(self, linhas):
+        if not self.na_data:
+            return super().serializar(linhas)
+        linhas = list(linhas)
+        por_banco = {}
+        for linha in linhas:
+            banco = banco_do_host(linha["portfolio__host"])
+            por_banco.setdefault(banco, []).append(linha)
+        for banco, grupo in por_banco.items():
+            estados = estados_em([linha["id"] for linha in grupo], self.as_of, banco)
+            for linha in grupo:
+                if linha["id"] in estados:
+                    quantidade_total, preco_medio = estados[linha["id"]]
+                    linha.update(
+                        quantidade_total=quantidade_total, preco_medio=preco_medio
+                    )
+        return super().serializar(linhas)
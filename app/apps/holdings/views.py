@@ -1,28 +1,96 @@
-from core.permissions import ReadOnlyForJunior
+from apps.transactions.models import Transaction
+from apps.transactions.snapshots import existe_em
+from apps.transactions.serializers import (
+    TransactionFiltroSerializer,
+    TransactionSerializer,
+)
+from core import cache as cache_respostas
+from core.exportacao import NegociacaoExportacao, exportar, formato_pedido
+from core.leitura import LeituraLeveMixin
+from core.pagination import KeysetPaginacao
+from core.permissions import ReadOnlyForJunior, perfil
+from core.shards import em_todos_os_bancos
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from .models import Holding
-from .serializers import HoldingSerializer
+from .serializers import HoldingLeitura, HoldingSerializer, as_of_pedido
 
 
-class HoldingViewSet(viewsets.ReadOnlyModelViewSet):
+class HoldingViewSet(LeituraLeveMixin, viewsets.ReadOnlyModelViewSet):
     """Read-only viewset for holdings, scoped by host/role.
 
     This viewset scopes holdings based on the related portfolio host. Admin
     users see all holdings; other users see only holdings for their
-    profile.host.
+    profile.host. The list response is cached per host (or for all hosts,
+    for ADMIN_SUPER) and invalidated whenever a portfolio, holding or
+    transaction in that scope changes.
+
+    With ``?as_of=YYYY-MM-DD`` only holdings that existed on that date are
+    listed, with the quantity and average price they had at the end of it.
     """
 
     serializer_class = HoldingSerializer
+    leitura_class = HoldingLeitura
     permission_classes = [IsAuthenticated, ReadOnlyForJunior]
 
     def get_queryset(self):
         qs = Holding.objects.select_related("asset", "portfolio").all()
-        user = getattr(self.request, "user", None)
-        profile = getattr(user, "profile", None)
+        profile = perfil(getattr(self.request, "user", None))
         if profile is None:
             return qs.none()
+        as_of = as_of_pedido(self.request)
+        if as_of is not None:
+            qs = qs.filter(existe_em(as_of))
         if profile.role == profile.ROLE_ADMIN_SUPER:
-            return qs
+            return em_todos_os_bancos(qs)
         return qs.filter(portfolio__host=profile.host)
+
+    def list(self, request, *args, **kwargs):
+        profile = perfil(request.user)
+        if profile is None:
+            return super().list(request, *args, **kwargs)
+        if profile.role == profile.ROLE_ADMIN_SUPER:
+            escopo = cache_respostas.ESCOPO_ADMIN
+        else:
+            escopo = cache_respostas.escopo_host(profile.host)
+        chave = cache_respostas.chave(
+            [escopo], "holdings", request.get_host(), request.get_full_path()
+        )
+        dados, encontrado = cache_respostas.obter_ou_calcular(
+            chave, lambda: super(HoldingViewSet, self).list(request).data
+        )
+        return Response(dados, headers=cache_respostas.cabecalho(encontrado))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        content_negotiation_class=NegociacaoExportacao,
+    )
+    def export(self, request):
+        """Todos os holdings do escopo em `?format=csv|ndjson`, em streaming."""
+        formato = formato_pedido(request)
+        leitura = HoldingLeitura(request)
+        return exportar(leitura, self.get_queryset(), formato, "holdings")
+
+    @action(
+        detail=True,
+        methods=["get"],
+        serializer_class=TransactionSerializer,
+        pagination_class=KeysetPaginacao,
+    )
+    def transactions(self, request, pk=None):
+        """Ledger do holding, do mais recente ao mais antigo.
+
+        Usa o índice `(holding, data, id)`: filtro e ordenação saem direto
+        do índice, sem ordenação em memória no banco.
+        """
+        holding = self.get_object()
+        filtros = TransactionFiltroSerializer(data=request.query_params)
+        transacoes = filtros.filtrar(Transaction.objects.filter(holding=holding))
+        pagina = self.paginate_queryset(transacoes)
+        serializer = self.get_serializer(pagina, many=True)
+        return self.get_paginated_response(serializer.data)
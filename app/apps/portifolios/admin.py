@@ -1,10 +1,31 @@
+from core.shards import banco_do_host
+from django import forms
 from django.contrib import admin
 
 from .models import Portfolio
 
 
+class PortfolioAdminForm(forms.ModelForm):
+    class Meta:
+        model = Portfolio
+        fields = "__all__"
+
+    def clean_host(self):
+        # como na API: o host só muda dentro do mesmo banco (`core.shards`)
+        host = self.cleaned_data["host"]
+        anterior = self.instance.host
+        if self.instance.pk is not None and banco_do_host(host) != banco_do_host(
+            anterior
+        ):
+            raise forms.ValidationError(
+                "O host não pode mudar para um host de outro banco."
+            )
+        return host
+
+
 @admin.register(Portfolio)
 class PortfolioAdmin(admin.ModelAdmin):
+    form = PortfolioAdminForm
     list_display = ("nome", "host", "criado_por", "criado_em")
 
     search_fields = ("nome", "host")
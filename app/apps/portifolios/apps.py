@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PortifoliosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.portifolios"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,14 +1,22 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal
+from functools import partial
 
 from apps.accounts.models import UserProfile
 from apps.assets.models import Asset
 from apps.holdings.models import Holding
 from apps.portifolios.models import Portfolio
 from apps.transactions.models import Transaction
+from core.cache import invalidar_tudo
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.utils import timezone
 
+from apps.portifolios import seed
+
 
 class Command(BaseCommand):
     help = "Popular dados de demonstração para portfolios (multi-tenant)."
@@ -41,8 +49,48 @@ class Command(BaseCommand):
             default=1,
             help="Quantidade de transações por portfolio",
         )
+        parser.add_argument(
+            "--scale",
+            action="store_true",
+            help=(
+                "Gera dados de carga em massa (bulk_create, sem atualização "
+                "por transação) para testes de desempenho"
+            ),
+        )
+        parser.add_argument(
+            "--num-hosts",
+            type=int,
+            help="Com --scale: gera os hosts host0001..hostN em vez de --hosts",
+        )
+        parser.add_argument(
+            "--portfolios-per-host",
+            type=int,
+            default=100,
+            help="Com --scale: portfolios por host (padrão: 100)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Com --scale: semente do gerador; mesma semente, mesmos dados",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Com --scale: processos gerando hosts em paralelo (padrão: 1)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Com --scale: linhas por bulk_create (padrão: 5000)",
+        )
 
     def handle(self, *args, **options):
+        if options.get("scale"):
+            return self.handle_scale(options)
+
         dry_run = options.get("dry_run")
         hosts = options.get("hosts") or ["alpha", "beta"]
 
@@ -179,3 +227,88 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS("Seeding complete."))
         admin_profile.role = UserProfile.ROLE_ADMIN_SUPER
+
+    def handle_scale(self, options):
+        num_hosts = options.get("num_hosts")
+        if num_hosts:
+            hosts = [f"host{n:04d}" for n in range(1, num_hosts + 1)]
+        else:
+            hosts = options.get("hosts") or ["alpha", "beta"]
+        usernames = [nome for host in hosts for nome in seed.nomes_de_usuario(host)]
+        if User.objects.filter(username__in=usernames).exists():
+            raise CommandError("Hosts já populados; --scale gera apenas hosts novos.")
+
+        num_assets = int(options.get("num_assets") or 3)
+        holdings_per = int(options.get("holdings_per_portfolio") or 1)
+        txs_per = int(options.get("transactions_per_portfolio") or 1)
+        portfolios_per = int(options.get("portfolios_per_host") or 0)
+        workers = max(1, int(options.get("workers") or 1))
+        inicio = time.perf_counter()
+
+        admin_user, created = User.objects.get_or_create(username="admin_super")
+        if created:
+            admin_user.set_password("admin")
+            admin_user.save()
+        UserProfile.objects.update_or_create(
+            user=admin_user,
+            defaults={"role": UserProfile.ROLE_ADMIN_SUPER, "host": ""},
+        )
+        Asset.objects.bulk_create(
+            [
+                Asset(
+                    ticker=f"SEED{i}",
+                    nome=f"Seed Asset {i}",
+                    tipo="ACAO" if i % 2 else "FII",
+                )
+                for i in range(1, num_assets + 1)
+            ],
+            ignore_conflicts=True,
+        )
+        asset_ids = list(
+            Asset.objects.filter(ticker__startswith="SEED")
+            .order_by("ticker")
+            .values_list("id", flat=True)
+        )
+
+        gerar = partial(
+            seed.gerar_host,
+            seed=options.get("seed"),
+            asset_ids=asset_ids,
+            portfolios_por_host=portfolios_per,
+            holdings_por_portfolio=holdings_per,
+            transacoes_por_portfolio=txs_per,
+            tamanho_lote=options.get("chunk_size"),
+            senha=make_password("pass"),
+        )
+        if workers == 1:
+            contagens = map(gerar, hosts)
+            totais = self._somar(contagens, len(hosts))
+        else:
+            # conexões abertas não podem ser compartilhadas com processos filhos
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=seed.inicializar_worker
+            ) as pool:
+                totais = self._somar(pool.map(gerar, hosts), len(hosts))
+
+        # dados gravados sem sinais: respostas em cache ficam desatualizadas
+        invalidar_tudo()
+        duracao = time.perf_counter() - inicio
+        linhas = sum(totais.values())
+        taxa = linhas / duracao if duracao else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(hosts)} hosts, {totais['portfolios']} portfolios, "
+                f"{totais['holdings']} holdings, {totais['transacoes']} "
+                f"transações em {duracao:.1f}s ({taxa:.0f} linhas/s)."
+            )
+        )
+
+    def _somar(self, contagens, total_hosts):
+        totais = {"usuarios": 0, "portfolios": 0, "holdings": 0, "transacoes": 0}
+        for feitos, contagem in enumerate(contagens, start=1):
+            for nome, valor in contagem.items():
+                totais[nome] += valor
+            if feitos % 100 == 0 or feitos == total_hosts:
+                self.stdout.write(f" - {feitos}/{total_hosts} hosts")
+        return totais
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("portifolios", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="portfolio",
+            options={"ordering": ["id"]},
+        ),
+        migrations.AddIndex(
+            model_name="portfolio",
+            index=models.Index(fields=["host", "id"], name="portfolio_host_id_idx"),
+        ),
+    ]
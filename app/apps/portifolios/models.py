@@ -1,5 +1,6 @@
 import uuid
 
+from core.shards import GerenciadorDoTenant
 from django.contrib.auth.models import User
 from django.db import models
 
@@ -10,12 +11,21 @@ class Portfolio(models.Model):
     )
     nome: models.CharField = models.CharField(max_length=100)
     host: models.CharField = models.CharField(max_length=50)  # multi-tenant
-    criado_por: models.ForeignKey = models.ForeignKey(User, on_delete=models.CASCADE)
+    # usuários ficam no banco `default`; o portfólio pode estar num shard
+    criado_por: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False
+    )
     criado_em: models.DateTimeField = models.DateTimeField(auto_now_add=True)
     atualizado_em: models.DateTimeField = models.DateTimeField(auto_now=True)
 
+    objects = GerenciadorDoTenant()
+
     def __str__(self):
         return f"{self.nome} ({self.host})"
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            # listagem por host paginada por cursor: WHERE host = ? AND id > ?
+            models.Index(fields=["host", "id"], name="portfolio_host_id_idx"),
+        ]
@@ -0,0 +1,159 @@
+"""Geração em massa de dados de carga para testes de desempenho.
+
+Cada host é gerado de forma independente a partir de `Random(f"{seed}:{host}")`,
+então o resultado é o mesmo qualquer que seja a ordem ou o processo em que os
+hosts são gerados. Tudo é gravado com `bulk_create` em lotes, sem passar por
+`Transaction.save`: o estado final de cada holding é calculado com
+`aplicar_movimento` enquanto o ledger é gerado e gravado junto com o holding,
+e os lotes de compra vêm de `aplicar_lotes` sobre as transações gravadas.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from apps.accounts.models import UserProfile
+from apps.holdings.models import Holding
+from apps.transactions.models import Transaction
+from apps.transactions.services import ZERO, aplicar_lotes, aplicar_movimento
+from core.shards import banco_do_host
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Portfolio
+
+DATA_INICIAL = date(2020, 1, 1)
+PROBABILIDADE_VENDA = 0.3
+
+
+def nomes_de_usuario(host):
+    return f"senior_{host}", f"junior_{host}"
+
+
+def _criar_usuarios(host, senha):
+    senior, junior = User.objects.bulk_create(
+        [User(username=nome, password=senha) for nome in nomes_de_usuario(host)]
+    )
+    # bulk_create não dispara o post_save que cria o perfil
+    UserProfile.objects.bulk_create(
+        [
+            UserProfile(
+                user=senior, role=UserProfile.ROLE_INVESTIDOR_SENIOR, host=host
+            ),
+            UserProfile(
+                user=junior, role=UserProfile.ROLE_INVESTIDOR_JUNIOR, host=host
+            ),
+        ]
+    )
+    return senior
+
+
+def _ledger(rng, quantidade):
+    """Gera `(tipo, quantidade, preco, data)` de um holding e o estado final."""
+    movimentos = []
+    quantidade_total, preco_medio = ZERO, ZERO
+    dia = DATA_INICIAL + timedelta(days=rng.randrange(365))
+    for _ in range(quantidade):
+        preco = Decimal(rng.randrange(100, 20000)) / 100
+        if quantidade_total and rng.random() < PROBABILIDADE_VENDA:
+            tipo = "VENDA"
+            qtd = Decimal(rng.randint(1, int(quantidade_total)))
+        else:
+            tipo = "COMPRA"
+            qtd = Decimal(rng.randint(1, 500))
+        quantidade_total, preco_medio = aplicar_movimento(
+            quantidade_total, preco_medio, tipo, qtd, preco
+        )
+        movimentos.append((tipo, qtd, preco, dia))
+        dia += timedelta(days=rng.randrange(1, 8))
+    return movimentos, quantidade_total, preco_medio
+
+
+def _gravar(host, portfolios, holdings, transacoes, tamanho_lote):
+    banco = banco_do_host(host)
+    with transaction.atomic(using=banco):
+        Portfolio.objects.bulk_create(portfolios, batch_size=tamanho_lote)
+        Holding.objects.bulk_create(holdings, batch_size=tamanho_lote)
+        Transaction.objects.bulk_create(transacoes, batch_size=tamanho_lote)
+        aplicar_lotes(banco, transacoes)
+
+
+def gerar_host(
+    host,
+    seed,
+    asset_ids,
+    portfolios_por_host,
+    holdings_por_portfolio,
+    transacoes_por_portfolio,
+    tamanho_lote,
+    senha,
+):
+    """Gera usuários, portfólios, holdings e transações de um host.
+
+    `senha` já vem com hash (calculado uma vez só). Retorna a contagem de
+    linhas gravadas por tabela.
+    """
+    rng = random.Random(f"{seed}:{host}")
+    senior = _criar_usuarios(host, senha)
+    contagem = {"usuarios": 2, "portfolios": 0, "holdings": 0, "transacoes": 0}
+    holdings_por_portfolio = min(holdings_por_portfolio, len(asset_ids))
+    portfolios: list[Portfolio] = []
+    holdings: list[Holding] = []
+    transacoes: list[Transaction] = []
+
+    for indice in range(portfolios_por_host):
+        portfolio = Portfolio(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            nome=f"Carga {host} {indice}",
+            host=host,
+            criado_por=senior,
+        )
+        portfolios.append(portfolio)
+        ativos = rng.sample(asset_ids, holdings_por_portfolio)
+        for posicao, asset_id in enumerate(ativos):
+            # distribui as transações do portfólio entre os holdings
+            quantidade = transacoes_por_portfolio // len(ativos) + (
+                posicao < transacoes_por_portfolio % len(ativos)
+            )
+            movimentos, quantidade_total, preco_medio = _ledger(rng, quantidade)
+            holding = Holding(
+                portfolio=portfolio,
+                asset_id=asset_id,
+                quantidade_total=quantidade_total,
+                preco_medio=preco_medio,
+            )
+            holdings.append(holding)
+            transacoes.extend(
+                Transaction(
+                    holding=holding,
+                    tipo=tipo,
+                    quantidade=qtd,
+                    preco=preco,
+                    data=dia,
+                    criado_por=senior,
+                )
+                for tipo, qtd, preco, dia in movimentos
+            )
+
+        if len(transacoes) >= tamanho_lote or len(holdings) >= tamanho_lote:
+            _gravar(host, portfolios, holdings, transacoes, tamanho_lote)
+            contagem["portfolios"] += len(portfolios)
+            contagem["holdings"] += len(holdings)
+            contagem["transacoes"] += len(transacoes)
+            portfolios, holdings, transacoes = [], [], []
+
+    _gravar(host, portfolios, holdings, transacoes, tamanho_lote)
+    contagem["portfolios"] += len(portfolios)
+    contagem["holdings"] += len(holdings)
+    contagem["transacoes"] += len(transacoes)
+    return contagem
+
+
+def inicializar_worker():
+    """Prepara um processo do pool: Django configurado e sem conexões herdadas."""
+    import django
+    from django.db import connections
+
+    django.setup()
+    connections.close_all()
@@ -1,3 +1,5 @@
+from core.leitura import Coluna, ColunaDataHora, LeituraLeve, texto
+from core.shards import banco_do_host
 from rest_framework import serializers
 
 from .models import Portfolio
@@ -14,8 +16,66 @@ class PortfolioSerializer(serializers.ModelSerializer):
 
         read_only_fields = ["id", "criado_por", "criado_em", "atualizado_em"]
 
+    def validate_host(self, value):
+        # o host decide o banco do portfólio (`core.shards`); trocar de banco
+        # gravaria uma cópia no novo e deixaria holdings e transações no antigo
+        if self.instance is not None and banco_do_host(value) != banco_do_host(
+            self.instance.host
+        ):
+            raise serializers.ValidationError(
+                "O host não pode mudar para um host de outro banco."
+            )
+        return value
+
     def create(self, validated_data):
         request = self.context.get("request")
         if request and hasattr(request, "user"):
             validated_data["criado_por"] = request.user
         return super().create(validated_data)
+
+
+class PortfolioLeitura(LeituraLeve):
+    """Leitura de portfólios via `values()`, com a saída do
+    `PortfolioSerializer`; `criado_por` vem no mesmo `JOIN`."""
+
+    campos = {
+        "id": Coluna("id", formatar=texto),
+        "nome": Coluna("nome"),
+        "host": Coluna("host"),
+        "criado_por": Coluna("criado_por__username"),
+        "criado_em": ColunaDataHora("criado_em"),
+        "atualizado_em": ColunaDataHora("atualizado_em"),
+    }
+    expansoes = {
+        "criado_por": {
+            "id": Coluna("criado_por_id"),
+            "username": Coluna("criado_por__username"),
+        },
+    }
+
+
+class ResumoParametrosSerializer(serializers.Serializer):
+    """`as_of`: data para marcar as posições a mercado no resumo."""
+
+    as_of = serializers.DateField(required=False)
+
+
+class RealizadoParametrosSerializer(serializers.Serializer):
+    """`inicio`/`fim`: período (datas das vendas) do resultado realizado."""
+
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get("inicio"), attrs.get("fim")
+        if inicio and fim and inicio > fim:
+            raise serializers.ValidationError({"fim": "Fim antes do início"})
+        return attrs
+
+
+class ResumoLoteSerializer(ResumoParametrosSerializer):
+    LIMITE_IDS = 500
+
+    ids: serializers.ListField = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=LIMITE_IDS
+    )
@@ -0,0 +1,291 @@
+"""Consultas agregadas sobre as posições de um portfólio.
+
+Com `as_of` o resumo também marca as posições a mercado: cada holding recebe,
+na mesma consulta, o fechamento da última `PriceQuote` do ativo até essa data
+(uma busca pelo índice `(asset, data)` por linha), e valor de mercado,
+resultado não realizado e peso são somados enquanto as linhas são lidas.
+Quando `as_of` é hoje ou depois, a última cotação de cada ativo é a mais
+recente de todas e vem do LRU de `apps.assets.precos`, sem subquery.
+
+A posição também é a da data: holdings criados depois dela ficam de fora e
+os que tiveram transações depois dela recebem quantidade e preço médio de
+`apps.transactions.snapshots.estados_em` (o snapshot mais próximo mais as
+transações entre ele e a data), um lote de holdings por consulta.
+
+O resultado realizado vem das linhas de `RealizedGain` gravadas junto com as
+vendas (`apps.transactions.lotes`), somadas numa consulta só.
+"""
+
+from decimal import Decimal
+from itertools import groupby, islice
+
+from apps.assets.models import PriceQuote
+from apps.assets.precos import ultimos_precos
+from apps.holdings.models import Holding
+from apps.transactions.models import RealizedGain
+from apps.transactions.snapshots import estados_em, existe_em
+from django.conf import settings
+from core.shards import separar_por_banco
+from django.db.models import (
+    Count,
+    DateField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.utils import timezone
+
+from .models import Portfolio
+
+ZERO = Decimal("0")
+CEM = Decimal("100")
+CENTESIMO = Decimal("0.01")
+DECIMO_DE_MILESIMO = Decimal("0.0001")
+
+VALOR_TOTAL = ExpressionWrapper(
+    F("quantidade_total") * F("preco_medio"),
+    output_field=DecimalField(max_digits=24, decimal_places=4),
+)
+VALOR_MERCADO = ExpressionWrapper(
+    F("quantidade_total") * F("preco_mercado"),
+    output_field=DecimalField(max_digits=24, decimal_places=4),
+)
+
+
+def ultima_cotacao(as_of, campo="fechamento"):
+    """Subquery com `campo` da última cotação do ativo do holding até `as_of`."""
+    cotacoes = PriceQuote.objects.filter(
+        asset=OuterRef("asset_id"), data__lte=as_of
+    ).order_by("-data")
+    saida = PriceQuote._meta.get_field(campo)
+    return Subquery(cotacoes.values(campo)[:1], output_field=saida)
+
+
+def _preco_atual(as_of):
+    return as_of is not None and as_of >= timezone.localdate()
+
+
+def holdings_com_valor(as_of=None, **filtros):
+    """Holdings com o ativo carregado e `valor_total` calculado no banco.
+
+    Com `as_of` no passado também anota `preco_mercado`, `data_cotacao` e
+    `valor_mercado` (nulos quando o ativo não tem cotação até a data); para
+    `as_of` de hoje em diante esses valores vêm de `avaliados`. Com `as_of`,
+    só entram os holdings que já existiam na data; a posição na data também
+    vem de `avaliados`.
+    """
+    holdings = (
+        Holding.objects.filter(**filtros)
+        .select_related("asset")
+        .annotate(valor_total=VALOR_TOTAL)
+        .order_by("portfolio_id", "id")
+    )
+    if as_of is None:
+        return holdings
+    holdings = holdings.filter(existe_em(as_of))
+    if _preco_atual(as_of):
+        return holdings
+    return holdings.annotate(
+        preco_mercado=ultima_cotacao(as_of),
+        data_cotacao=ExpressionWrapper(
+            ultima_cotacao(as_of, "data"), output_field=DateField()
+        ),
+        valor_mercado=VALOR_MERCADO,
+    )
+
+
+def _multiplicar(quantidade, preco):
+    return (quantidade * preco).quantize(DECIMO_DE_MILESIMO)
+
+
+def _com_precos_atuais(holdings, tamanho_lote):
+    holdings = iter(holdings)
+    while lote := list(islice(holdings, tamanho_lote)):
+        precos = ultimos_precos({h.asset_id for h in lote})
+        for h in lote:
+            h.data_cotacao, h.preco_mercado = precos[h.asset_id]
+            h.valor_mercado = (
+                None
+                if h.preco_mercado is None
+                else _multiplicar(h.quantidade_total, h.preco_mercado)
+            )
+        yield from lote
+
+
+def _na_data(holdings, as_of, banco, tamanho_lote):
+    holdings = iter(holdings)
+    while lote := list(islice(holdings, tamanho_lote)):
+        estados = estados_em([h.pk for h in lote], as_of, banco)
+        for h in lote:
+            if h.pk not in estados:
+                continue
+            h.quantidade_total, h.preco_medio = estados[h.pk]
+            h.valor_total = _multiplicar(h.quantidade_total, h.preco_medio)
+            if getattr(h, "preco_mercado", None) is not None:
+                h.valor_mercado = _multiplicar(h.quantidade_total, h.preco_mercado)
+        yield from lote
+
+
+def avaliados(holdings, as_of, tamanho_lote=500):
+    """Itera `holdings_com_valor(as_of)` pronto para `montar_resumo`."""
+    banco = holdings.db
+    holdings = holdings.iterator(chunk_size=tamanho_lote)
+    if as_of is None:
+        return holdings
+    holdings = _na_data(holdings, as_of, banco, tamanho_lote)
+    if _preco_atual(as_of):
+        return _com_precos_atuais(holdings, tamanho_lote)
+    return holdings
+
+
+def _percentual(parte, total):
+    return (parte * CEM / total).quantize(CENTESIMO) if total else ZERO
+
+
+def montar_resumo(portfolio_id, holdings, as_of=None):
+    """Monta o resumo de um portfólio a partir de holdings anotados.
+
+    Os totais e a quebra por `Asset.tipo` são somados em `Decimal` enquanto
+    as linhas são percorridas, sem consultas adicionais. Com `as_of` (e
+    holdings anotados por `holdings_com_valor(as_of)`) cada linha e os totais
+    ganham os valores de mercado; o peso de cada holding é sobre o valor de
+    mercado dos holdings com cotação.
+    """
+    linhas = []
+    total_quantidade = ZERO
+    total_valor = ZERO
+    total_mercado = ZERO
+    total_resultado = ZERO
+    sem_cotacao = 0
+    por_tipo: dict[str, dict] = {}
+    for h in holdings:
+        linha = {
+            "asset": h.asset.ticker,
+            "tipo": h.asset.tipo,
+            "quantidade": h.quantidade_total,
+            "preco_medio": h.preco_medio,
+            "valor_total": h.valor_total,
+        }
+        if as_of is not None:
+            resultado = None
+            if h.valor_mercado is None:
+                sem_cotacao += 1
+            else:
+                resultado = h.valor_mercado - h.valor_total
+                total_mercado += h.valor_mercado
+                total_resultado += resultado
+            linha.update(
+                preco_mercado=h.preco_mercado,
+                data_cotacao=h.data_cotacao,
+                valor_mercado=h.valor_mercado,
+                resultado_nao_realizado=resultado,
+            )
+        linhas.append(linha)
+        total_quantidade += h.quantidade_total
+        total_valor += h.valor_total
+        grupo = por_tipo.setdefault(
+            h.asset.tipo, {"tipo": h.asset.tipo, "holdings": 0, "valor_total": ZERO}
+        )
+        grupo["holdings"] += 1
+        grupo["valor_total"] += h.valor_total
+
+    for grupo in por_tipo.values():
+        grupo["percentual"] = _percentual(grupo["valor_total"], total_valor)
+
+    resumo = {
+        "portfolio": portfolio_id,
+        "holdings": linhas,
+        "totais": {
+            "holdings": len(linhas),
+            "quantidade": total_quantidade,
+            "valor_total": total_valor,
+        },
+        "por_tipo": sorted(por_tipo.values(), key=lambda grupo: grupo["tipo"]),
+    }
+    if as_of is not None:
+        for linha in linhas:
+            linha["peso"] = (
+                None
+                if linha["valor_mercado"] is None
+                else _percentual(linha["valor_mercado"], total_mercado)
+            )
+        resumo["as_of"] = as_of
+        resumo["totais"].update(
+            valor_mercado=total_mercado,
+            resultado_nao_realizado=total_resultado,
+            sem_cotacao=sem_cotacao,
+        )
+    return resumo
+
+
+def resumo_portfolio(portfolio, as_of=None):
+    """Resumo de um portfólio calculado com uma única consulta."""
+    holdings = holdings_com_valor(as_of, portfolio=portfolio)
+    return montar_resumo(portfolio.pk, avaliados(holdings, as_of), as_of)
+
+
+def _resumos_agrupados(holdings, pendentes, tamanho_lote, as_of):
+    holdings = avaliados(holdings, as_of, tamanho_lote)
+    for portfolio_id, grupo in groupby(holdings, key=lambda h: h.portfolio_id):
+        pendentes.discard(portfolio_id)
+        yield portfolio_id, montar_resumo(portfolio_id, grupo, as_of)
+    for portfolio_id in sorted(pendentes):
+        yield portfolio_id, montar_resumo(portfolio_id, [], as_of)
+
+
+def resumos_portfolios(portfolio_ids, tamanho_lote=500, as_of=None):
+    """Gera `(portfolio_id, resumo)` para vários portfólios.
+
+    Todos os holdings de um banco vêm de uma única consulta ordenada por
+    portfólio, lida em streaming; portfólios sem holdings recebem um resumo
+    vazio no final. Com shards, é uma consulta por banco que tem algum dos
+    portfólios.
+    """
+    for banco, ids in separar_por_banco(Portfolio, portfolio_ids).items():
+        pendentes = set(ids)
+        holdings = holdings_com_valor(as_of, portfolio_id__in=ids).using(banco)
+        yield from _resumos_agrupados(holdings, pendentes, tamanho_lote, as_of)
+
+
+def resumos_do_host(host, tamanho_lote=500, as_of=None):
+    """Como `resumos_portfolios`, para todos os portfólios de um host.
+
+    Os holdings são filtrados pelo host na própria consulta, sem uma lista
+    de ids.
+    """
+    pendentes = set(Portfolio.objects.filter(host=host).values_list("pk", flat=True))
+    holdings = holdings_com_valor(as_of, portfolio__host=host)
+    return _resumos_agrupados(holdings, pendentes, tamanho_lote, as_of)
+
+
+def resultado_realizado(portfolio, inicio=None, fim=None):
+    """Resultado realizado das vendas do portfólio de `inicio` a `fim`.
+
+    Um único agregado sobre o índice `(portfolio, data)` de `RealizedGain`;
+    o custo segue `LOTES_METODO`.
+    """
+    realizacoes = RealizedGain.objects.filter(portfolio=portfolio)
+    if inicio is not None:
+        realizacoes = realizacoes.filter(data__gte=inicio)
+    if fim is not None:
+        realizacoes = realizacoes.filter(data__lte=fim)
+    totais = realizacoes.aggregate(
+        vendas=Count("venda_id", distinct=True),
+        quantidade=Sum("quantidade"),
+        custo=Sum("custo"),
+        receita=Sum("receita"),
+        resultado=Sum("resultado"),
+    )
+    for campo in ("quantidade", "custo", "receita", "resultado"):
+        if totais[campo] is None:
+            totais[campo] = ZERO
+    return {
+        "portfolio": portfolio.pk,
+        "inicio": inicio,
+        "fim": fim,
+        "metodo": settings.LOTES_METODO,
+        **totais,
+    }
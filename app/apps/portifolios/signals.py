@@ -0,0 +1,36 @@
+from apps.holdings.models import Holding
+from apps.transactions.models import Transaction
+from core.cache import invalidar_portfolio
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Portfolio
+
+
+@receiver(post_save, sender=Portfolio)
+@receiver(post_delete, sender=Portfolio)
+def invalidar_cache_portfolio(sender, instance, **kwargs):
+    invalidar_portfolio(instance.pk, instance.host)
+
+
+@receiver(post_save, sender=Holding)
+@receiver(post_delete, sender=Holding)
+def invalidar_cache_holding(sender, instance, **kwargs):
+    portfolio = instance.portfolio
+    invalidar_portfolio(portfolio.pk, portfolio.host)
+
+
+# Sem post_delete para Transaction: um receptor ali impediria o Django de
+# excluir o ledger em cascata com um único DELETE. Exclusões de transações
+# passam por `reconstruir_holdings`, que invalida o cache.
+@receiver(post_save, sender=Transaction)
+def invalidar_cache_transacao(sender, instance, **kwargs):
+    # `atualizar_holding` grava com UPDATE direto, sem sinal de Holding.
+    portfolio_id, host = (
+        Holding.objects.filter(pk=instance.holding_id)
+        .values_list("portfolio_id", "portfolio__host")
+        .first()
+        or (None, None)
+    )
+    if portfolio_id is not None:
+        invalidar_portfolio(portfolio_id, host)
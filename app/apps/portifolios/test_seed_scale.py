@@ -0,0 +1,87 @@
+from io import StringIO
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+
+
+def _seed_scale(*extras):
+    out = StringIO()
+    call_command(
+        "portfolio_seed",
+        "--scale",
+        "--num-hosts",
+        "3",
+        "--portfolios-per-host",
+        "4",
+        "--num-assets",
+        "5",
+        "--holdings-per-portfolio",
+        "2",
+        "--transactions-per-portfolio",
+        "7",
+        "--chunk-size",
+        "10",
+        *extras,
+        stdout=out,
+    )
+    return out.getvalue()
+
+
+def _retrato():
+    return (
+        sorted(Portfolio.objects.values_list("id", "host")),
+        list(
+            Transaction.objects.order_by(
+                "holding__portfolio_id", "data", "id"
+            ).values_list(
+                "holding__portfolio_id",
+                "holding__asset__ticker",
+                "tipo",
+                "quantidade",
+                "preco",
+                "data",
+            )
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_scale_gera_volume_pedido_e_holdings_consistentes_com_ledger():
+    saida = _seed_scale()
+
+    assert "3 hosts, 12 portfolios, 24 holdings, 84 transações" in saida
+    assert "linhas/s" in saida
+    assert UserProfile.objects.filter(
+        host="host0002", role=UserProfile.ROLE_INVESTIDOR_SENIOR
+    ).exists()
+    assert Holding.objects.filter(quantidade_total__gt=0).exists()
+
+    verificacao = StringIO()
+    call_command("rebuild_holdings", "--verify", stdout=verificacao)
+    assert "0 divergentes" in verificacao.getvalue()
+
+
+@pytest.mark.django_db
+def test_scale_e_deterministico_pela_semente():
+    _seed_scale("--seed", "7")
+    primeiro = _retrato()
+    User.objects.exclude(username="admin_super").delete()
+    Asset.objects.all().delete()
+
+    _seed_scale("--seed", "7")
+
+    assert _retrato() == primeiro
+
+
+@pytest.mark.django_db
+def test_scale_recusa_hosts_ja_populados():
+    _seed_scale()
+
+    with pytest.raises(CommandError):
+        _seed_scale()
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def junior_alpha(db):
+    user = User.objects.create_user(username="junior_summary", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_JUNIOR
+    profile.host = "alpha"
+    profile.save()
+    client = APIClient()
+    client.login(username="junior_summary", password="pass")
+    return user, client
+
+
+def _criar_holdings(portfolio, quantidade, inicio=0):
+    for i in range(inicio, inicio + quantidade):
+        asset = Asset.objects.create(
+            ticker=f"SUM{i}", nome=f"Summary {i}", tipo="ACAO" if i % 2 else "FII"
+        )
+        Holding.objects.create(
+            portfolio=portfolio,
+            asset=asset,
+            quantidade_total=Decimal("3.00"),
+            preco_medio=Decimal("7.10"),
+        )
+
+
+def test_summary_retorna_holdings_totais_e_quebra_por_tipo(junior_alpha):
+    user, client = junior_alpha
+    portfolio = Portfolio.objects.create(nome="Psum", host="alpha", criado_por=user)
+    _criar_holdings(portfolio, 3)
+
+    resp = client.get(f"/api/portfolios/{portfolio.id}/summary/")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["portfolio"] == str(portfolio.id)
+    assert [h["asset"] for h in data["holdings"]] == ["SUM0", "SUM1", "SUM2"]
+    assert data["holdings"][0] == {
+        "asset": "SUM0",
+        "tipo": "FII",
+        "quantidade": 3.0,
+        "preco_medio": 7.1,
+        "valor_total": 21.3,
+    }
+    assert data["totais"] == {"holdings": 3, "quantidade": 9.0, "valor_total": 63.9}
+    assert data["por_tipo"] == [
+        {"tipo": "ACAO", "holdings": 1, "valor_total": 21.3, "percentual": 33.33},
+        {"tipo": "FII", "holdings": 2, "valor_total": 42.6, "percentual": 66.67},
+    ]
+
+
+def test_summary_de_portfolio_vazio(junior_alpha):
+    user, client = junior_alpha
+    portfolio = Portfolio.objects.create(nome="Pvazio", host="alpha", criado_por=user)
+
+    data = client.get(f"/api/portfolios/{portfolio.id}/summary/").json()
+
+    assert data["holdings"] == []
+    assert data["totais"] == {"holdings": 0, "quantidade": 0.0, "valor_total": 0.0}
+    assert data["por_tipo"] == []
+
+
+def test_summary_faz_numero_constante_de_consultas(junior_alpha):
+    user, client = junior_alpha
+    portfolio = Portfolio.objects.create(nome="Pq", host="alpha", criado_por=user)
+    url = f"/api/portfolios/{portfolio.id}/summary/"
+
+    _criar_holdings(portfolio, 1)
+    with CaptureQueriesContext(connection) as poucos:
+        assert client.get(url).status_code == 200
+
+    _criar_holdings(portfolio, 30, inicio=1)
+    with CaptureQueriesContext(connection) as muitos:
+        resp = client.get(url)
+
+    assert len(resp.json()["holdings"]) == 31
+    assert len(muitos) == len(poucos)
@@ -0,0 +1,169 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset, PriceQuote
+from apps.assets.services import importar_cotacoes
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.portifolios.services import resumos_do_host
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def junior_alpha(db):
+    user = User.objects.create_user(username="junior_as_of", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_JUNIOR, host="alpha"
+    )
+    client = APIClient()
+    client.login(username="junior_as_of", password="pass")
+    return user, client
+
+
+def _holding(portfolio, ticker, cotacoes=()):
+    asset = Asset.objects.create(ticker=ticker, nome=ticker, tipo="ACAO")
+    for dia, fechamento in cotacoes:
+        PriceQuote.objects.create(asset=asset, data=dia, fechamento=fechamento)
+    return Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal("3.00"),
+        preco_medio=Decimal("7.10"),
+    )
+
+
+@pytest.fixture
+def carteira(junior_alpha):
+    user, _client = junior_alpha
+    portfolio = Portfolio.objects.create(nome="Mtm", host="alpha", criado_por=user)
+    _holding(
+        portfolio,
+        "MTM1",
+        [(date(2025, 1, 2), "8.00"), (date(2025, 1, 10), "9.00")],
+    )
+    _holding(portfolio, "MTM2", [(date(2025, 1, 3), "5.00")])
+    _holding(portfolio, "MTM3")
+    return portfolio
+
+
+def test_summary_as_of_usa_a_ultima_cotacao_ate_a_data(junior_alpha, carteira):
+    _user, client = junior_alpha
+
+    resp = client.get(f"/api/portfolios/{carteira.id}/summary/?as_of=2025-01-05")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["as_of"] == "2025-01-05"
+    assert data["holdings"][0] == {
+        "asset": "MTM1",
+        "tipo": "ACAO",
+        "quantidade": 3.0,
+        "preco_medio": 7.1,
+        "valor_total": 21.3,
+        "preco_mercado": 8.0,
+        "data_cotacao": "2025-01-02",
+        "valor_mercado": 24.0,
+        "resultado_nao_realizado": 2.7,
+        "peso": 61.54,
+    }
+    assert data["holdings"][1]["resultado_nao_realizado"] == -6.3
+    assert data["holdings"][1]["peso"] == 38.46
+    assert data["holdings"][2] == {
+        "asset": "MTM3",
+        "tipo": "ACAO",
+        "quantidade": 3.0,
+        "preco_medio": 7.1,
+        "valor_total": 21.3,
+        "preco_mercado": None,
+        "data_cotacao": None,
+        "valor_mercado": None,
+        "resultado_nao_realizado": None,
+        "peso": None,
+    }
+    assert data["totais"] == {
+        "holdings": 3,
+        "quantidade": 9.0,
+        "valor_total": 63.9,
+        "valor_mercado": 39.0,
+        "resultado_nao_realizado": -3.6,
+        "sem_cotacao": 1,
+    }
+
+
+def test_summary_sem_as_of_nao_muda(junior_alpha, carteira):
+    _user, client = junior_alpha
+
+    data = client.get(f"/api/portfolios/{carteira.id}/summary/").json()
+
+    assert "as_of" not in data
+    assert "valor_mercado" not in data["totais"]
+    assert set(data["holdings"][0]) == {
+        "asset",
+        "tipo",
+        "quantidade",
+        "preco_medio",
+        "valor_total",
+    }
+
+
+def test_as_of_invalido_da_400(junior_alpha, carteira):
+    _user, client = junior_alpha
+
+    resp = client.get(f"/api/portfolios/{carteira.id}/summary/?as_of=ontem")
+
+    assert resp.status_code == 400
+    assert "as_of" in resp.json()
+
+
+def test_avaliacao_e_uma_consulta_so_qualquer_que_seja_o_numero_de_holdings(
+    junior_alpha, carteira
+):
+    _user, client = junior_alpha
+    url = f"/api/portfolios/{carteira.id}/summary/?as_of=2025-01-05"
+    with CaptureQueriesContext(connection) as poucos:
+        client.get(url)
+
+    for i in range(5):
+        _holding(carteira, f"EXTRA{i}", [(date(2025, 1, 1), "1.00")])
+    with CaptureQueriesContext(connection) as muitos:
+        client.get(url)
+
+    assert len(muitos) == len(poucos)
+    assert sum("assets_pricequote" in q["sql"] for q in muitos) == 1
+
+
+def test_importar_cotacoes_invalida_o_summary_em_cache(junior_alpha, carteira):
+    _user, client = junior_alpha
+    url = f"/api/portfolios/{carteira.id}/summary/?as_of=2025-01-05"
+    assert client.get(url).json()["totais"]["sem_cotacao"] == 1
+
+    importar_cotacoes(
+        [(2, {"ticker": "MTM3", "data": "2025-01-04", "fechamento": "7"})]
+    )
+
+    resp = client.get(url)
+    assert resp["X-Cache"] == "MISS"
+    assert resp.json()["totais"]["sem_cotacao"] == 0
+
+
+def test_lote_e_host_aceitam_as_of(junior_alpha, carteira):
+    user, client = junior_alpha
+    vazio = Portfolio.objects.create(nome="Vazio", host="alpha", criado_por=user)
+
+    resp = client.post(
+        "/api/portfolios/summary/batch/",
+        {"ids": [str(carteira.id)], "as_of": "2025-01-31"},
+        format="json",
+    )
+    lote = b"".join(resp.streaming_content)
+    assert b'"preco_mercado":9.0' in lote
+
+    resumos = dict(resumos_do_host("alpha", as_of=date(2025, 1, 31)))
+    assert set(resumos) == {carteira.id, vazio.id}
+    assert resumos[carteira.id]["totais"]["valor_mercado"] == Decimal("42.0000")
+    assert resumos[vazio.id]["totais"]["sem_cotacao"] == 0
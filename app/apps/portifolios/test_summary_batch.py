@@ -0,0 +1,96 @@
+import json
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+URL = "/api/portfolios/summary/batch/"
+
+
+@pytest.fixture
+def junior_alpha(db):
+    user = User.objects.create_user(username="junior_batch", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_JUNIOR
+    profile.host = "alpha"
+    profile.save()
+    client = APIClient()
+    client.login(username="junior_batch", password="pass")
+    return user, client
+
+
+def _portfolios(user, quantidade, host="alpha", holdings=2):
+    asset_a = Asset.objects.get_or_create(
+        ticker="BTA", defaults={"nome": "Batch A", "tipo": "ACAO"}
+    )[0]
+    asset_b = Asset.objects.get_or_create(
+        ticker="BTB", defaults={"nome": "Batch B", "tipo": "FII"}
+    )[0]
+    criados = []
+    for i in range(quantidade):
+        portfolio = Portfolio.objects.create(
+            nome=f"Batch {host} {i}", host=host, criado_por=user
+        )
+        for asset in [asset_a, asset_b][:holdings]:
+            Holding.objects.create(
+                portfolio=portfolio,
+                asset=asset,
+                quantidade_total=Decimal(i + 1),
+                preco_medio=Decimal("10.00"),
+            )
+        criados.append(portfolio)
+    return criados
+
+
+def _post(client, ids):
+    resp = client.post(URL, {"ids": [str(pk) for pk in ids]}, format="json")
+    assert resp.status_code == 200
+    return resp, b"".join(resp.streaming_content)
+
+
+def test_batch_retorna_resumos_e_ignora_outros_hosts(junior_alpha):
+    user, client = junior_alpha
+    alpha = _portfolios(user, 2)
+    vazio = _portfolios(user, 1, holdings=0)[0]
+    beta = _portfolios(user, 1, host="beta")[0]
+
+    resp, corpo = _post(client, [p.id for p in alpha] + [vazio.id, beta.id])
+
+    assert resp["Content-Type"] == "application/json"
+    data = json.loads(corpo)
+    assert data["nao_encontrados"] == [str(beta.id)]
+    resumos = {r["portfolio"]: r for r in data["resultados"]}
+    assert set(resumos) == {str(alpha[0].id), str(alpha[1].id), str(vazio.id)}
+    assert resumos[str(alpha[1].id)]["totais"] == {
+        "holdings": 2,
+        "quantidade": 4.0,
+        "valor_total": 40.0,
+    }
+    assert resumos[str(vazio.id)]["holdings"] == []
+
+
+def test_batch_valida_corpo(junior_alpha):
+    _user, client = junior_alpha
+    assert client.post(URL, {"ids": []}, format="json").status_code == 400
+    assert client.post(URL, {"ids": ["x"]}, format="json").status_code == 400
+
+
+def test_batch_faz_numero_constante_de_consultas(junior_alpha):
+    user, client = junior_alpha
+    poucos = _portfolios(user, 2)
+    with CaptureQueriesContext(connection) as consultas_poucos:
+        _post(client, [p.id for p in poucos])
+
+    muitos = poucos + _portfolios(user, 40)
+    with CaptureQueriesContext(connection) as consultas_muitos:
+        _resp, corpo = _post(client, [p.id for p in muitos])
+
+    assert corpo.count(b'"portfolio"') == 42
+    assert len(consultas_muitos) == len(consultas_poucos)
@@ -1,8 +1,13 @@
+from core import cache as cache_respostas
+from core.leitura import LeituraLeveMixin
 from core.permissions import (
     HostAndRoleBasedScopeMixin,
     IsSeniorOrAdmin,
     ReadOnlyForJunior,
+    perfil,
 )
+from core.renderers import dumps
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -10,22 +15,50 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from .models import Portfolio
-from .serializers import PortfolioSerializer
+from .serializers import (
+    PortfolioLeitura,
+    PortfolioSerializer,
+    RealizadoParametrosSerializer,
+    ResumoLoteSerializer,
+    ResumoParametrosSerializer,
+)
+from .services import resultado_realizado, resumo_portfolio, resumos_portfolios
+
+
+def _resumos_em_json(nao_encontrados, portfolio_ids, as_of=None):
+    """Corpo JSON do resumo em lote, gerado um portfólio por vez.
 
+    Cada pedaço sai de `core.renderers.dumps`, o mesmo caminho do renderer
+    das demais respostas.
+    """
+    yield b'{"nao_encontrados":' + dumps(nao_encontrados) + b',"resultados":['
+    for indice, (_portfolio_id, resumo) in enumerate(
+        resumos_portfolios(portfolio_ids, as_of=as_of)
+    ):
+        yield (b"," if indice else b"") + dumps(resumo)
+    yield b"]}"
 
-class PortfolioViewSet(HostAndRoleBasedScopeMixin, viewsets.ModelViewSet):
+
+class PortfolioViewSet(
+    HostAndRoleBasedScopeMixin, LeituraLeveMixin, viewsets.ModelViewSet
+):
     queryset = Portfolio.objects.all()
     serializer_class = PortfolioSerializer
+    leitura_class = PortfolioLeitura
     permission_classes = [IsAuthenticated, ReadOnlyForJunior]
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAuthenticated(), ReadOnlyForJunior(), IsSeniorOrAdmin()]
 
+        if self.action == "summary_batch":
+            # POST apenas por causa da lista de ids no corpo; é uma leitura.
+            return [IsAuthenticated()]
+
         return [IsAuthenticated(), ReadOnlyForJunior()]
 
     def perform_create(self, serializer):
-        profile = getattr(self.request.user, "profile", None)
+        profile = perfil(self.request.user)
         if profile and profile.role == profile.ROLE_INVESTIDOR_SENIOR:
             serializer.save(criado_por=self.request.user, host=profile.host)
             return
@@ -33,16 +66,59 @@ class PortfolioViewSet(HostAndRoleBasedScopeMixin, viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"])
     def summary(self, request, pk=None):
+        """Resumo do portfólio; com `?as_of=AAAA-MM-DD`, também a mercado."""
+        parametros = ResumoParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        as_of = parametros.validated_data.get("as_of")
         portfolio = get_object_or_404(self.get_queryset(), pk=pk)
-        holdings = portfolio.holdings.all()
-        data = []
-        for h in holdings:
-            data.append(
-                {
-                    "asset": h.asset.ticker,
-                    "quantidade": float(h.quantidade_total),
-                    "preco_medio": float(h.preco_medio),
-                    "valor_total": float(h.preco_medio * h.quantidade_total),
-                }
-            )
-        return Response(data)
+        escopos = [cache_respostas.escopo_portfolio(portfolio.pk)]
+        timeout = None
+        if as_of is not None:
+            escopos.append(cache_respostas.ESCOPO_COTACOES)
+            timeout = cache_respostas.timeout_com_cotacoes()
+        chave = cache_respostas.chave(escopos, "summary", as_of)
+        resumo, encontrado = cache_respostas.obter_ou_calcular(
+            chave, lambda: resumo_portfolio(portfolio, as_of=as_of), timeout
+        )
+        return Response(resumo, headers=cache_respostas.cabecalho(encontrado))
+
+    @action(detail=True, methods=["get"])
+    def realized(self, request, pk=None):
+        """Resultado realizado das vendas; `?inicio=`/`?fim=` limitam o período."""
+        parametros = RealizadoParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        inicio = parametros.validated_data.get("inicio")
+        fim = parametros.validated_data.get("fim")
+        portfolio = get_object_or_404(self.get_queryset(), pk=pk)
+        chave = cache_respostas.chave(
+            [cache_respostas.escopo_portfolio(portfolio.pk)], "realized", inicio, fim
+        )
+        dados, encontrado = cache_respostas.obter_ou_calcular(
+            chave, lambda: resultado_realizado(portfolio, inicio, fim)
+        )
+        return Response(dados, headers=cache_respostas.cabecalho(encontrado))
+
+    @action(detail=False, methods=["post"], url_path="summary/batch")
+    def summary_batch(self, request):
+        """Resumos de vários portfólios (`{"ids": [...]}`) numa só chamada.
+
+        O escopo por host é aplicado uma vez; ids fora do escopo ou
+        inexistentes voltam em `nao_encontrados`. O corpo é enviado em
+        streaming, um resumo por vez. `"as_of"` no corpo tem o mesmo efeito
+        do `?as_of=` do `summary`.
+        """
+        serializer = ResumoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pedidos = list(dict.fromkeys(serializer.validated_data["ids"]))
+        permitidos = set(
+            self.get_queryset().filter(pk__in=pedidos).values_list("pk", flat=True)
+        )
+        nao_encontrados = [pk for pk in pedidos if pk not in permitidos]
+        return StreamingHttpResponse(
+            _resumos_em_json(
+                nao_encontrados,
+                permitidos,
+                as_of=serializer.validated_data.get("as_of"),
+            ),
+            content_type="application/json",
+        )
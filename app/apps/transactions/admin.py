@@ -1,10 +1,20 @@
 from django.contrib import admin
 
 from .models import Transaction
+from .services import reconstruir_holdings, reconstruir_lotes
+from .snapshots import descartar_snapshots
 
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
+    """Edições e exclusões pelo admin recalculam os holdings afetados.
+
+    `Transaction.save` só soma o efeito da transação ao holding; aqui o
+    holding é reconstruído a partir do ledger para desfazer o valor antigo,
+    assim como seus lotes e resultado realizado, e os snapshots diários dele,
+    que refletem o ledger antigo, são descartados.
+    """
+
     list_display = (
         "id",
         "holding",
@@ -16,3 +26,27 @@ class TransactionAdmin(admin.ModelAdmin):
     )
 
     list_select_related = ("holding", "criado_por")
+
+    def save_model(self, request, obj, form, change):
+        afetados = {obj.holding_id}
+        if change and "holding" in form.changed_data:
+            afetados.add(form.initial.get("holding"))
+        super().save_model(request, obj, form, change)
+        reconstruir_holdings(holdings=afetados, bancos=[obj._state.db])
+        reconstruir_lotes(holdings=afetados, bancos=[obj._state.db])
+        descartar_snapshots(afetados, obj._state.db)
+
+    def delete_model(self, request, obj):
+        holding_id = obj.holding_id
+        banco = obj._state.db
+        super().delete_model(request, obj)
+        reconstruir_holdings(holdings=[holding_id], bancos=[banco])
+        reconstruir_lotes(holdings=[holding_id], bancos=[banco])
+        descartar_snapshots([holding_id], banco)
+
+    def delete_queryset(self, request, queryset):
+        afetados = set(queryset.values_list("holding_id", flat=True))
+        super().delete_queryset(request, queryset)
+        reconstruir_holdings(holdings=afetados, bancos=[queryset.db])
+        reconstruir_lotes(holdings=afetados, bancos=[queryset.db])
+        descartar_snapshots(afetados, queryset.db)
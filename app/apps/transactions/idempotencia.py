@@ -0,0 +1,119 @@
+"""Chaves `Idempotency-Key` para repetir um POST sem gravar de novo.
+
+O cliente que perde a resposta (timeout) repete o POST com a mesma chave e
+recebe a resposta guardada na primeira vez, sem passar pelo serializer nem
+tocar no holding. Só respostas de sucesso são guardadas: um erro desfaz a
+transação da requisição (`TransacaoMiddleware`) e a repetição é executada
+normalmente.
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import exceptions, status
+
+from .models import IdempotencyKey
+
+CABECALHO = "Idempotency-Key"
+TAMANHO_MAXIMO = IdempotencyKey._meta.get_field("chave").max_length
+TAMANHO_LOTE_PURGA = 1000
+
+
+class ChaveReutilizada(exceptions.APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key já usada com outra requisição."
+    default_code = "idempotency_key_reused"
+
+
+class ChaveEmUso(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Outra requisição com esta Idempotency-Key foi concluída antes."
+    default_code = "idempotency_key_in_use"
+
+
+def _limite(agora=None):
+    horas = settings.IDEMPOTENCIA_TTL_HORAS
+    return (agora or timezone.now()) - timedelta(hours=horas)
+
+
+def chave_da_requisicao(request):
+    """Valor do cabeçalho `Idempotency-Key`, ou `None`."""
+    chave = request.headers.get(CABECALHO)
+    if chave is None:
+        return None
+    chave = chave.strip()
+    if not chave or len(chave) > TAMANHO_MAXIMO:
+        raise exceptions.ValidationError(
+            {CABECALHO: f"Deve ter de 1 a {TAMANHO_MAXIMO} caracteres."}
+        )
+    return chave
+
+
+def impressao(request):
+    """sha256 do método, do caminho e do corpo já interpretado."""
+    corpo = json.dumps(request.data, sort_keys=True, default=str)
+    texto = f"{request.method} {request.path}\n{corpo}"
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def buscar(user, chave, impressao_requisicao):
+    """Chave ainda válida de `user`, ou `None`; recusa outra requisição."""
+    guardada = (
+        IdempotencyKey.objects.filter(user=user, chave=chave, criado_em__gte=_limite())
+        .only("impressao", "status", "resposta")
+        .first()
+    )
+    if guardada is not None and guardada.impressao != impressao_requisicao:
+        raise ChaveReutilizada()
+    return guardada
+
+
+def guardar(user, chave, impressao_requisicao, response):
+    """Guarda uma resposta de sucesso para as repetições da chave.
+
+    Uma requisição concorrente que guardou a mesma chave antes vence: esta
+    recebe 409 e a sua escrita é desfeita com a transação da requisição.
+    """
+    if not status.is_success(response.status_code):
+        return
+    IdempotencyKey.objects.filter(
+        user=user, chave=chave, criado_em__lt=_limite()
+    ).delete()
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            IdempotencyKey.objects.create(
+                user=user,
+                chave=chave,
+                impressao=impressao_requisicao,
+                status=response.status_code,
+                resposta=response.data,
+            )
+    except IntegrityError:
+        raise ChaveEmUso() from None
+
+
+def purgar_expiradas(tamanho_lote=TAMANHO_LOTE_PURGA, pausa=0.0, agora=None):
+    """Apaga as chaves vencidas em lotes; devolve quantas foram apagadas.
+
+    Cada lote é um DELETE curto na sua própria transação (pelo índice de
+    `criado_em`), então a purga nunca segura a trava de escrita por muito
+    tempo; `pausa` (segundos) dá vez aos outros escritores entre os lotes.
+    """
+    limite = _limite(agora)
+    vencidas = IdempotencyKey.objects.filter(criado_em__lt=limite)
+    total = 0
+    while True:
+        ids = list(
+            vencidas.order_by("criado_em").values_list("pk", flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            return total
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+        if pausa:
+            time.sleep(pausa)
@@ -0,0 +1,175 @@
+"""Lotes de compra e resultado realizado das vendas.
+
+Cada compra abre um `Lot`; cada venda consome os lotes abertos do holding, o
+de compra mais antiga primeiro (`(data, id)` da compra), e grava um
+`RealizedGain` por lote consumido com custo, receita e resultado. O custo é o
+preço do lote (`FIFO`, o padrão) ou o preço médio do holding antes da venda
+(`MEDIO`), conforme `LOTES_METODO`; nos dois métodos os lotes são consumidos
+na mesma ordem, então a quantidade aberta acompanha a do holding. A parte de
+uma venda além dos lotes abertos (saldo que não veio de compras do ledger)
+gera um `RealizedGain` sem lote, ao preço médio.
+
+`Motor` aplica transações aos lotes de um holding em memória e `gravar`
+persiste o resultado de vários motores com `bulk_create`/`bulk_update`. Quem
+grava transações aplica o motor ao que gravou: `Transaction.save` (por
+`registrar`), `importar_transacoes` e o seed em massa (por
+`apps.transactions.services.aplicar_lotes`). Transações são aplicadas na ordem
+em que são gravadas; uma compra retroativa ainda entra na fila na posição da
+sua data, mas vendas já registradas não são refeitas. `reconstruir_lotes`
+refaz tudo na ordem do ledger.
+"""
+
+from bisect import insort
+from decimal import Decimal
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.holdings.models import Holding
+
+from .models import Lot, RealizedGain
+
+FIFO = "FIFO"
+MEDIO = "MEDIO"
+METODOS = (FIFO, MEDIO)
+ZERO = Decimal("0")
+
+ORDEM_DE_CONSUMO = attrgetter("data", "compra_id")
+
+
+class Motor:
+    """Lotes abertos de um holding e o efeito de cada transação sobre eles.
+
+    `abertos` são os lotes já gravados com saldo, em ordem de consumo. Os
+    lotes criados ficam em `novos` (com a quantidade aberta final), os já
+    gravados que mudaram em `alterados` e as realizações em `realizacoes`.
+    """
+
+    def __init__(self, holding_id, portfolio_id, abertos=(), metodo=None):
+        self.holding_id = holding_id
+        self.portfolio_id = portfolio_id
+        self.metodo = metodo or settings.LOTES_METODO
+        self.abertos = list(abertos)
+        self.novos: list[Lot] = []
+        self.alterados: dict[int, Lot] = {}
+        self.realizacoes: list[RealizedGain] = []
+
+    def __len__(self):
+        return len(self.novos) + len(self.alterados) + len(self.realizacoes)
+
+    def aplicar(self, transacao_id, tipo, quantidade, preco, data, preco_medio):
+        """Aplica uma transação; `preco_medio` é o do holding antes dela."""
+        if tipo == "COMPRA":
+            lote = Lot(
+                holding_id=self.holding_id,
+                compra_id=transacao_id,
+                data=data,
+                quantidade=quantidade,
+                preco=preco,
+                quantidade_aberta=quantidade,
+            )
+            insort(self.abertos, lote, key=ORDEM_DE_CONSUMO)
+            self.novos.append(lote)
+        elif tipo == "VENDA":
+            self._vender(transacao_id, quantidade, preco, data, preco_medio)
+
+    def _vender(self, venda_id, quantidade, preco, data, preco_medio):
+        restante = quantidade
+        while restante > 0 and self.abertos:
+            lote = self.abertos[0]
+            consumida = min(restante, lote.quantidade_aberta)
+            lote.quantidade_aberta -= consumida
+            if lote.pk is not None:
+                self.alterados[lote.pk] = lote
+            if not lote.quantidade_aberta:
+                del self.abertos[0]
+            custo = lote.preco if self.metodo == FIFO else preco_medio
+            self._realizar(venda_id, lote, consumida, custo, preco, data)
+            restante -= consumida
+        if restante > 0:
+            self._realizar(venda_id, None, restante, preco_medio, preco, data)
+
+    def _realizar(self, venda_id, lote, quantidade, custo, preco, data):
+        custo = quantidade * custo
+        receita = quantidade * preco
+        self.realizacoes.append(
+            RealizedGain(
+                holding_id=self.holding_id,
+                portfolio_id=self.portfolio_id,
+                venda_id=venda_id,
+                lot=lote,
+                data=data,
+                quantidade=quantidade,
+                custo=custo,
+                receita=receita,
+                resultado=receita - custo,
+            )
+        )
+
+
+def abertos_por_holding(banco, holding_ids):
+    """`{holding_id: [lotes com saldo em ordem de consumo]}`, numa consulta."""
+    abertos: dict[int, list[Lot]] = {holding_id: [] for holding_id in holding_ids}
+    if not abertos:
+        return abertos
+    for lote in (
+        Lot.objects.using(banco)
+        .filter(holding_id__in=list(abertos), quantidade_aberta__gt=0)
+        .order_by("holding_id", "data", "compra_id")
+    ):
+        abertos[lote.holding_id].append(lote)
+    return abertos
+
+
+def gravar(banco, motores):
+    """Grava lotes e realizações de `motores`; retorna `(lotes, realizacoes)`.
+
+    Os lotes novos são inseridos antes das realizações que apontam para eles.
+    """
+    novos = [lote for motor in motores for lote in motor.novos]
+    alterados = [lote for motor in motores for lote in motor.alterados.values()]
+    realizacoes = [r for motor in motores for r in motor.realizacoes]
+    Lot.objects.using(banco).bulk_create(novos)
+    Lot.objects.using(banco).bulk_update(alterados, ["quantidade_aberta"])
+    RealizedGain.objects.using(banco).bulk_create(realizacoes)
+    return len(novos), len(realizacoes)
+
+
+def registrar(transacao):
+    """Aplica aos lotes uma transação recém-gravada, antes do holding.
+
+    Uma compra é só o INSERT do lote. Uma venda lê o holding e seus lotes
+    abertos (pelo índice parcial de lotes abertos) e grava o consumo numa
+    transação do banco; sem savepoint, porque na criação pela API ela já
+    está aberta, com o holding travado para a checagem de saldo.
+    """
+    banco = transacao._state.db
+    if transacao.tipo == "COMPRA":
+        Lot.objects.using(banco).create(
+            holding_id=transacao.holding_id,
+            compra_id=transacao.pk,
+            data=transacao.data,
+            quantidade=transacao.quantidade,
+            preco=transacao.preco,
+            quantidade_aberta=transacao.quantidade,
+        )
+        return
+    with transaction.atomic(using=banco, savepoint=False):
+        portfolio_id, preco_medio = (
+            Holding.objects.using(banco)
+            .filter(pk=transacao.holding_id)
+            .values_list("portfolio_id", "preco_medio")
+            .get()
+        )
+        abertos = abertos_por_holding(banco, [transacao.holding_id])
+        motor = Motor(transacao.holding_id, portfolio_id, abertos[transacao.holding_id])
+        motor.aplicar(
+            transacao.pk,
+            transacao.tipo,
+            transacao.quantidade,
+            transacao.preco,
+            transacao.data,
+            preco_medio,
+        )
+        gravar(banco, [motor])
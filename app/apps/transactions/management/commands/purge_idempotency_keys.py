@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.transactions.idempotencia import TAMANHO_LOTE_PURGA, purgar_expiradas
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga as Idempotency-Keys mais antigas que IDEMPOTENCIA_TTL_HORAS, "
+        "em lotes curtos para não segurar a trava de escrita."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=TAMANHO_LOTE_PURGA,
+            help=f"Linhas apagadas por lote (padrão: {TAMANHO_LOTE_PURGA})",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0.0,
+            help="Segundos de espera entre os lotes",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        apagadas = purgar_expiradas(
+            tamanho_lote=options["chunk_size"], pausa=options["pausa"]
+        )
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{apagadas} chaves com mais de {settings.IDEMPOTENCIA_TTL_HORAS}h "
+                f"apagadas em {duracao:.2f}s."
+            )
+        )
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.transactions.services import TAMANHO_LOTE_PADRAO, reconstruir_holdings
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói quantidade e preço médio dos holdings a partir do ledger "
+        "de transações."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", help="Restringe aos portfólios deste host")
+        parser.add_argument(
+            "--portfolio", help="Restringe a um portfólio (UUID)"
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            dest="verify",
+            help="Apenas reporta divergências, sem gravar",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=TAMANHO_LOTE_PADRAO,
+            help=f"Linhas lidas/gravadas por lote (padrão: {TAMANHO_LOTE_PADRAO})",
+        )
+
+    def handle(self, *args, **options):
+        verify = bool(options.get("verify"))
+        inicio = time.perf_counter()
+        resultado = reconstruir_holdings(
+            host=options.get("host"),
+            portfolio=options.get("portfolio"),
+            verificar=verify,
+            tamanho_lote=options.get("chunk_size"),
+        )
+        duracao = time.perf_counter() - inicio
+
+        for divergencia in resultado["amostra"]:
+            atual_qtd, atual_pm = divergencia["atual"]
+            esperado_qtd, esperado_pm = divergencia["esperado"]
+            self.stdout.write(
+                f" - holding {divergencia['holding']}: "
+                f"quantidade {atual_qtd} -> {esperado_qtd}, "
+                f"preco_medio {atual_pm} -> {esperado_pm}"
+            )
+
+        verbo = "divergentes" if verify else "corrigidos"
+        taxa = resultado["transacoes"] / duracao if duracao else 0
+        mensagem = (
+            f"{resultado['holdings']} holdings, {resultado['transacoes']} "
+            f"transações ({taxa:.0f}/s), {resultado['divergentes']} {verbo}."
+        )
+        if verify and resultado["divergentes"]:
+            self.stdout.write(self.style.WARNING(mensagem))
+        else:
+            self.stdout.write(self.style.SUCCESS(mensagem))
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.transactions.services import TAMANHO_LOTE_PADRAO, reconstruir_lotes
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói os lotes de compra e o resultado realizado das vendas a "
+        "partir do ledger de transações, um portfólio por vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", help="Restringe aos portfólios deste host")
+        parser.add_argument("--portfolio", help="Restringe a um portfólio (UUID)")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=TAMANHO_LOTE_PADRAO,
+            help=f"Linhas lidas/gravadas por lote (padrão: {TAMANHO_LOTE_PADRAO})",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = reconstruir_lotes(
+            host=options.get("host"),
+            portfolio=options.get("portfolio"),
+            tamanho_lote=options.get("chunk_size"),
+        )
+        duracao = time.perf_counter() - inicio
+        taxa = resultado["transacoes"] / duracao if duracao else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['portfolios']} portfólios, {resultado['transacoes']} "
+                f"transações ({taxa:.0f}/s): {resultado['lotes']} lotes e "
+                f"{resultado['realizacoes']} realizações "
+                f"({settings.LOTES_METODO})."
+            )
+        )
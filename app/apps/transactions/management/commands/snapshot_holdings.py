@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.transactions.snapshots import LOTE_HISTORICO, atualizar_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza os snapshots diários dos holdings com as transações lançadas "
+        "desde a última execução (para rodar agendado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=LOTE_HISTORICO,
+            help=f"Holdings refeitos por transação (padrão: {LOTE_HISTORICO})",
+        )
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Descarta todos os snapshots e reprocessa o ledger inteiro",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = atualizar_snapshots(
+            tamanho_lote=options["chunk_size"], completo=options["completo"]
+        )
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['transacoes']} transações novas em "
+                f"{resultado['holdings']} holdings; {resultado['snapshots']} "
+                f"snapshots gravados em {duracao:.2f}s."
+            )
+        )
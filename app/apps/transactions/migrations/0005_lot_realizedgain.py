@@ -0,0 +1,129 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("holdings", "0004_holdingsnapshot"),
+        ("portifolios", "0003_portfolio_criado_por_sem_constraint"),
+        ("transactions", "0004_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Lot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                ("quantidade", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("preco", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "quantidade_aberta",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                (
+                    "compra",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="transactions.transaction",
+                    ),
+                ),
+                (
+                    "holding",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lots",
+                        to="holdings.holding",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["holding", "data", "compra"],
+            },
+        ),
+        migrations.CreateModel(
+            name="RealizedGain",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                ("quantidade", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("custo", models.DecimalField(decimal_places=4, max_digits=24)),
+                ("receita", models.DecimalField(decimal_places=4, max_digits=24)),
+                ("resultado", models.DecimalField(decimal_places=4, max_digits=24)),
+                (
+                    "holding",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="realizacoes",
+                        to="holdings.holding",
+                    ),
+                ),
+                (
+                    "lot",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="transactions.lot",
+                    ),
+                ),
+                (
+                    "portfolio",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="portifolios.portfolio",
+                    ),
+                ),
+                (
+                    "venda",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="transactions.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="lot",
+            index=models.Index(
+                condition=models.Q(("quantidade_aberta__gt", 0)),
+                fields=["holding", "data", "compra"],
+                name="lot_aberto_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="realizedgain",
+            index=models.Index(
+                fields=["portfolio", "data"], name="realizado_portfolio_data_idx"
+            ),
+        ),
+    ]
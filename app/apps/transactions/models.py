@@ -1,8 +1,12 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.contrib.auth.models import User
-from typing import cast
 
 from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from core.shards import GerenciadorDoTenant
 
 TIPO_TRANSACAO = (
     ("COMPRA", "Compra"),
@@ -10,6 +14,28 @@ TIPO_TRANSACAO = (
 )
 
 
+class _DivisaoDecimal(Func):
+    """`numerador / denominador` calculado pelo banco.
+
+    No SQLite valores decimais inteiros são armazenados como INTEGER e a divisão
+    seria inteira (66 / 7 = 9); lá o numerador é convertido para REAL antes.
+    """
+
+    arg_joiner = " / "
+    template = "(%(expressions)s)"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        numerador, denominador = self.get_source_expressions()
+        divisao = Func(
+            Cast(numerador, FloatField()),
+            denominador,
+            arg_joiner=self.arg_joiner,
+            template=self.template,
+            output_field=FloatField(),
+        )
+        return divisao.as_sql(compiler, connection, **extra_context)
+
+
 class Transaction(models.Model):
     # Campos do modelo definidos em múltiplas linhas para manter largura < 88
     holding = models.ForeignKey(
@@ -26,28 +52,172 @@ class Transaction(models.Model):
     quantidade = models.DecimalField(max_digits=12, decimal_places=2)
     preco = models.DecimalField(max_digits=12, decimal_places=2)
     data = models.DateField()
-    criado_por = models.ForeignKey(User, on_delete=models.CASCADE)
+    # usuários ficam no banco `default`; a transação pode estar num shard
+    criado_por = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False
+    )
     criado_em = models.DateTimeField(auto_now_add=True)
 
+    objects = GerenciadorDoTenant()
+
     def save(self, *args, **kwargs):
+        nova = self._state.adding
         super().save(*args, **kwargs)
+        if nova:
+            # `lotes` importa este módulo
+            from .lotes import registrar
+
+            # antes de `atualizar_holding`: a venda usa o preço médio anterior
+            registrar(self)
         self.atualizar_holding()
 
     def atualizar_holding(self):
-        # cast para ajudar o verificador de tipos; o Django atribui instâncias
-        # de modelo dinamicamente nos campos ForeignKey.
-        holding = cast(Holding, self.holding)
+        """Aplica o efeito da transação no holding com um único UPDATE.
+
+        Os novos valores são calculados pelo banco a partir dos valores atuais
+        da linha (sem ler e regravar em Python), então transações simultâneas
+        para o mesmo holding não sobrescrevem umas às outras. Os atributos do
+        `self.holding` em memória não são recarregados.
+        """
+        quantidade = Value(self.quantidade)
         if self.tipo == "COMPRA":
-            novo_total = holding.quantidade_total + self.quantidade
-            novo_preco_medio = (
-                (holding.quantidade_total * holding.preco_medio)
-                + (self.quantidade * self.preco)
-            ) / novo_total
-            holding.quantidade_total = novo_total
-            holding.preco_medio = novo_preco_medio
+            novo_total = F("quantidade_total") + quantidade
+            custo_total = F("quantidade_total") * F("preco_medio") + (
+                quantidade * Value(self.preco)
+            )
+            novo_preco_medio = Coalesce(
+                Round(
+                    _DivisaoDecimal(
+                        custo_total,
+                        NullIf(novo_total, Value(0)),
+                        output_field=models.DecimalField(),
+                    ),
+                    2,
+                ),
+                F("preco_medio"),
+            )
+            Holding.objects.using(self._state.db).filter(pk=self.holding_id).update(
+                quantidade_total=novo_total, preco_medio=novo_preco_medio
+            )
         elif self.tipo == "VENDA":
-            holding.quantidade_total -= self.quantidade
-        holding.save()
+            Holding.objects.using(self._state.db).filter(pk=self.holding_id).update(
+                quantidade_total=F("quantidade_total") - quantidade
+            )
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # histórico por holding (e replay do ledger) em ordem de data
+            models.Index(
+                fields=["holding", "data", "id"], name="tx_holding_data_id_idx"
+            ),
+            # transações lançadas por um usuário, mais recentes primeiro
+            models.Index(
+                fields=["criado_por", "criado_em"], name="tx_criado_por_em_idx"
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Resposta de um POST guardada pela chave `Idempotency-Key` do cliente.
+
+    Uma repetição com a mesma chave devolve `status`/`resposta` sem executar
+    o POST de novo; `impressao` (sha256 do método, caminho e corpo) recusa a
+    chave reaproveitada para outra requisição. Linhas mais antigas que
+    `IDEMPOTENCIA_TTL_HORAS` são ignoradas e apagadas por
+    `purge_idempotency_keys`.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    chave = models.CharField(max_length=255)
+    impressao = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField()
+    resposta = models.JSONField(encoder=DjangoJSONEncoder)
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "chave"], name="idempotency_user_chave_uniq"
+            ),
+        ]
+
+
+class Lot(models.Model):
+    """Lote aberto por uma compra; as vendas consomem `quantidade_aberta`.
+
+    Mantido por `apps.transactions.lotes`. As referências ao ledger não têm
+    constraint nem cascata, para que o Django continue apagando transações
+    com um único DELETE; quem apaga transações reconstrói os lotes do
+    holding (`reconstruir_lotes`).
+    """
+
+    holding = models.ForeignKey(Holding, on_delete=models.CASCADE, related_name="lots")
+    compra = models.ForeignKey(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    data = models.DateField()
+    quantidade = models.DecimalField(max_digits=12, decimal_places=2)
+    preco = models.DecimalField(max_digits=12, decimal_places=2)
+    quantidade_aberta = models.DecimalField(max_digits=12, decimal_places=2)
+
+    objects = GerenciadorDoTenant()
+
+    class Meta:
+        ordering = ["holding", "data", "compra"]
+        indexes = [
+            # lotes abertos de um holding na ordem em que são consumidos
+            models.Index(
+                fields=["holding", "data", "compra"],
+                name="lot_aberto_idx",
+                condition=models.Q(quantidade_aberta__gt=0),
+            ),
+        ]
+
+
+class RealizedGain(models.Model):
+    """Resultado realizado de uma venda contra um lote (ou, sem lote, contra
+    o preço médio, para o saldo que não veio de compras do ledger).
+
+    `portfolio` repete o do holding para que o resultado de um portfólio num
+    período seja um único agregado sobre o índice `(portfolio, data)`.
+    """
+
+    holding = models.ForeignKey(
+        Holding, on_delete=models.CASCADE, related_name="realizacoes"
+    )
+    # removido junto com o holding
+    portfolio = models.ForeignKey(
+        Portfolio, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    venda = models.ForeignKey(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    lot = models.ForeignKey(
+        Lot,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    data = models.DateField()
+    quantidade = models.DecimalField(max_digits=12, decimal_places=2)
+    custo = models.DecimalField(max_digits=24, decimal_places=4)
+    receita = models.DecimalField(max_digits=24, decimal_places=4)
+    resultado = models.DecimalField(max_digits=24, decimal_places=4)
+
+    objects = GerenciadorDoTenant()
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["portfolio", "data"], name="realizado_portfolio_data_idx"
+            ),
+        ]
@@ -1,9 +1,18 @@
 from apps.assets.models import Asset
 from apps.holdings.models import Holding
+from core.leitura import (
+    Coluna,
+    ColunaDataHora,
+    LeituraLeve,
+    texto,
+    texto_data,
+    texto_decimal,
+)
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Transaction
+from .models import TIPO_TRANSACAO, Transaction
 
 
 class TransactionCreateSerializer(serializers.ModelSerializer):
@@ -41,20 +50,126 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         portfolio = self.context.get("portfolio")
         asset = validated_data.pop("asset")
-        holding, _ = Holding.objects.get_or_create(portfolio=portfolio, asset=asset)
-        if (
-            validated_data.get("tipo") == "VENDA"
-            and validated_data.get("quantidade") > holding.quantidade_total
-        ):
+        # holding e transação ficam no banco do portfólio (shard do host)
+        with transaction.atomic(using=portfolio._state.db):
+            if validated_data.get("tipo") == "VENDA":
+                # A linha fica travada até o fim da transação para que duas
+                # vendas simultâneas não passem ambas pela checagem de saldo.
+                holding = (
+                    Holding.objects.select_for_update()
+                    .filter(portfolio=portfolio, asset=asset)
+                    .first()
+                )
+                disponivel = holding.quantidade_total if holding else 0
+                if validated_data.get("quantidade") > disponivel:
+                    raise serializers.ValidationError(
+                        {"quantidade": "Venda maior que quantidade disponível"}
+                    )
+            else:
+                holding, _ = Holding.objects.get_or_create(
+                    portfolio=portfolio, asset=asset
+                )
+            validated_data["holding"] = holding
+            if request and hasattr(request, "user"):
+                validated_data["criado_por"] = request.user
+
+            if not validated_data.get("data"):
+                validated_data["data"] = timezone.now().date()
+
+            return Transaction.objects.create(**validated_data)
+
+
+class TransactionImportSerializer(TransactionCreateSerializer):
+    """Valida uma linha da importação em lote com as regras de criação.
+
+    O ativo é procurado em `context["assets"]` (carregado uma vez por lote)
+    em vez de uma consulta por linha.
+    """
+
+    asset = serializers.IntegerField(write_only=True)  # type: ignore[assignment]
+
+    def validate_asset(self, value):
+        asset = self.context["assets"].get(value)
+        if asset is None:
             raise serializers.ValidationError(
-                {"quantidade": "Venda maior que quantidade disponível"}
+                serializers.PrimaryKeyRelatedField.default_error_messages[
+                    "does_not_exist"
+                ].format(pk_value=value)
             )
-        validated_data["holding"] = holding
-        if request and hasattr(request, "user"):
-            validated_data["criado_por"] = request.user
+        return asset
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    """Leitura do ledger; espera `select_related("holding", "criado_por")`."""
+
+    asset: serializers.IntegerField = serializers.IntegerField(
+        source="holding.asset_id", read_only=True
+    )
+    criado_por: serializers.StringRelatedField = serializers.StringRelatedField(
+        read_only=True
+    )
+
+    class Meta:
+        model = Transaction
+        fields = [
+            "id",
+            "holding",
+            "asset",
+            "tipo",
+            "quantidade",
+            "preco",
+            "data",
+            "criado_por",
+            "criado_em",
+        ]
+
+        read_only_fields = fields
+
+
+class TransactionLeitura(LeituraLeve):
+    """Leitura do ledger via `values()`, com a saída do `TransactionSerializer`."""
+
+    campos = {
+        "id": Coluna("id"),
+        "holding": Coluna("holding_id"),
+        "asset": Coluna("holding__asset_id"),
+        "tipo": Coluna("tipo"),
+        "quantidade": Coluna("quantidade", formatar=texto_decimal),
+        "preco": Coluna("preco", formatar=texto_decimal),
+        "data": Coluna("data", formatar=texto_data),
+        "criado_por": Coluna("criado_por__username"),
+        "criado_em": ColunaDataHora("criado_em"),
+    }
+    expansoes = {
+        "holding": {
+            "id": Coluna("holding_id"),
+            "portfolio": Coluna("holding__portfolio_id", formatar=texto),
+            "asset": Coluna("holding__asset_id"),
+        },
+        "criado_por": {
+            "id": Coluna("criado_por_id"),
+            "username": Coluna("criado_por__username"),
+        },
+    }
+
+
+class TransactionFiltroSerializer(serializers.Serializer):
+    """Filtros de listagem do ledger recebidos na query string."""
 
-        if not validated_data.get("data"):
-            validated_data["data"] = timezone.now().date()
+    data_inicio = serializers.DateField(required=False)
+    data_fim = serializers.DateField(required=False)
+    tipo = serializers.ChoiceField(choices=TIPO_TRANSACAO, required=False)
+    asset = serializers.IntegerField(required=False)
 
-        transaction = Transaction.objects.create(**validated_data)
-        return transaction
+    def filtrar(self, queryset):
+        self.is_valid(raise_exception=True)
+        filtros = self.validated_data
+        if "data_inicio" in filtros:
+            queryset = queryset.filter(data__gte=filtros["data_inicio"])
+        if "data_fim" in filtros:
+            queryset = queryset.filter(data__lte=filtros["data_fim"])
+        if "tipo" in filtros:
+            queryset = queryset.filter(tipo=filtros["tipo"])
+        if "asset" in filtros:
+            queryset = queryset.filter(holding__asset_id=filtros["asset"])
+        return queryset.select_related("holding", "criado_por")
@@ -0,0 +1,391 @@
+"""Regras de escrita em lote sobre o ledger de transações.
+
+`aplicar_movimento` reproduz em Python o cálculo feito por
+`Transaction.atualizar_holding` (preço médio ponderado arredondado para duas
+casas a cada compra), para que caminhos em lote cheguem ao mesmo resultado
+que o caminho de uma transação por vez. Do mesmo modo, os caminhos em lote
+aplicam aos lotes de compra (`apps.transactions.lotes`) o que gravam, e
+`reconstruir_lotes` refaz lotes e resultado realizado a partir do ledger.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby, islice
+from operator import itemgetter
+
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from core.cache import invalidar_portfolio, invalidar_tudo
+from core.replicas import primario
+from core.shards import banco_do_host, bancos_de_tenants
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .lotes import Motor, abertos_por_holding, gravar
+from .models import Lot, RealizedGain, Transaction
+from .serializers import TransactionImportSerializer
+
+CENTAVO = Decimal("0.01")
+ZERO = Decimal("0")
+TAMANHO_LOTE_PADRAO = 1000
+LIMITE_AMOSTRA_DIVERGENCIAS = 20
+
+
+def aplicar_movimento(quantidade_total, preco_medio, tipo, quantidade, preco):
+    """Retorna `(quantidade_total, preco_medio)` após uma transação."""
+    if tipo == "COMPRA":
+        novo_total = quantidade_total + quantidade
+        if novo_total:
+            custo = quantidade_total * preco_medio + quantidade * preco
+            preco_medio = (custo / novo_total).quantize(CENTAVO, ROUND_HALF_UP)
+        return novo_total, preco_medio
+    if tipo == "VENDA":
+        return quantidade_total - quantidade, preco_medio
+    return quantidade_total, preco_medio
+
+
+def _em_lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def aplicar_lotes(banco, transacoes, saldos=None):
+    """Aplica aos lotes transações recém-gravadas em lote, na ordem dada.
+
+    `saldos` é `{holding_id: (quantidade_total, preco_medio)}` antes delas
+    (zero para os holdings ausentes). Os lotes abertos dos holdings com
+    vendas vêm de uma consulta só. Retorna `(lotes, realizacoes)` gravados.
+    """
+    saldos = dict(saldos or {})
+    vendidos = {t.holding_id for t in transacoes if t.tipo == "VENDA"}
+    abertos = abertos_por_holding(banco, vendidos)
+    motores: dict[int, Motor] = {}
+    for t in transacoes:
+        motor = motores.get(t.holding_id)
+        if motor is None:
+            motor = motores[t.holding_id] = Motor(
+                t.holding_id, t.holding.portfolio_id, abertos.get(t.holding_id, ())
+            )
+        quantidade_total, preco_medio = saldos.get(t.holding_id, (ZERO, ZERO))
+        motor.aplicar(t.pk, t.tipo, t.quantidade, t.preco, t.data, preco_medio)
+        saldos[t.holding_id] = aplicar_movimento(
+            quantidade_total, preco_medio, t.tipo, t.quantidade, t.preco
+        )
+    return gravar(banco, motores.values())
+
+
+def _ids_de_ativos(lote):
+    ids = set()
+    for _linha, dados in lote:
+        try:
+            ids.add(int(dados.get("asset")))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return ids
+
+
+def importar_transacoes(portfolio, usuario, linhas, tamanho_lote=None):
+    """Importa transações de um portfólio em lotes.
+
+    `linhas` é um iterável de `(numero_linha, dados)`, em que `dados` é o
+    dicionário da linha ou uma exceção de leitura. Cada linha passa pelas
+    regras de `TransactionCreateSerializer`; linhas inválidas são reportadas
+    e as demais seguem. Por lote são feitas uma consulta de ativos, uma de
+    holdings (travados para escrita), inserts com `bulk_create` e um único
+    `bulk_update` dos holdings afetados, sem passar por `Transaction.save`;
+    os lotes de compra são atualizados por `aplicar_lotes`.
+
+    Retorna `{"criadas": int, "erros": [{"linha": int, "erros": ...}]}`.
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE_PADRAO
+    criadas = 0
+    erros: list[dict] = []
+    hoje = timezone.now().date()
+
+    for lote in _em_lotes(linhas, tamanho_lote):
+        with transaction.atomic(using=portfolio._state.db):
+            ativos = Asset.objects.in_bulk(_ids_de_ativos(lote))
+            holdings = {
+                h.asset_id: h
+                for h in Holding.objects.select_for_update().filter(
+                    portfolio=portfolio, asset_id__in=ativos.keys()
+                )
+            }
+            saldos = {
+                asset_id: (h.quantidade_total, h.preco_medio)
+                for asset_id, h in holdings.items()
+            }
+            iniciais = {h.pk: saldos[asset_id] for asset_id, h in holdings.items()}
+            pendentes: list[tuple[int, Transaction]] = []
+
+            for numero, dados in lote:
+                if isinstance(dados, Exception):
+                    erros.append({"linha": numero, "erros": [str(dados)]})
+                    continue
+                serializer = TransactionImportSerializer(
+                    data=dados, context={"assets": ativos}
+                )
+                if not serializer.is_valid():
+                    erros.append({"linha": numero, "erros": serializer.errors})
+                    continue
+                validado = serializer.validated_data
+                asset_id = validado["asset"].pk
+                quantidade_total, preco_medio = saldos.get(asset_id, (ZERO, ZERO))
+                if validado["tipo"] == "VENDA" and validado["quantidade"] > (
+                    quantidade_total
+                ):
+                    erros.append(
+                        {
+                            "linha": numero,
+                            "erros": {
+                                "quantidade": ["Venda maior que quantidade disponível"]
+                            },
+                        }
+                    )
+                    continue
+                saldos[asset_id] = aplicar_movimento(
+                    quantidade_total,
+                    preco_medio,
+                    validado["tipo"],
+                    validado["quantidade"],
+                    validado["preco"],
+                )
+                pendentes.append(
+                    (
+                        asset_id,
+                        Transaction(
+                            tipo=validado["tipo"],
+                            quantidade=validado["quantidade"],
+                            preco=validado["preco"],
+                            data=validado.get("data") or hoje,
+                            criado_por=usuario,
+                        ),
+                    )
+                )
+
+            novos = [
+                Holding(portfolio=portfolio, asset_id=asset_id)
+                for asset_id in {asset_id for asset_id, _t in pendentes}
+                if asset_id not in holdings
+            ]
+            for holding in Holding.objects.bulk_create(novos):
+                holdings[holding.asset_id] = holding
+
+            for asset_id, transacao in pendentes:
+                transacao.holding = holdings[asset_id]
+            Transaction.objects.bulk_create([t for _a, t in pendentes])
+            aplicar_lotes(portfolio._state.db, [t for _a, t in pendentes], iniciais)
+
+            alterados = []
+            for asset_id in {asset_id for asset_id, _t in pendentes}:
+                holding = holdings[asset_id]
+                holding.quantidade_total, holding.preco_medio = saldos[asset_id]
+                alterados.append(holding)
+            Holding.objects.bulk_update(alterados, ["quantidade_total", "preco_medio"])
+            criadas += len(pendentes)
+
+    if criadas:
+        # bulk_create/bulk_update não disparam os sinais de invalidação
+        invalidar_portfolio(portfolio.pk, portfolio.host)
+    return {"criadas": criadas, "erros": erros}
+
+
+def _escopo_holdings(host=None, portfolio=None, holdings=None):
+    filtro = Q()
+    if host is not None:
+        filtro &= Q(portfolio__host=host)
+    if portfolio is not None:
+        filtro &= Q(portfolio=portfolio)
+    if holdings is not None:
+        filtro &= Q(pk__in=list(holdings))
+    return filtro
+
+
+def _replay_do_ledger(transacoes):
+    """Agrupa o ledger ordenado por holding e devolve o estado final de cada um."""
+    for holding_id, linhas in groupby(transacoes, key=lambda linha: linha[0]):
+        quantidade_total, preco_medio = ZERO, ZERO
+        for _holding_id, tipo, quantidade, preco in linhas:
+            quantidade_total, preco_medio = aplicar_movimento(
+                quantidade_total, preco_medio, tipo, quantidade, preco
+            )
+        yield holding_id, quantidade_total, preco_medio
+
+
+def _bancos_do_escopo(host, portfolio=None):
+    if isinstance(portfolio, Portfolio):
+        return [primario(portfolio._state.db)]
+    return [banco_do_host(host)] if host is not None else bancos_de_tenants()
+
+
+def _contar(transacoes, resultado):
+    for linha in transacoes:
+        resultado["transacoes"] += 1
+        yield linha
+
+
+def _reconstruir_no_banco(banco, escopo, verificar, tamanho_lote, resultado, registrar):
+    """Reconstrói os holdings do escopo num banco, somando em `resultado`."""
+    ledger = (
+        Transaction.objects.using(banco)
+        .filter(holding__in=Holding.objects.using(banco).filter(escopo))
+        .order_by("holding_id", "data", "id")
+        .values_list("holding_id", "tipo", "quantidade", "preco")
+        .iterator(chunk_size=tamanho_lote)
+    )
+    for lote in _em_lotes(_replay_do_ledger(_contar(ledger, resultado)), tamanho_lote):
+        atuais = Holding.objects.using(banco).in_bulk(
+            [holding_id for holding_id, *_ in lote]
+        )
+        alterados = []
+        for holding_id, quantidade_total, preco_medio in lote:
+            holding = atuais.get(holding_id)
+            if holding is None:
+                continue
+            resultado["holdings"] += 1
+            atual = (holding.quantidade_total, holding.preco_medio)
+            esperado = (quantidade_total, preco_medio)
+            if atual == esperado:
+                continue
+            registrar(holding_id, atual, esperado)
+            holding.quantidade_total, holding.preco_medio = esperado
+            alterados.append(holding)
+        if alterados and not verificar:
+            Holding.objects.bulk_update(alterados, ["quantidade_total", "preco_medio"])
+
+    sem_transacoes = (
+        Holding.objects.using(banco)
+        .filter(escopo)
+        .filter(~Exists(Transaction.objects.filter(holding=OuterRef("pk"))))
+    )
+    resultado["holdings"] += sem_transacoes.count()
+    zerar = sem_transacoes.exclude(quantidade_total=ZERO, preco_medio=ZERO)
+    for holding_id, quantidade_total, preco_medio in zerar.values_list(
+        "id", "quantidade_total", "preco_medio"
+    ).iterator(chunk_size=tamanho_lote):
+        registrar(holding_id, (quantidade_total, preco_medio), (ZERO, ZERO))
+    if not verificar:
+        zerar.update(quantidade_total=ZERO, preco_medio=ZERO)
+
+
+def reconstruir_holdings(
+    host=None,
+    portfolio=None,
+    holdings=None,
+    verificar=False,
+    tamanho_lote=None,
+    bancos=None,
+):
+    """Recalcula holdings a partir do ledger de transações.
+
+    O ledger é lido em streaming na ordem `(holding, data, id)` e o estado de
+    cada holding é refeito com `aplicar_movimento`. Os resultados são
+    comparados com os valores gravados em lotes de `tamanho_lote` holdings
+    (uma consulta por lote) e os divergentes são gravados com `bulk_update`;
+    com `verificar=True` nada é gravado. Holdings do escopo sem transações
+    voltam a zero. A memória usada depende do lote, não do tamanho do ledger.
+    Cada banco de tenants (`bancos`; por padrão o do `portfolio`, o shard do
+    `host` ou todos) é reconstruído por vez.
+
+    Retorna contagens de holdings, transações e divergências, mais uma
+    amostra das divergências encontradas.
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE_PADRAO
+    escopo = _escopo_holdings(host=host, portfolio=portfolio, holdings=holdings)
+    resultado: dict = {
+        "holdings": 0,
+        "transacoes": 0,
+        "divergentes": 0,
+        "amostra": [],
+    }
+
+    def registrar(holding_id, atual, esperado):
+        resultado["divergentes"] += 1
+        if len(resultado["amostra"]) < LIMITE_AMOSTRA_DIVERGENCIAS:
+            resultado["amostra"].append(
+                {"holding": holding_id, "atual": atual, "esperado": esperado}
+            )
+
+    for banco in bancos or _bancos_do_escopo(host, portfolio):
+        _reconstruir_no_banco(
+            banco, escopo, verificar, tamanho_lote, resultado, registrar
+        )
+    if not verificar and resultado["divergentes"]:
+        invalidar_tudo()
+
+    return resultado
+
+
+def _reconstruir_lotes_do_portfolio(
+    banco, holdings, portfolio_id, tamanho_lote, resultado
+):
+    RealizedGain.objects.using(banco).filter(holding__in=holdings).delete()
+    Lot.objects.using(banco).filter(holding__in=holdings).delete()
+    ledger = (
+        Transaction.objects.using(banco)
+        .filter(holding__in=holdings)
+        .order_by("holding_id", "data", "id")
+        .values_list("holding_id", "id", "tipo", "quantidade", "preco", "data")
+        .iterator(chunk_size=tamanho_lote)
+    )
+    pendentes: list[Motor] = []
+    for holding_id, linhas in groupby(_contar(ledger, resultado), key=itemgetter(0)):
+        motor = Motor(holding_id, portfolio_id)
+        quantidade_total, preco_medio = ZERO, ZERO
+        for _holding_id, transacao_id, tipo, quantidade, preco, data in linhas:
+            motor.aplicar(transacao_id, tipo, quantidade, preco, data, preco_medio)
+            quantidade_total, preco_medio = aplicar_movimento(
+                quantidade_total, preco_medio, tipo, quantidade, preco
+            )
+        pendentes.append(motor)
+        if sum(map(len, pendentes)) >= tamanho_lote:
+            _somar_gravados(resultado, gravar(banco, pendentes))
+            pendentes = []
+    _somar_gravados(resultado, gravar(banco, pendentes))
+
+
+def _somar_gravados(resultado, gravados):
+    lotes, realizacoes = gravados
+    resultado["lotes"] += lotes
+    resultado["realizacoes"] += realizacoes
+
+
+def reconstruir_lotes(
+    host=None, portfolio=None, holdings=None, tamanho_lote=None, bancos=None
+):
+    """Refaz lotes e resultado realizado a partir do ledger.
+
+    Cada portfólio do escopo é refeito numa transação: seus lotes e
+    realizações são apagados e o ledger é lido uma vez, em streaming, na
+    ordem `(holding, data, id)`, com um `Motor` por holding; o que foi gerado
+    é gravado em lotes de `tamanho_lote` linhas. A memória depende do maior
+    ledger de um holding, não do portfólio. Use depois de editar ou apagar
+    transações, de lançamentos retroativos ou de trocar `LOTES_METODO`.
+
+    Retorna contagens de portfólios, transações, lotes e realizações.
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE_PADRAO
+    escopo = _escopo_holdings(host=host, portfolio=portfolio, holdings=holdings)
+    resultado = {"portfolios": 0, "transacoes": 0, "lotes": 0, "realizacoes": 0}
+    for banco in bancos or _bancos_do_escopo(host, portfolio):
+        do_escopo = Holding.objects.using(banco).filter(escopo)
+        portfolio_ids = list(
+            do_escopo.order_by("portfolio_id")
+            .values_list("portfolio_id", flat=True)
+            .distinct()
+        )
+        for portfolio_id in portfolio_ids:
+            with transaction.atomic(using=banco):
+                _reconstruir_lotes_do_portfolio(
+                    banco,
+                    do_escopo.filter(portfolio_id=portfolio_id),
+                    portfolio_id,
+                    tamanho_lote,
+                    resultado,
+                )
+            resultado["portfolios"] += 1
+    if resultado["portfolios"]:
+        invalidar_tudo()
+    return resultado
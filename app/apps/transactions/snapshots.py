@@ -0,0 +1,241 @@
+"""Posição dos holdings numa data a partir de snapshots diários.
+
+`Holding` só guarda o estado atual; responder "o que o portfólio tinha no
+dia X" exigiria refazer o ledger inteiro até X. `atualizar_snapshots` grava
+um `HoldingSnapshot` por holding e por dia com transações (o estado ao fim
+do dia) e, a cada execução, só processa as transações lançadas desde a
+anterior (ids acima do maior `ate_transacao`): os snapshots de cada holding
+afetado são refeitos a partir do dia da transação nova mais antiga, sobre o
+último snapshot anterior a ela.
+
+`estados_em` responde a consulta numa data: holdings sem transações depois
+dela estão como hoje; os demais partem do snapshot mais próximo até a data
+e refazem só as transações entre os dois. Um snapshot invalidado por uma
+transação retroativa lançada depois dele é ignorado e o holding é refeito
+do início até que a próxima execução o corrija.
+"""
+
+from itertools import chain, groupby
+from operator import itemgetter
+
+from apps.holdings.models import Holding, HoldingSnapshot
+from core.shards import bancos_de_tenants
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, Max, Min, OuterRef, Q, Subquery
+
+from .models import Transaction
+from .services import ZERO, _em_lotes, _replay_do_ledger, aplicar_movimento
+
+LOTE_HISTORICO = 500
+
+
+def existe_em(as_of):
+    """Filtro dos holdings que já existiam em `as_of`.
+
+    Holdings sem nenhuma transação (criados direto) contam como existentes.
+    """
+    transacoes = Transaction.objects.filter(holding=OuterRef("pk"))
+    return Q(Exists(transacoes.filter(data__lte=as_of))) | ~Q(Exists(transacoes))
+
+
+def _bases(banco, holding_ids, **filtros):
+    """`{holding_id: (data, quantidade, preco_medio, ate_transacao)}`.
+
+    O último snapshot de cada holding (com `filtros`) sai de uma busca pelo
+    índice `(holding, data)` por holding, sem ler os snapshots anteriores.
+    """
+    ultimo = HoldingSnapshot.objects.filter(holding=OuterRef("pk"), **filtros)
+    ultimos = Holding.objects.filter(pk__in=holding_ids).values(
+        snapshot=Subquery(ultimo.order_by("-data").values("pk")[:1])
+    )
+    linhas = (
+        HoldingSnapshot.objects.using(banco)
+        .filter(pk__in=ultimos)
+        .values_list(
+            "holding_id", "data", "quantidade_total", "preco_medio", "ate_transacao"
+        )
+    )
+    return {holding_id: tuple(resto) for holding_id, *resto in linhas}
+
+
+def _movimentar(estado, linhas):
+    quantidade_total, preco_medio = estado
+    for *_inicio, tipo, quantidade, preco in linhas:
+        quantidade_total, preco_medio = aplicar_movimento(
+            quantidade_total, preco_medio, tipo, quantidade, preco
+        )
+    return quantidade_total, preco_medio
+
+
+def _delta(banco, holding_ids, as_of, bases):
+    """Transações de `holding_ids` até `as_of` que podem faltar nas bases.
+
+    Duas buscas para o lote, cada uma por um índice: as datadas depois da
+    base mais antiga e as lançadas depois da menor marca. O que já está num
+    snapshot é descartado em Python.
+    """
+    if not holding_ids:
+        return []
+    transacoes = Transaction.objects.using(banco).filter(
+        holding_id__in=holding_ids, data__lte=as_of
+    )
+    if bases:
+        consultas = [
+            transacoes.filter(data__gt=min(base[0] for base in bases.values())),
+            transacoes.filter(id__gt=min(base[3] for base in bases.values())),
+        ]
+    else:
+        consultas = [transacoes]
+    linhas = {}
+    for consulta in consultas:
+        for linha in consulta.order_by().values_list(
+            "holding_id", "data", "id", "tipo", "quantidade", "preco"
+        ):
+            linhas[linha[2]] = linha
+    return sorted(linhas.values(), key=itemgetter(0, 1, 2))
+
+
+def _estados_do_lote(banco, lote, as_of):
+    bases = _bases(banco, lote, data__lte=as_of)
+    estados = {}
+    for holding_id in lote:
+        base = bases.get(holding_id)
+        estados[holding_id] = (base[1], base[2]) if base else (ZERO, ZERO)
+
+    sem_base = [holding_id for holding_id in lote if holding_id not in bases]
+    linhas = chain(
+        _delta(banco, sem_base, as_of, {}), _delta(banco, list(bases), as_of, bases)
+    )
+    invalidos = []
+    for holding_id, grupo in groupby(linhas, key=itemgetter(0)):
+        base = bases.get(holding_id)
+        if base is not None:
+            grupo = [
+                linha for linha in grupo if linha[1] > base[0] or linha[2] > base[3]
+            ]
+            if grupo and grupo[0][1] <= base[0]:
+                # transação retroativa lançada depois do snapshot
+                invalidos.append(holding_id)
+                continue
+        estados[holding_id] = _movimentar(estados[holding_id], grupo)
+
+    if invalidos:
+        ledger = (
+            Transaction.objects.using(banco)
+            .filter(holding_id__in=invalidos, data__lte=as_of)
+            .order_by("holding_id", "data", "id")
+            .values_list("holding_id", "tipo", "quantidade", "preco")
+        )
+        for holding_id, quantidade_total, preco_medio in _replay_do_ledger(ledger):
+            estados[holding_id] = (quantidade_total, preco_medio)
+    return estados
+
+
+def estados_em(holding_ids, as_of, banco=DEFAULT_DB_ALIAS):
+    """`{holding_id: (quantidade_total, preco_medio)}` ao fim do dia `as_of`.
+
+    Só entram os holdings com transações depois de `as_of`; os outros têm
+    hoje a mesma posição que tinham na data.
+    """
+    holding_ids = list(holding_ids)
+    if not holding_ids:
+        return {}
+    depois = Transaction.objects.filter(holding=OuterRef("pk"), data__gt=as_of)
+    mudaram = list(
+        Holding.objects.using(banco)
+        .filter(Exists(depois), pk__in=holding_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    estados = {}
+    for lote in _em_lotes(mudaram, LOTE_HISTORICO):
+        estados.update(_estados_do_lote(banco, lote, as_of))
+    return estados
+
+
+def _refazer(banco, inicios, limite):
+    """Refaz os snapshots do lote a partir do menor dos `inicios`.
+
+    Apagar desde a menor data do lote (e não a de cada holding) pode levar
+    snapshots ainda válidos, que são gerados de novo pelo mesmo replay.
+    """
+    HoldingSnapshot.objects.using(banco).filter(
+        holding_id__in=list(inicios), data__gte=min(inicios.values())
+    ).delete()
+
+    bases = _bases(banco, list(inicios))
+    ledger = Transaction.objects.using(banco).filter(
+        holding_id__in=list(inicios), id__lte=limite
+    )
+    if len(bases) == len(inicios):
+        ledger = ledger.filter(data__gt=min(base[0] for base in bases.values()))
+
+    novos = []
+    linhas = ledger.order_by("holding_id", "data", "id").values_list(
+        "holding_id", "data", "tipo", "quantidade", "preco"
+    )
+    for holding_id, grupo in groupby(linhas, key=itemgetter(0)):
+        base = bases.get(holding_id)
+        estado = (base[1], base[2]) if base else (ZERO, ZERO)
+        for data, do_dia in groupby(grupo, key=itemgetter(1)):
+            if base is not None and data <= base[0]:
+                continue
+            estado = _movimentar(estado, do_dia)
+            novos.append(
+                HoldingSnapshot(
+                    holding_id=holding_id,
+                    data=data,
+                    quantidade_total=estado[0],
+                    preco_medio=estado[1],
+                    ate_transacao=limite,
+                )
+            )
+    HoldingSnapshot.objects.using(banco).bulk_create(novos)
+    return len(novos)
+
+
+def _atualizar_no_banco(banco, tamanho_lote, resultado):
+    snapshots = HoldingSnapshot.objects.using(banco)
+    marca = snapshots.aggregate(marca=Max("ate_transacao"))["marca"] or 0
+    limite = Transaction.objects.using(banco).aggregate(limite=Max("id"))["limite"]
+    if not limite or limite <= marca:
+        return
+    novas = Transaction.objects.using(banco).filter(id__gt=marca, id__lte=limite)
+    inicios = dict(
+        novas.order_by()
+        .values("holding_id")
+        .annotate(inicio=Min("data"))
+        .values_list("holding_id", "inicio")
+    )
+    resultado["transacoes"] += novas.count()
+    resultado["holdings"] += len(inicios)
+    for lote in _em_lotes(sorted(inicios), tamanho_lote):
+        with transaction.atomic(using=banco):
+            resultado["snapshots"] += _refazer(
+                banco, {holding_id: inicios[holding_id] for holding_id in lote}, limite
+            )
+
+
+def atualizar_snapshots(tamanho_lote=LOTE_HISTORICO, completo=False, bancos=None):
+    """Gera os snapshots das transações lançadas desde a última execução.
+
+    Cada lote de `tamanho_lote` holdings é refeito numa transação própria.
+    Com `completo=True` todos os snapshots são descartados e o ledger inteiro
+    é reprocessado. Retorna as contagens de transações novas, holdings
+    afetados e snapshots gravados.
+    """
+    resultado = {"transacoes": 0, "holdings": 0, "snapshots": 0}
+    for banco in bancos or bancos_de_tenants():
+        if completo:
+            HoldingSnapshot.objects.using(banco).all().delete()
+        _atualizar_no_banco(banco, tamanho_lote, resultado)
+    return resultado
+
+
+def descartar_snapshots(holding_ids, banco=DEFAULT_DB_ALIAS):
+    """Apaga os snapshots de holdings cujo ledger foi editado ou apagado.
+
+    As consultas por data refazem esses holdings do início até que uma nova
+    transação (ou `snapshot_holdings --completo`) os gere de novo.
+    """
+    HoldingSnapshot.objects.using(banco).filter(holding_id__in=holding_ids).delete()
@@ -0,0 +1,155 @@
+import json
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def _senior(username, host="alpha"):
+    user = User.objects.create_user(username=username, password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_SENIOR
+    profile.host = host
+    profile.save()
+    return user
+
+
+def _client(username):
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return client
+
+
+@pytest.mark.django_db
+def test_importacao_csv_cria_transacoes_e_atualiza_holdings():
+    user = _senior("senior_bulk")
+    portfolio = Portfolio.objects.create(nome="Pbulk", host="alpha", criado_por=user)
+    a1 = Asset.objects.create(ticker="BLK1", nome="Bulk 1", tipo="ACAO")
+    a2 = Asset.objects.create(ticker="BLK2", nome="Bulk 2", tipo="FII")
+    Holding.objects.create(
+        portfolio=portfolio,
+        asset=a1,
+        quantidade_total=Decimal("2.00"),
+        preco_medio=Decimal("8.00"),
+    )
+
+    corpo = (
+        "asset,tipo,quantidade,preco,data\n"
+        f"{a1.id},COMPRA,5.00,10.00,2025-11-11\n"
+        f"{a2.id},COMPRA,3.00,7.00,2025-11-11\n"
+        f"{a1.id},VENDA,1.00,12.00,2025-11-12\n"
+    )
+    resp = _client("senior_bulk").post(
+        f"/api/portfolios/{portfolio.id}/transactions/bulk/",
+        corpo,
+        content_type="text/csv",
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"criadas": 3, "erros": []}
+    h1 = Holding.objects.get(portfolio=portfolio, asset=a1)
+    assert h1.quantidade_total == Decimal("6.00")
+    # mesmo arredondamento do caminho de uma transação por vez
+    assert h1.preco_medio == Decimal(str(round(66.0 / 7.0, 2)))
+    h2 = Holding.objects.get(portfolio=portfolio, asset=a2)
+    assert (h2.quantidade_total, h2.preco_medio) == (Decimal("3.00"), Decimal("7.00"))
+    assert Transaction.objects.filter(holding__portfolio=portfolio).count() == 3
+
+
+@pytest.mark.django_db
+def test_importacao_ndjson_reporta_erros_por_linha():
+    user = _senior("senior_bulk_err")
+    portfolio = Portfolio.objects.create(nome="Perr", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="BLKE", nome="Bulk E", tipo="ACAO")
+
+    linhas = [
+        {"asset": asset.id, "tipo": "COMPRA", "quantidade": "4", "preco": "10"},
+        {"asset": 999999, "tipo": "COMPRA", "quantidade": "1", "preco": "10"},
+        {"asset": asset.id, "tipo": "COMPRA", "quantidade": "-1", "preco": "10"},
+        {"asset": asset.id, "tipo": "VENDA", "quantidade": "9", "preco": "10"},
+    ]
+    corpo = "".join(
+        json.dumps({**linha, "data": "2025-11-11"}) + "\n" for linha in linhas
+    )
+    corpo += "{quebrado\n"
+    resp = _client("senior_bulk_err").post(
+        f"/api/portfolios/{portfolio.id}/transactions/bulk/?lote=2",
+        corpo,
+        content_type="application/x-ndjson",
+    )
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["criadas"] == 1
+    assert [erro["linha"] for erro in data["erros"]] == [2, 3, 4, 5]
+    assert "asset" in data["erros"][0]["erros"]
+    assert "quantidade" in data["erros"][2]["erros"]
+    holding = Holding.objects.get(portfolio=portfolio, asset=asset)
+    assert holding.quantidade_total == Decimal("4.00")
+
+
+@pytest.mark.django_db
+def test_importacao_respeita_escopo_e_formato():
+    _senior("senior_bulk_alpha")
+    owner = _senior("senior_bulk_beta", host="beta")
+    portfolio_beta = Portfolio.objects.create(
+        nome="Pbeta", host="beta", criado_por=owner
+    )
+    client = _client("senior_bulk_alpha")
+    url = f"/api/portfolios/{portfolio_beta.id}/transactions/bulk/"
+
+    assert client.post(url, "", content_type="text/csv").status_code == 404
+
+    client_beta = _client("senior_bulk_beta")
+    assert client_beta.post(url, "{}", content_type="text/plain").status_code == 415
+
+
+@pytest.mark.django_db
+def test_importacao_em_lote_faz_muito_menos_consultas_que_uma_por_vez():
+    user = _senior("senior_bulk_q")
+    portfolio = Portfolio.objects.create(nome="Pq", host="alpha", criado_por=user)
+    ativos = [
+        Asset.objects.create(ticker=f"BQ{i}", nome=f"Bulk Q {i}", tipo="ACAO")
+        for i in range(5)
+    ]
+    client = _client("senior_bulk_q")
+
+    amostra = 5
+    with CaptureQueriesContext(connection) as unitario:
+        for i in range(amostra):
+            client.post(
+                f"/api/portfolios/{portfolio.id}/transactions/",
+                {
+                    "asset": ativos[i % 5].id,
+                    "tipo": "COMPRA",
+                    "quantidade": "1.00",
+                    "preco": "10.00",
+                    "data": "2025-11-11",
+                },
+                format="json",
+            )
+    por_linha = len(unitario) / amostra
+
+    total = 1000
+    corpo = "asset,tipo,quantidade,preco,data\n" + "".join(
+        f"{ativos[i % 5].id},COMPRA,1.00,10.00,2025-11-11\n" for i in range(total)
+    )
+    with CaptureQueriesContext(connection) as lote:
+        resp = client.post(
+            f"/api/portfolios/{portfolio.id}/transactions/bulk/",
+            corpo,
+            content_type="text/csv",
+        )
+
+    assert resp.json() == {"criadas": total, "erros": []}
+    assert len(lote) * 50 < por_linha * total
+    holding = Holding.objects.get(portfolio=portfolio, asset=ativos[0])
+    assert holding.quantidade_total == Decimal(amostra // 5 + total // 5)
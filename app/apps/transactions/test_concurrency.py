@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from threading import Barrier
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+
+N_REQUISICOES = 8
+
+
+def _postar_em_paralelo(user, url, payloads):
+    def postar(payload):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            return client.post(url, payload, format="json").status_code
+        finally:
+            # cada thread abre a própria conexão com o banco
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        return list(pool.map(postar, payloads))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_compras_paralelas_nao_perdem_atualizacoes():
+    user = User.objects.create_user(username="senior_conc", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_SENIOR
+    profile.host = "alpha"
+    profile.save()
+    user = User.objects.select_related("profile").get(pk=user.pk)
+
+    portfolio = Portfolio.objects.create(nome="Pconc", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="CONC", nome="Asset Conc", tipo="ACAO")
+    holding = Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal("10.00"),
+        preco_medio=Decimal("10.00"),
+    )
+
+    url = f"/api/portfolios/{portfolio.id}/transactions/"
+    payloads = [
+        {
+            "asset": asset.id,
+            "tipo": "COMPRA",
+            "quantidade": "10.00",
+            "preco": "20.00",
+            "data": "2025-11-11",
+        }
+        for _ in range(N_REQUISICOES)
+    ]
+    status = _postar_em_paralelo(user, url, payloads)
+
+    assert status == [201] * N_REQUISICOES
+    assert Transaction.objects.filter(holding=holding).count() == N_REQUISICOES
+    holding.refresh_from_db()
+    # 10 @ 10 + N * (10 @ 20): cada compra deve ter sido aplicada exatamente uma vez
+    assert holding.quantidade_total == Decimal("10.00") * (N_REQUISICOES + 1)
+    esperado = (Decimal("100") + N_REQUISICOES * Decimal("200")) / (
+        10 * (N_REQUISICOES + 1)
+    )
+    assert holding.preco_medio == pytest.approx(esperado, abs=Decimal("0.05"))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_vendas_paralelas_nao_vendem_mais_que_o_saldo():
+    user = User.objects.create_user(username="senior_conc_v", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_SENIOR
+    profile.host = "alpha"
+    profile.save()
+    user = User.objects.select_related("profile").get(pk=user.pk)
+
+    portfolio = Portfolio.objects.create(nome="Pconcv", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="CONCV", nome="Asset Conc V", tipo="ACAO")
+    holding = Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal("30.00"),
+        preco_medio=Decimal("10.00"),
+    )
+
+    url = f"/api/portfolios/{portfolio.id}/transactions/"
+    payloads = [
+        {
+            "asset": asset.id,
+            "tipo": "VENDA",
+            "quantidade": "10.00",
+            "preco": "12.00",
+            "data": "2025-11-11",
+        }
+        for _ in range(N_REQUISICOES)
+    ]
+    status = _postar_em_paralelo(user, url, payloads)
+
+    assert status.count(201) == 3
+    assert status.count(400) == N_REQUISICOES - 3
+    holding.refresh_from_db()
+    assert holding.quantidade_total == Decimal("0.00")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_atualizar_holding_aplica_incrementos_no_banco():
+    # Fora de uma requisição (sem ATOMIC_REQUESTS) cada thread carrega o
+    # holding antes de todas gravarem: o incremento precisa vir do banco.
+    user = User.objects.create_user(username="senior_conc_m", password="pass")
+    portfolio = Portfolio.objects.create(nome="Pconcm", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="CONCM", nome="Asset Conc M", tipo="ACAO")
+    holding = Holding.objects.create(portfolio=portfolio, asset=asset)
+
+    barreira = Barrier(N_REQUISICOES)
+
+    def comprar(_):
+        try:
+            carregado = Holding.objects.get(pk=holding.pk)
+            barreira.wait()
+            Transaction.objects.create(
+                holding=carregado,
+                tipo="COMPRA",
+                quantidade=Decimal("1.00"),
+                preco=Decimal("10.00"),
+                data="2025-11-11",
+                criado_por=user,
+            )
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=N_REQUISICOES) as pool:
+        list(pool.map(comprar, range(N_REQUISICOES)))
+
+    holding.refresh_from_db()
+    assert holding.quantidade_total == Decimal(N_REQUISICOES)
+    assert holding.preco_medio == Decimal("10.00")
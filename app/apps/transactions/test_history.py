@@ -0,0 +1,152 @@
+from base64 import b64encode
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+
+
+def _cliente(username, role, host):
+    user = User.objects.create_user(username=username, password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = role
+    profile.host = host
+    profile.save()
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return user, client
+
+
+@pytest.fixture
+def historico(db):
+    user, client = _cliente("hist_junior", UserProfile.ROLE_INVESTIDOR_JUNIOR, "alpha")
+    portfolio = Portfolio.objects.create(nome="Phist", host="alpha", criado_por=user)
+    petr = Asset.objects.create(ticker="HIS1", nome="Hist 1", tipo="ACAO")
+    vale = Asset.objects.create(ticker="HIS2", nome="Hist 2", tipo="ACAO")
+    h_petr = Holding.objects.create(portfolio=portfolio, asset=petr)
+    h_vale = Holding.objects.create(portfolio=portfolio, asset=vale)
+    # várias transações no mesmo dia: a paginação desempata por id
+    for dia, holding, tipo in [
+        (3, h_petr, "COMPRA"),
+        (5, h_petr, "COMPRA"),
+        (5, h_vale, "COMPRA"),
+        (5, h_petr, "VENDA"),
+        (7, h_vale, "COMPRA"),
+    ]:
+        Transaction.objects.create(
+            holding=holding,
+            tipo=tipo,
+            quantidade=Decimal("1.00"),
+            preco=Decimal("10.00"),
+            data=date(2025, 11, dia),
+            criado_por=user,
+        )
+    return client, portfolio, h_petr, h_vale
+
+
+def _todas_as_paginas(client, url):
+    ids = []
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        ids += [t["id"] for t in resp.json()["results"]]
+        url = resp.json()["next"]
+    return ids
+
+
+def test_historico_do_portfolio_pagina_sem_repetir_nem_pular(historico):
+    client, portfolio, _h_petr, _h_vale = historico
+    esperado = list(
+        Transaction.objects.order_by("-data", "-id").values_list("id", flat=True)
+    )
+
+    ids = _todas_as_paginas(
+        client, f"/api/portfolios/{portfolio.id}/transactions/?page_size=2"
+    )
+
+    assert ids == esperado
+
+
+def test_historico_aplica_filtros(historico):
+    client, portfolio, h_petr, _h_vale = historico
+    url = f"/api/portfolios/{portfolio.id}/transactions/"
+
+    resp = client.get(
+        url,
+        {
+            "asset": h_petr.asset_id,
+            "data_inicio": "2025-11-04",
+            "data_fim": "2025-11-05",
+            "tipo": "COMPRA",
+        },
+    )
+
+    results = resp.json()["results"]
+    assert [(t["asset"], t["tipo"], t["data"]) for t in results] == [
+        (h_petr.asset_id, "COMPRA", "2025-11-05")
+    ]
+    assert results[0]["criado_por"] == "hist_junior"
+    assert client.get(url, {"tipo": "X"}).status_code == 400
+
+
+def test_historico_respeita_host(historico):
+    _client, portfolio, h_petr, _h_vale = historico
+    _user, outro = _cliente("hist_beta", UserProfile.ROLE_INVESTIDOR_JUNIOR, "beta")
+
+    assert outro.get(f"/api/portfolios/{portfolio.id}/transactions/").status_code == (
+        404
+    )
+    assert outro.get(f"/api/holdings/{h_petr.id}/transactions/").status_code == 404
+
+
+def test_historico_do_holding(historico):
+    client, _portfolio, h_petr, _h_vale = historico
+    esperado = list(
+        Transaction.objects.filter(holding=h_petr)
+        .order_by("-data", "-id")
+        .values_list("id", flat=True)
+    )
+
+    ids = _todas_as_paginas(
+        client, f"/api/holdings/{h_petr.id}/transactions/?page_size=1"
+    )
+
+    assert ids == esperado
+
+
+def test_cursor_invalido_retorna_404(historico):
+    client, _portfolio, h_petr, _h_vale = historico
+
+    url = f"/api/holdings/{h_petr.id}/transactions/?cursor="
+    respostas = [
+        client.get(url + "xyz"),
+        # JSON válido, mas a data, o id ou o formato do par não
+        client.get(url + b64encode(b'["xx", 1]').decode()),
+        client.get(url + b64encode(b'["2025-02-30", 1]').decode()),
+        client.get(url + b64encode(b'[["2025-11-05"], 1]').decode()),
+        client.get(url + b64encode(b'["2025-11-05", "x"]').decode()),
+        client.get(url + b64encode(b'["2025-11-05"]').decode()),
+    ]
+
+    assert [resp.status_code for resp in respostas] == [404] * 6
+    assert respostas[1].json()["detail"] == "Cursor inválido"
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="plano do SQLite")
+def test_historico_do_holding_usa_indice_sem_ordenacao(historico):
+    _client, _portfolio, h_petr, _h_vale = historico
+    qs = Transaction.objects.filter(
+        holding=h_petr, data__lte=date(2025, 11, 5)
+    ).order_by("-data", "-id")
+
+    plano = qs.explain()
+
+    assert "tx_holding_data_id_idx" in plano
+    assert "TEMP B-TREE" not in plano
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.idempotencia import purgar_expiradas
+from apps.transactions.models import IdempotencyKey, Transaction
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def cenario(db):
+    user = User.objects.create_user(username="senior_idem", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host="alpha"
+    )
+    portfolio = Portfolio.objects.create(nome="Idem", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="IDM1", nome="Idem", tipo="ACAO")
+    client = APIClient()
+    client.login(username="senior_idem", password="pass")
+    url = f"/api/portfolios/{portfolio.id}/transactions/"
+    compra = {
+        "asset": asset.id,
+        "tipo": "COMPRA",
+        "quantidade": "10.00",
+        "preco": "5.00",
+        "data": "2025-11-11",
+    }
+    return user, client, url, compra
+
+
+def _post(client, url, payload, chave):
+    return client.post(url, payload, format="json", HTTP_IDEMPOTENCY_KEY=chave)
+
+
+def test_repeticao_devolve_a_resposta_guardada_sem_gravar(cenario):
+    _user, client, url, compra = cenario
+
+    primeira = _post(client, url, compra, "k-1")
+    with CaptureQueriesContext(connection) as consultas:
+        repetida = _post(client, url, compra, "k-1")
+
+    assert primeira.status_code == 201
+    assert repetida.status_code == 201
+    assert repetida.json() == primeira.json()
+    assert repetida["Idempotent-Replayed"] == "true"
+    assert Transaction.objects.count() == 1
+    assert Holding.objects.get().quantidade_total == Decimal("10.00")
+    assert not any("holdings_holding" in q["sql"] for q in consultas)
+    assert not any(q["sql"].startswith("INSERT") for q in consultas)
+
+
+def test_chave_reutilizada_com_outro_corpo_retorna_422(cenario):
+    _user, client, url, compra = cenario
+    _post(client, url, compra, "k-2")
+
+    resp = _post(client, url, {**compra, "quantidade": "3.00"}, "k-2")
+
+    assert resp.status_code == 422
+    assert Transaction.objects.count() == 1
+
+
+def test_chave_e_por_usuario_e_erros_nao_sao_guardados(cenario):
+    user, client, url, compra = cenario
+    outro = User.objects.create_user(username="senior_idem2", password="pass")
+    UserProfile.objects.filter(user=outro).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host="alpha"
+    )
+    outro_client = APIClient()
+    outro_client.login(username="senior_idem2", password="pass")
+
+    invalida = _post(client, url, {**compra, "quantidade": "0"}, "k-3")
+    corrigida = _post(client, url, compra, "k-3")
+    do_outro = _post(outro_client, url, compra, "k-3")
+    sem_chave = client.post(url, compra, format="json")
+
+    assert invalida.status_code == 400
+    assert corrigida.status_code == 201
+    assert do_outro.status_code == 201
+    assert "Idempotent-Replayed" not in do_outro
+    assert sem_chave.status_code == 201
+    assert Transaction.objects.count() == 3
+    assert IdempotencyKey.objects.filter(chave="k-3").count() == 2
+
+
+def test_chave_vencida_e_ignorada_e_purgada_em_lotes(cenario):
+    user, client, url, compra = cenario
+    for i in range(5):
+        _post(client, url, compra, f"velha-{i}")
+    IdempotencyKey.objects.update(criado_em=timezone.now() - timedelta(hours=25))
+    _post(client, url, compra, "nova")
+
+    repetida = _post(client, url, compra, "velha-0")
+    apagadas = purgar_expiradas(tamanho_lote=2)
+
+    assert "Idempotent-Replayed" not in repetida
+    assert Transaction.objects.count() == 7
+    assert apagadas == 4
+    assert set(IdempotencyKey.objects.values_list("chave", flat=True)) == {
+        "nova",
+        "velha-0",
+    }
+
+
+def test_comando_de_purga(cenario):
+    _user, client, url, compra = cenario
+    _post(client, url, compra, "k-5")
+    IdempotencyKey.objects.update(criado_em=timezone.now() - timedelta(days=2))
+    saida = StringIO()
+
+    call_command("purge_idempotency_keys", "--chunk-size", "10", stdout=saida)
+
+    assert "1 chaves" in saida.getvalue()
+    assert not IdempotencyKey.objects.exists()
+
+
+def test_chave_longa_demais_retorna_400(cenario):
+    _user, client, url, compra = cenario
+
+    resp = _post(client, url, compra, "x" * 256)
+
+    assert resp.status_code == 400
+    assert not Transaction.objects.exists()
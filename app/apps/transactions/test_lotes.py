@@ -0,0 +1,226 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.portifolios.services import resultado_realizado
+from apps.transactions.admin import TransactionAdmin
+from apps.transactions.models import Lot, RealizedGain, Transaction
+from apps.transactions.services import reconstruir_lotes
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def cenario(db):
+    user = User.objects.create_user(username="senior_lotes", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host="alpha"
+    )
+    portfolio = Portfolio.objects.create(nome="Lotes", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="LOT1", nome="Lote", tipo="ACAO")
+    client = APIClient()
+    client.login(username="senior_lotes", password="pass")
+    return user, portfolio, asset, client
+
+
+def _lancar(client, portfolio, asset, tipo, quantidade, preco, data):
+    resp = client.post(
+        f"/api/portfolios/{portfolio.id}/transactions/",
+        {
+            "asset": asset.id,
+            "tipo": tipo,
+            "quantidade": quantidade,
+            "preco": preco,
+            "data": data,
+        },
+        format="json",
+    )
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _operar(client, portfolio, asset):
+    _lancar(client, portfolio, asset, "COMPRA", "10.00", "10.00", "2025-11-03")
+    _lancar(client, portfolio, asset, "COMPRA", "10.00", "20.00", "2025-11-04")
+    _lancar(client, portfolio, asset, "VENDA", "15.00", "30.00", "2025-11-10")
+    _lancar(client, portfolio, asset, "VENDA", "2.00", "25.00", "2025-12-01")
+
+
+def _realizado(client, portfolio, consulta=""):
+    resp = client.get(f"/api/portfolios/{portfolio.id}/realized/{consulta}")
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _retrato(portfolio):
+    lotes = list(
+        Lot.objects.filter(holding__portfolio=portfolio)
+        .order_by("compra_id")
+        .values_list("compra_id", "quantidade_aberta")
+    )
+    realizacoes = list(
+        RealizedGain.objects.filter(portfolio=portfolio)
+        .order_by("venda_id", "lot__compra_id")
+        .values_list("venda_id", "lot__compra_id", "quantidade", "custo", "resultado")
+    )
+    return lotes, realizacoes
+
+
+def test_fifo_consome_os_lotes_mais_antigos(cenario):
+    _user, portfolio, asset, client = cenario
+    _operar(client, portfolio, asset)
+
+    total = _realizado(client, portfolio)
+    novembro = _realizado(client, portfolio, "?inicio=2025-11-01&fim=2025-11-30")
+    invertido = client.get(
+        f"/api/portfolios/{portfolio.id}/realized/?inicio=2025-12-01&fim=2025-11-01"
+    )
+
+    # 10 @ 10 e 5 @ 20 vendidos a 30; depois 2 @ 20 vendidos a 25
+    assert novembro["resultado"] == 250.0
+    assert novembro["vendas"] == 1
+    assert total["resultado"] == 260.0
+    assert total["custo"] == 240.0
+    assert total["receita"] == 500.0
+    assert total["quantidade"] == 17.0
+    assert total["metodo"] == "FIFO"
+    assert invertido.status_code == 400
+    lotes = Lot.objects.order_by("data").values_list("quantidade_aberta", flat=True)
+    assert list(lotes) == [Decimal("0.00"), Decimal("3.00")]
+
+
+@override_settings(LOTES_METODO="MEDIO")
+def test_custo_medio_usa_o_preco_medio_do_holding(cenario):
+    _user, portfolio, asset, client = cenario
+    _operar(client, portfolio, asset)
+
+    total = _realizado(client, portfolio)
+
+    # preço médio 15: 15 @ 15 vendidos a 30 e 2 @ 15 vendidos a 25
+    assert total["custo"] == 255.0
+    assert total["resultado"] == 245.0
+    assert total["metodo"] == "MEDIO"
+    assert sum(Lot.objects.values_list("quantidade_aberta", flat=True)) == 3
+
+
+def test_importacao_e_reconstrucao_chegam_aos_mesmos_lotes(cenario):
+    user, portfolio, asset, client = cenario
+    outro = Portfolio.objects.create(nome="Lotes 2", host="alpha", criado_por=user)
+    _operar(client, portfolio, asset)
+    corpo = "asset,tipo,quantidade,preco,data\n" + "".join(
+        f"{asset.id},{tipo},{quantidade},{preco},{data}\n"
+        for tipo, quantidade, preco, data in [
+            ("COMPRA", "10.00", "10.00", "2025-11-03"),
+            ("COMPRA", "10.00", "20.00", "2025-11-04"),
+            ("VENDA", "15.00", "30.00", "2025-11-10"),
+            ("VENDA", "2.00", "25.00", "2025-12-01"),
+        ]
+    )
+    resp = client.post(
+        f"/api/portfolios/{outro.id}/transactions/bulk/?lote=2",
+        corpo,
+        content_type="text/csv",
+    )
+    unitario = resultado_realizado(portfolio)
+    importado = resultado_realizado(outro)
+    antes = _retrato(portfolio)
+
+    resultado = reconstruir_lotes(portfolio=portfolio.pk, tamanho_lote=2)
+
+    assert resp.json() == {"criadas": 4, "erros": []}
+    assert importado["resultado"] == unitario["resultado"] == Decimal("260")
+    assert _retrato(portfolio) == antes
+    assert resultado == {
+        "portfolios": 1,
+        "transacoes": 4,
+        "lotes": 2,
+        "realizacoes": 3,
+    }
+
+
+def test_compra_retroativa_entra_na_ordem_do_ledger_na_reconstrucao(cenario):
+    _user, portfolio, asset, client = cenario
+    _lancar(client, portfolio, asset, "COMPRA", "10.00", "20.00", "2025-11-04")
+    _lancar(client, portfolio, asset, "VENDA", "5.00", "30.00", "2025-11-10")
+    _lancar(client, portfolio, asset, "COMPRA", "10.00", "10.00", "2025-11-01")
+    incremental = resultado_realizado(portfolio)["resultado"]
+
+    call_command("rebuild_lots", "--portfolio", str(portfolio.pk), stdout=StringIO())
+    reconstruido = _realizado(client, portfolio)
+
+    assert incremental == Decimal("50")
+    # refeito na ordem do ledger, a venda consome a compra de 01/11
+    assert reconstruido["resultado"] == 100.0
+
+
+def test_venda_de_saldo_sem_lote_usa_o_preco_medio(cenario):
+    _user, portfolio, asset, client = cenario
+    Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal("4.00"),
+        preco_medio=Decimal("8.00"),
+    )
+    _lancar(client, portfolio, asset, "COMPRA", "2.00", "11.00", "2025-11-03")
+    _lancar(client, portfolio, asset, "VENDA", "3.00", "12.00", "2025-11-05")
+
+    realizacoes = list(
+        RealizedGain.objects.order_by("id").values_list("lot_id", "quantidade", "custo")
+    )
+
+    assert realizacoes[0][1:] == (Decimal("2.00"), Decimal("22.0000"))
+    # preço médio antes da venda: (4 * 8 + 2 * 11) / 6 = 9
+    assert realizacoes[1] == (None, Decimal("1.00"), Decimal("9.0000"))
+
+
+def test_resultado_do_periodo_e_um_agregado_pelo_indice(cenario):
+    _user, portfolio, asset, client = cenario
+    _operar(client, portfolio, asset)
+
+    with CaptureQueriesContext(connection) as consultas:
+        resultado_realizado(portfolio, fim="2025-11-30")
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + consultas[0]["sql"])
+        plano = " ".join(str(linha) for linha in cursor.fetchall())
+
+    assert len(consultas) == 1
+    assert "realizado_portfolio_data_idx" in plano
+
+
+def test_admin_refaz_os_lotes_do_holding(cenario):
+    _user, portfolio, asset, client = cenario
+    _operar(client, portfolio, asset)
+    model_admin = TransactionAdmin(Transaction, admin.site)
+
+    model_admin.delete_model(None, Transaction.objects.get(data="2025-11-03"))
+
+    assert resultado_realizado(portfolio)["resultado"] == Decimal("160")
+    assert not RealizedGain.objects.filter(lot__compra__data="2025-11-03").exists()
+
+
+def test_compra_pela_api_grava_o_lote_sem_savepoint(cenario):
+    _user, portfolio, asset, client = cenario
+
+    with CaptureQueriesContext(connection) as consultas:
+        _lancar(client, portfolio, asset, "COMPRA", "10.00", "10.00", "2025-11-03")
+    sql = [q["sql"] for q in consultas]
+    insert = next(
+        i for i, q in enumerate(sql) if q.startswith('INSERT INTO "transactions_tr')
+    )
+
+    depois = sql[insert + 1 :]
+
+    # o lote é um INSERT só, sem savepoint em volta
+    assert [q[:30] for q in depois if "transactions_lot" in q] == [
+        'INSERT INTO "transactions_lot"'
+    ]
+    assert not any(q.startswith("SAVEPOINT") for q in depois)
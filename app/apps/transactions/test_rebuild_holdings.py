@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from apps.transactions.admin import TransactionAdmin
+from apps.transactions.models import Transaction
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+
+def _transacao(holding, user, tipo, quantidade, preco, dia):
+    return Transaction.objects.create(
+        holding=holding,
+        tipo=tipo,
+        quantidade=Decimal(quantidade),
+        preco=Decimal(preco),
+        data=date(2025, 11, dia),
+        criado_por=user,
+    )
+
+
+@pytest.fixture
+def ledger(db):
+    user = User.objects.create_user(username="ledger", password="pass")
+    asset = Asset.objects.create(ticker="LDG", nome="Ledger", tipo="ACAO")
+    alpha = Portfolio.objects.create(nome="Palpha", host="alpha", criado_por=user)
+    beta = Portfolio.objects.create(nome="Pbeta", host="beta", criado_por=user)
+    h_alpha = Holding.objects.create(portfolio=alpha, asset=asset)
+    h_beta = Holding.objects.create(portfolio=beta, asset=asset)
+    # gravadas fora da ordem de data: o replay segue (data, id)
+    _transacao(h_alpha, user, "COMPRA", "5.00", "10.00", 12)
+    _transacao(h_alpha, user, "COMPRA", "2.00", "8.00", 10)
+    _transacao(h_alpha, user, "VENDA", "1.00", "11.00", 13)
+    _transacao(h_beta, user, "COMPRA", "3.00", "7.00", 10)
+    return user, alpha, h_alpha, h_beta
+
+
+def _corromper(*holdings):
+    Holding.objects.filter(pk__in=[h.pk for h in holdings]).update(
+        quantidade_total=Decimal("99.00"), preco_medio=Decimal("1.00")
+    )
+
+
+def test_verify_reporta_divergencias_sem_gravar(ledger):
+    _user, _alpha, h_alpha, _h_beta = ledger
+    _corromper(h_alpha)
+
+    out = StringIO()
+    call_command("rebuild_holdings", "--verify", stdout=out)
+
+    assert "1 divergentes" in out.getvalue()
+    assert f"holding {h_alpha.pk}" in out.getvalue()
+    h_alpha.refresh_from_db()
+    assert h_alpha.quantidade_total == Decimal("99.00")
+
+
+def test_rebuild_recalcula_preco_medio_ponderado(ledger):
+    _user, _alpha, h_alpha, h_beta = ledger
+    _corromper(h_alpha, h_beta)
+
+    call_command("rebuild_holdings", "--chunk-size", "1", stdout=StringIO())
+
+    h_alpha.refresh_from_db()
+    h_beta.refresh_from_db()
+    # 2 @ 8 em 10/11, depois 5 @ 10 em 12/11, depois venda de 1
+    assert h_alpha.quantidade_total == Decimal("6.00")
+    assert h_alpha.preco_medio == Decimal("9.43")
+    assert (h_beta.quantidade_total, h_beta.preco_medio) == (
+        Decimal("3.00"),
+        Decimal("7.00"),
+    )
+
+
+def test_rebuild_respeita_filtros_de_host_e_portfolio(ledger):
+    user, alpha, h_alpha, h_beta = ledger
+    _corromper(h_alpha, h_beta)
+    sem_ledger = Holding.objects.create(
+        portfolio=alpha,
+        asset=Asset.objects.create(ticker="VAZ", nome="Vazio", tipo="FII"),
+        quantidade_total=Decimal("4.00"),
+        preco_medio=Decimal("2.00"),
+    )
+
+    call_command("rebuild_holdings", "--host", "alpha", stdout=StringIO())
+    h_beta.refresh_from_db()
+    assert h_beta.quantidade_total == Decimal("99.00")
+    sem_ledger.refresh_from_db()
+    assert sem_ledger.quantidade_total == Decimal("0.00")
+
+    call_command(
+        "rebuild_holdings", "--portfolio", str(h_beta.portfolio_id), stdout=StringIO()
+    )
+    h_beta.refresh_from_db()
+    assert h_beta.quantidade_total == Decimal("3.00")
+
+
+def test_admin_desfaz_efeito_de_transacao_excluida_ou_editada(ledger):
+    _user, _alpha, h_alpha, _h_beta = ledger
+    model_admin = TransactionAdmin(Transaction, admin.site)
+
+    venda = Transaction.objects.get(holding=h_alpha, tipo="VENDA")
+    model_admin.delete_model(None, venda)
+    h_alpha.refresh_from_db()
+    assert h_alpha.quantidade_total == Decimal("7.00")
+
+    model_admin.delete_queryset(
+        None, Transaction.objects.filter(holding=h_alpha, data=date(2025, 11, 10))
+    )
+    h_alpha.refresh_from_db()
+    assert (h_alpha.quantidade_total, h_alpha.preco_medio) == (
+        Decimal("5.00"),
+        Decimal("10.00"),
+    )
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding, HoldingSnapshot
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from apps.transactions.services import ZERO, aplicar_movimento
+from apps.transactions.snapshots import atualizar_snapshots, estados_em
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+INICIO = date(2025, 3, 1)
+
+
+@pytest.fixture
+def cenario(db):
+    user = User.objects.create_user(username="junior_snap", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_JUNIOR, host="alpha"
+    )
+    portfolio = Portfolio.objects.create(nome="Snap", host="alpha", criado_por=user)
+    client = APIClient()
+    client.login(username="junior_snap", password="pass")
+    return user, portfolio, client
+
+
+def _holding(portfolio, ticker):
+    asset = Asset.objects.create(ticker=ticker, nome=ticker, tipo="ACAO")
+    return Holding.objects.create(portfolio=portfolio, asset=asset)
+
+
+def _lancar(user, holding, dia, tipo, quantidade, preco):
+    Transaction.objects.create(
+        holding=holding,
+        tipo=tipo,
+        quantidade=Decimal(quantidade),
+        preco=Decimal(preco),
+        data=INICIO + timedelta(days=dia),
+        criado_por=user,
+    )
+
+
+def _ledger(user, holding, dias):
+    for dia in dias:
+        _lancar(user, holding, dia, "COMPRA", "10.00", f"{10 + dia}.00")
+        if dia % 3 == 2:
+            _lancar(user, holding, dia, "VENDA", "4.00", f"{12 + dia}.00")
+
+
+def _replay(holding, ate):
+    estado = (ZERO, ZERO)
+    for tipo, quantidade, preco in (
+        Transaction.objects.filter(holding=holding, data__lte=ate)
+        .order_by("data", "id")
+        .values_list("tipo", "quantidade", "preco")
+    ):
+        estado = aplicar_movimento(*estado, tipo, quantidade, preco)
+    return estado
+
+
+def test_execucao_incremental_processa_so_as_transacoes_novas(cenario):
+    user, portfolio, _client = cenario
+    h1, h2 = _holding(portfolio, "SNP1"), _holding(portfolio, "SNP2")
+    _ledger(user, h1, range(6))
+    _ledger(user, h2, range(3))
+
+    primeira = atualizar_snapshots()
+    _lancar(user, h2, 10, "COMPRA", "1.00", "20.00")
+    segunda = atualizar_snapshots(tamanho_lote=1)
+    terceira = atualizar_snapshots()
+
+    assert primeira == {"transacoes": 12, "holdings": 2, "snapshots": 9}
+    assert segunda == {"transacoes": 1, "holdings": 1, "snapshots": 1}
+    assert terceira == {"transacoes": 0, "holdings": 0, "snapshots": 0}
+    ultimo = HoldingSnapshot.objects.filter(holding=h2).latest("data")
+    assert (ultimo.quantidade_total, ultimo.preco_medio) == _replay(h2, ultimo.data)
+    assert HoldingSnapshot.objects.filter(holding=h1).count() == 6
+
+
+def test_estado_na_data_bate_com_o_replay_do_ledger(cenario):
+    user, portfolio, _client = cenario
+    holdings = [_holding(portfolio, f"SNP{i}") for i in range(3)]
+    for indice, holding in enumerate(holdings):
+        _ledger(user, holding, range(indice, 12, indice + 1))
+    atualizar_snapshots()
+    # depois da execução: estado = snapshot + delta
+    _ledger(user, holdings[0], [14, 15])
+
+    for dia in range(-1, 17):
+        as_of = INICIO + timedelta(days=dia)
+        estados = estados_em([h.pk for h in holdings], as_of)
+        for holding in holdings:
+            holding.refresh_from_db()
+            esperado = _replay(holding, as_of)
+            atual = (holding.quantidade_total, holding.preco_medio)
+            assert estados.get(holding.pk, atual) == esperado
+
+
+def test_transacao_retroativa_e_refeita_do_ledger(cenario):
+    user, portfolio, _client = cenario
+    holding = _holding(portfolio, "SNP1")
+    _ledger(user, holding, range(0, 8))
+    atualizar_snapshots()
+
+    _lancar(user, holding, 1, "VENDA", "5.00", "30.00")
+    antes = estados_em([holding.pk], INICIO + timedelta(days=4))
+    resultado = atualizar_snapshots()
+    depois = estados_em([holding.pk], INICIO + timedelta(days=4))
+
+    assert antes[holding.pk] == _replay(holding, INICIO + timedelta(days=4))
+    assert depois == antes
+    assert resultado["snapshots"] == 7
+    for snapshot in HoldingSnapshot.objects.filter(holding=holding):
+        esperado = _replay(holding, snapshot.data)
+        assert (snapshot.quantidade_total, snapshot.preco_medio) == esperado
+
+
+def test_summary_e_holdings_com_as_of_mostram_a_posicao_na_data(cenario):
+    user, portfolio, client = cenario
+    antigo = _holding(portfolio, "SNP1")
+    _ledger(user, antigo, range(0, 6))
+    novo = _holding(portfolio, "SNP2")
+    _ledger(user, novo, [5])
+    atualizar_snapshots()
+    _ledger(user, antigo, [8])
+    as_of = INICIO + timedelta(days=3)
+    quantidade, preco_medio = _replay(antigo, as_of)
+
+    url = f"/api/portfolios/{portfolio.id}/summary/?as_of={as_of}"
+    resumo = client.get(url).json()
+    with CaptureQueriesContext(connection) as consultas:
+        lista = client.get(f"/api/holdings/?as_of={as_of}").json()["results"]
+    no_ledger = [q["sql"] for q in consultas if "transactions_transaction" in q["sql"]]
+    atual = client.get("/api/holdings/").json()["results"]
+    invalido = client.get("/api/holdings/?as_of=ontem")
+
+    assert [linha["asset"] for linha in resumo["holdings"]] == ["SNP1"]
+    assert Decimal(str(resumo["holdings"][0]["quantidade"])) == quantidade
+    assert Decimal(str(resumo["holdings"][0]["preco_medio"])) == preco_medio
+    assert [linha["id"] for linha in lista] == [antigo.pk]
+    assert Decimal(lista[0]["quantidade_total"]) == quantidade
+    assert Decimal(lista[0]["preco_medio"]) == preco_medio
+    assert len(atual) == 2
+    assert invalido.status_code == 400
+    # existência na data, holdings com transações depois dela e as duas
+    # buscas do delta
+    assert len(no_ledger) == 4
+
+
+def test_comando_de_snapshots(cenario):
+    user, portfolio, _client = cenario
+    _ledger(user, _holding(portfolio, "SNP1"), range(3))
+    saida = StringIO()
+
+    call_command("snapshot_holdings", "--chunk-size", "10", stdout=saida)
+    call_command("snapshot_holdings", "--completo", stdout=saida)
+
+    linhas = saida.getvalue().splitlines()
+    assert linhas[0].startswith("4 transações novas em 1 holdings; 3 snapshots")
+    assert linhas[1].startswith("4 transações novas em 1 holdings; 3 snapshots")
+    assert HoldingSnapshot.objects.count() == 3
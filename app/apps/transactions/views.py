@@ -1,39 +1,194 @@
+import csv
+import json
+
 from apps.portifolios.models import Portfolio
-from core.permissions import IsSeniorOrAdmin, ReadOnlyForJunior
+from core.exportacao import NegociacaoExportacao, exportar, formato_pedido
+from core.pagination import KeysetPaginacao
+from core.permissions import IsSeniorOrAdmin, ReadOnlyForJunior, perfil
+from core.shards import em_todos_os_bancos
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, permissions
+from rest_framework import exceptions, generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .serializers import TransactionCreateSerializer
+from . import idempotencia
+from .models import Transaction
+from .serializers import (
+    TransactionCreateSerializer,
+    TransactionFiltroSerializer,
+    TransactionLeitura,
+    TransactionSerializer,
+)
+from .services import importar_transacoes
 
+FORMATOS_CSV = ("text/csv",)
+FORMATOS_NDJSON = ("application/x-ndjson", "application/jsonl")
+
+
+class PortfolioEscopoMixin:
+    """Resolve o portfólio da URL respeitando o escopo por host do usuário."""
+
+    def get_portfolio(self):
+        portfolio_pk = self.kwargs.get("portfolio_pk") or self.kwargs.get("pk")
+        if not portfolio_pk:
+            return None
+        profile = perfil(getattr(self.request, "user", None))
+        qs = Portfolio.objects.all()
+        if profile is None:
+            scoped_qs = qs.none()
+        elif profile.role == profile.ROLE_ADMIN_SUPER:
+            scoped_qs = em_todos_os_bancos(qs)
+        else:
+            scoped_qs = qs.filter(host=profile.host)
+
+        portfolio = get_object_or_404(scoped_qs, pk=portfolio_pk)
+        self.check_object_permissions(self.request, portfolio)
+        return portfolio
 
-class TransactionCreateView(generics.CreateAPIView):
-    serializer_class = TransactionCreateSerializer
-    permission_classes = [
-        permissions.IsAuthenticated,
-        ReadOnlyForJunior,
-        IsSeniorOrAdmin,
-    ]
+
+class TransactionCreateView(PortfolioEscopoMixin, generics.ListCreateAPIView):
+    """Histórico (GET) e lançamento (POST) de transações de um portfólio.
+
+    A listagem vem da mais recente para a mais antiga, paginada por
+    `(data, id)`, e aceita `?data_inicio=`, `?data_fim=`, `?tipo=` e
+    `?asset=`. Juniores só leem; escrever exige senior do host ou admin.
+
+    Um POST com `Idempotency-Key` que repete uma chave já concluída devolve
+    a resposta guardada (`Idempotent-Replayed: true`) sem gravar de novo (ver
+    `idempotencia`).
+    """
+
+    pagination_class = KeysetPaginacao
+
+    def get_permissions(self):
+        classes = [permissions.IsAuthenticated, ReadOnlyForJunior]
+        if self.request.method not in permissions.SAFE_METHODS:
+            classes.append(IsSeniorOrAdmin)
+        return [permission() for permission in classes]
+
+    def get_serializer_class(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return TransactionSerializer
+        return TransactionCreateSerializer
+
+    def get_portfolio(self):
+        if not hasattr(self, "_portfolio"):
+            self._portfolio = super().get_portfolio()
+        return self._portfolio
+
+    def get_queryset(self):
+        filtros = TransactionFiltroSerializer(data=self.request.query_params)
+        return filtros.filtrar(
+            Transaction.objects.filter(holding__portfolio=self.get_portfolio())
+        )
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
-        portfolio_pk = self.kwargs.get("portfolio_pk") or self.kwargs.get("pk")
-        portfolio = None
-        if portfolio_pk:
-            user = getattr(self.request, "user", None)
-            profile = getattr(user, "profile", None)
-            qs = Portfolio.objects.all()
-            if profile is None:
-                scoped_qs = qs.none()
-            elif profile.role == profile.ROLE_ADMIN_SUPER:
-                scoped_qs = qs
-            else:
-                scoped_qs = qs.filter(host=profile.host)
-
-            portfolio = get_object_or_404(scoped_qs, pk=portfolio_pk)
-            self.check_object_permissions(self.request, portfolio)
+        if self.request.method in permissions.SAFE_METHODS:
+            return ctx
+        portfolio = self.get_portfolio()
         if portfolio is not None:
             ctx["portfolio"] = portfolio
         return ctx
 
+    def create(self, request, *args, **kwargs):
+        chave = idempotencia.chave_da_requisicao(request)
+        if chave is None:
+            return super().create(request, *args, **kwargs)
+        impressao = idempotencia.impressao(request)
+        guardada = idempotencia.buscar(request.user, chave, impressao)
+        if guardada is not None:
+            return Response(
+                guardada.resposta,
+                status=guardada.status,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        response = super().create(request, *args, **kwargs)
+        idempotencia.guardar(request.user, chave, impressao, response)
+        return response
+
     def perform_create(self, serializer):
         serializer.save()
+
+
+class TransactionExportView(APIView):
+    """Exporta (`?format=csv|ndjson`) todas as transações do escopo do usuário.
+
+    Admin exporta todos os hosts; os demais, só o próprio host. Aceita os
+    filtros do histórico (`?data_inicio=`, `?data_fim=`, `?tipo=`, `?asset=`)
+    e `?fields=`/`?expand=`.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, ReadOnlyForJunior]
+    content_negotiation_class = NegociacaoExportacao
+
+    def get(self, request, *args, **kwargs):
+        formato = formato_pedido(request)
+        leitura = TransactionLeitura(request)
+        profile = perfil(request.user)
+        qs = Transaction.objects.all()
+        if profile is None:
+            qs = qs.none()
+        elif profile.role == profile.ROLE_ADMIN_SUPER:
+            qs = em_todos_os_bancos(qs)
+        else:
+            qs = qs.filter(holding__portfolio__host=profile.host)
+        filtros = TransactionFiltroSerializer(data=request.query_params)
+        return exportar(leitura, filtros.filtrar(qs), formato, "transactions")
+
+
+def _linhas_csv(linhas):
+    leitor = csv.DictReader(linhas)
+    for dados in leitor:
+        yield leitor.line_num, dados
+
+
+def _linhas_ndjson(linhas):
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError as exc:
+            yield numero, ValueError(f"JSON inválido: {exc}")
+
+
+class TransactionBulkImportView(PortfolioEscopoMixin, APIView):
+    """Importa transações em lote a partir de um corpo CSV ou NDJSON.
+
+    O corpo é lido linha a linha direto da requisição (sem carregar tudo em
+    memória). O CSV deve ter cabeçalho com `asset,tipo,quantidade,preco,data`;
+    no NDJSON cada linha é um objeto com os mesmos campos. `?lote=` controla
+    quantas linhas são gravadas por vez.
+    """
+
+    permission_classes = [
+        permissions.IsAuthenticated,
+        ReadOnlyForJunior,
+        IsSeniorOrAdmin,
+    ]
+
+    def post(self, request, *args, **kwargs):
+        portfolio = self.get_portfolio()
+        content_type = (request.content_type or "").split(";")[0].strip()
+        linhas = (linha.decode("utf-8") for linha in request._request)
+        if content_type in FORMATOS_CSV:
+            registros = _linhas_csv(linhas)
+        elif content_type in FORMATOS_NDJSON:
+            registros = _linhas_ndjson(linhas)
+        else:
+            raise exceptions.UnsupportedMediaType(content_type)
+
+        try:
+            tamanho_lote = int(request.query_params.get("lote", 0)) or None
+        except ValueError:
+            tamanho_lote = -1
+        if tamanho_lote is not None and tamanho_lote < 1:
+            raise exceptions.ValidationError(
+                {"lote": "Deve ser um inteiro positivo."}
+            )
+
+        resultado = importar_transacoes(
+            portfolio, request.user, registros, tamanho_lote=tamanho_lote
+        )
+        return Response(resultado, status=status.HTTP_200_OK)
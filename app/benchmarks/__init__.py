@@ -0,0 +1,6 @@
+"""Benchmarks executados em processo contra um banco SQLite descartável.
+
+Cada módulo é executado a partir da pasta `app/`, por exemplo:
+
+    python -m benchmarks.paginacao --linhas 20000
+"""
@@ -0,0 +1,250 @@
+"""Benchmark de ponta a ponta dos caminhos quentes da API.
+
+    python -m benchmarks.api --hosts 20 --portfolios-por-host 50
+    python -m benchmarks.api --gravar-baseline     # atualiza o baseline
+    python -m benchmarks.api --saida resultado.json --limite 0.25
+
+Popula um banco SQLite descartável com `portfolio_seed --scale` e mede, para
+cada endpoint, vazão, latências p50/p95/p99 e consultas por requisição. As
+requisições passam pelo `WSGIHandler` (como num servidor, com sessão e CSRF)
+ou, com `--modo client`, pelo cliente de teste do Django; nada usa rede.
+
+O resultado é comparado com `benchmarks/baseline_api.json`: o processo
+termina com código 1 se o p50 de algum endpoint piorar mais que `--limite`
+(fração) ou se o número de consultas por requisição aumentar. O cache de
+respostas fica desligado (`DummyCache`) para medir o caminho até o banco.
+"""
+
+import argparse
+import json
+import sys
+import time
+from io import BytesIO, StringIO
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.comum import banco_descartavel, contar_consultas, resumir
+
+BASELINE = Path(__file__).with_name("baseline_api.json")
+CSRF = "benchmarkcsrfbenchmarkcsrf012345"
+
+
+class ClienteWSGI:
+    """Chama a aplicação WSGI diretamente, com o cookie de sessão dado."""
+
+    def __init__(self, sessionid):
+        from django.core.wsgi import get_wsgi_application
+
+        self.application = get_wsgi_application()
+        self.cookie = f"sessionid={sessionid}; csrftoken={CSRF}"
+
+    def _chamar(self, metodo, caminho, corpo=b""):
+        path, _, query = caminho.partition("?")
+        environ = {
+            "REQUEST_METHOD": metodo,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "HTTP_HOST": "testserver",
+            "HTTP_COOKIE": self.cookie,
+            "HTTP_X_CSRFTOKEN": CSRF,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(corpo)),
+            "wsgi.input": BytesIO(corpo),
+        }
+        setup_testing_defaults(environ)
+        status = []
+        resposta = self.application(environ, lambda s, h: status.append(s))
+        try:
+            b"".join(resposta)
+        finally:
+            getattr(resposta, "close", lambda: None)()
+        return int(status[0].split()[0])
+
+    def get(self, caminho):
+        return self._chamar("GET", caminho)
+
+    def post(self, caminho, dados):
+        return self._chamar("POST", caminho, json.dumps(dados).encode("utf-8"))
+
+
+class ClienteDeTeste:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, caminho):
+        return self.client.get(caminho).status_code
+
+    def post(self, caminho, dados):
+        return self.client.post(caminho, dados, format="json").status_code
+
+
+def _popular(args):
+    from django.core.management import call_command
+
+    call_command(
+        "portfolio_seed",
+        "--scale",
+        "--num-hosts",
+        str(args.hosts),
+        "--portfolios-per-host",
+        str(args.portfolios_por_host),
+        "--num-assets",
+        str(args.ativos),
+        "--holdings-per-portfolio",
+        str(args.holdings_por_portfolio),
+        "--transactions-per-portfolio",
+        str(args.transacoes_por_portfolio),
+        "--seed",
+        str(args.seed),
+        stdout=StringIO(),
+    )
+
+
+def _cenarios():
+    """`(nome, metodo, caminho, corpo)` de cada caminho medido."""
+    from apps.holdings.models import Holding
+    from apps.portifolios.models import Portfolio
+
+    portfolio = Portfolio.objects.filter(host="host0001").order_by("id").first()
+    holding = Holding.objects.filter(portfolio=portfolio).order_by("id").first()
+    compra = {
+        "asset": holding.asset_id,
+        "tipo": "COMPRA",
+        "quantidade": "1.00",
+        "preco": "10.00",
+        "data": "2025-11-11",
+    }
+    return [
+        ("portfolios_list", "GET", "/api/portfolios/", None),
+        ("portfolio_summary", "GET", f"/api/portfolios/{portfolio.id}/summary/", None),
+        ("holdings_list", "GET", "/api/holdings/", None),
+        ("assets_list", "GET", "/api/assets/", None),
+        (
+            "transaction_create",
+            "POST",
+            f"/api/portfolios/{portfolio.id}/transactions/",
+            compra,
+        ),
+    ]
+
+
+def _medir(cliente, metodo, caminho, corpo, repeticoes):
+    def chamar():
+        if metodo == "GET":
+            return cliente.get(caminho)
+        return cliente.post(caminho, corpo)
+
+    status = chamar()  # aquecimento
+    if status >= 400:
+        raise RuntimeError(f"{metodo} {caminho} respondeu {status}")
+    with contar_consultas() as consultas:
+        chamar()
+
+    duracoes = []
+    inicio_total = time.perf_counter()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        chamar()
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    total = time.perf_counter() - inicio_total
+    return {
+        **resumir(duracoes),
+        "req_por_s": repeticoes / total if total else 0.0,
+        "consultas": consultas.total,
+    }
+
+
+def executar(args):
+    from django.test import override_settings
+
+    caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    with banco_descartavel("api"), override_settings(CACHES=caches):
+        from rest_framework.test import APIClient
+
+        _popular(args)
+        client = APIClient()
+        client.login(username="senior_host0001", password="pass")
+        if args.modo == "wsgi":
+            cliente = ClienteWSGI(client.cookies["sessionid"].value)
+        else:
+            cliente = ClienteDeTeste(client)
+
+        return {
+            nome: _medir(cliente, metodo, caminho, corpo, args.repeticoes)
+            for nome, metodo, caminho, corpo in _cenarios()
+        }
+
+
+def regressoes(resultados, baseline, limite):
+    """Mensagens de regressão em relação ao baseline (lista vazia se ok)."""
+    mensagens = []
+    for nome, atual in resultados.items():
+        referencia = baseline.get(nome)
+        if referencia is None:
+            continue
+        if atual["consultas"] > referencia["consultas"]:
+            mensagens.append(
+                f"{nome}: {atual['consultas']} consultas por requisição "
+                f"(baseline {referencia['consultas']})"
+            )
+        if atual["p50_ms"] > referencia["p50_ms"] * (1 + limite):
+            mensagens.append(
+                f"{nome}: p50 {atual['p50_ms']:.2f} ms "
+                f"(baseline {referencia['p50_ms']:.2f} ms, limite +{limite:.0%})"
+            )
+    return mensagens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=10)
+    parser.add_argument("--portfolios-por-host", type=int, default=50)
+    parser.add_argument("--ativos", type=int, default=100)
+    parser.add_argument("--holdings-por-portfolio", type=int, default=5)
+    parser.add_argument("--transacoes-por-portfolio", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--modo", choices=["wsgi", "client"], default="wsgi")
+    parser.add_argument("--saida", type=Path, help="Grava o resultado em JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--limite",
+        type=float,
+        default=0.25,
+        help="Piora tolerada no p50 em relação ao baseline (padrão: 0.25)",
+    )
+    parser.add_argument(
+        "--gravar-baseline",
+        action="store_true",
+        help="Grava o resultado como novo baseline em vez de comparar",
+    )
+    args = parser.parse_args(argv)
+
+    resultados = executar(args)
+    print(f"{'endpoint':<20}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>6}")
+    for nome, r in resultados.items():
+        print(
+            f"{nome:<20}{r['req_por_s']:9.0f}{r['p50_ms']:9.2f}"
+            f"{r['p95_ms']:9.2f}{r['p99_ms']:9.2f}{r['consultas']:6d}"
+        )
+
+    if args.saida:
+        args.saida.write_text(json.dumps(resultados, indent=2) + "\n")
+    if args.gravar_baseline:
+        args.baseline.write_text(json.dumps(resultados, indent=2) + "\n")
+        print(f"baseline gravado em {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print("sem baseline para comparar")
+        return 0
+
+    mensagens = regressoes(
+        resultados, json.loads(args.baseline.read_text()), args.limite
+    )
+    for mensagem in mensagens:
+        print(f"REGRESSÃO {mensagem}")
+    return 1 if mensagens else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Latência de leitura: `ATOMIC_REQUESTS` vs. `TransacaoMiddleware`.
+
+    python -m benchmarks.atomicidade --repeticoes 500
+    python -m benchmarks.atomicidade --com-escritor
+
+"antes" liga `ATOMIC_REQUESTS` (todo GET abre BEGIN IMMEDIATE/COMMIT) e tira
+o `TransacaoMiddleware`; "depois" é a configuração atual, com leituras em
+autocommit. Com `--com-escritor` uma thread lança compras durante a medição,
+disputando a trava do SQLite com as leituras. O cache de respostas fica
+desligado.
+"""
+
+import argparse
+import threading
+import time
+from io import StringIO
+
+from benchmarks.comum import banco_descartavel, cronometrar, resumir
+
+MIDDLEWARE_TRANSACAO = "core.middleware.TransacaoMiddleware"
+
+
+def _escritor(user, url, compra, parar, escritas):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    try:
+        while not parar.is_set():
+            escritas.append(client.post(url, compra, format="json").status_code)
+    finally:
+        connection.close()
+
+
+def _medir_config(nome, user, caminhos, args):
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    antes = nome == "antes"
+    middleware = [
+        m for m in settings.MIDDLEWARE if not (antes and m == MIDDLEWARE_TRANSACAO)
+    ]
+    connection.settings_dict["ATOMIC_REQUESTS"] = antes
+    try:
+        with override_settings(MIDDLEWARE=middleware):
+            client = APIClient()
+            client.force_authenticate(user)
+            medidas = {}
+            for rotulo, caminho in caminhos.items():
+                client.get(caminho)  # aquecimento
+                medidas[rotulo] = resumir(
+                    cronometrar(lambda: client.get(caminho), args.repeticoes)
+                )
+    finally:
+        connection.settings_dict["ATOMIC_REQUESTS"] = False
+    return medidas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=300)
+    parser.add_argument("--com-escritor", action="store_true")
+    args = parser.parse_args(argv)
+
+    from django.test import override_settings
+
+    caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    with banco_descartavel("atomicidade"), override_settings(CACHES=caches):
+        from apps.holdings.models import Holding
+        from django.contrib.auth.models import User
+        from django.core.management import call_command
+
+        call_command(
+            "portfolio_seed",
+            "--scale",
+            "--num-hosts",
+            "2",
+            "--portfolios-per-host",
+            "50",
+            "--num-assets",
+            "50",
+            "--holdings-per-portfolio",
+            "10",
+            "--transactions-per-portfolio",
+            "100",
+            stdout=StringIO(),
+        )
+        user = User.objects.get(username="senior_host0001")
+        holding = Holding.objects.filter(portfolio__host="host0001").first()
+        portfolio = f"/api/portfolios/{holding.portfolio_id}/"
+        caminhos = {
+            "portfolios_list": "/api/portfolios/",
+            "portfolio_summary": portfolio + "summary/",
+            "holdings_list": "/api/holdings/",
+            "assets_list": "/api/assets/",
+        }
+        compra = {
+            "asset": holding.asset_id,
+            "tipo": "COMPRA",
+            "quantidade": "1.00",
+            "preco": "10.00",
+            "data": "2025-11-11",
+        }
+
+        resultados = {}
+        escritas: dict[str, list[int]] = {"antes": [], "depois": []}
+        duracoes: dict[str, float] = {}
+        for nome in ("antes", "depois"):
+            parar = threading.Event()
+            escritor = threading.Thread(
+                target=_escritor,
+                args=(user, portfolio + "transactions/", compra, parar, escritas[nome]),
+            )
+            if args.com_escritor:
+                escritor.start()
+            inicio = time.perf_counter()
+            try:
+                resultados[nome] = _medir_config(nome, user, caminhos, args)
+            finally:
+                duracoes[nome] = time.perf_counter() - inicio
+                parar.set()
+                if args.com_escritor:
+                    escritor.join()
+
+    titulo = " com escritor concorrente" if args.com_escritor else ""
+    print(f"Latência de leitura em ms{titulo} (p50 / p95)")
+    for rotulo in caminhos:
+        antes, depois = resultados["antes"][rotulo], resultados["depois"][rotulo]
+        print(
+            f"  {rotulo:<18} antes {antes['p50_ms']:6.2f} / {antes['p95_ms']:6.2f}"
+            f"   depois {depois['p50_ms']:6.2f} / {depois['p95_ms']:6.2f}"
+        )
+    if args.com_escritor:
+        print(
+            "  escritas/s: "
+            + ", ".join(
+                f"{nome} {len(escritas[nome]) / duracoes[nome]:.0f}"
+                for nome in ("antes", "depois")
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Marcação a mercado de um host com 100 mil holdings.
+
+    python -m benchmarks.avaliacao --portfolios 1000 --holdings-por-portfolio 100
+
+Popula um host com `portfolio_seed --scale` e um ano de cotações diárias para
+cada ativo, e compara `resumos_do_host(as_of=...)` (última cotação por
+subquery, numa consulta só) com a abordagem ingênua de buscar a cotação de
+cada holding separadamente. A ingênua roda numa amostra e é extrapolada.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from benchmarks.comum import banco_descartavel, contar_consultas
+
+DIAS_DE_COTACAO = 365
+
+
+def _popular(args):
+    from apps.assets.models import Asset, PriceQuote
+    from django.core.management import call_command
+
+    call_command(
+        "portfolio_seed",
+        "--scale",
+        "--num-hosts",
+        "1",
+        "--portfolios-per-host",
+        str(args.portfolios),
+        "--num-assets",
+        str(args.ativos),
+        "--holdings-per-portfolio",
+        str(args.holdings_por_portfolio),
+        "--transactions-per-portfolio",
+        str(args.holdings_por_portfolio),
+        stdout=StringIO(),
+    )
+    inicio = date(2024, 1, 1)
+    for asset_id in Asset.objects.values_list("id", flat=True):
+        PriceQuote.objects.bulk_create(
+            PriceQuote(
+                asset_id=asset_id,
+                data=inicio + timedelta(days=dia),
+                fechamento=Decimal(1000 + (asset_id * 7 + dia) % 9000) / 100,
+            )
+            for dia in range(DIAS_DE_COTACAO)
+        )
+    return inicio + timedelta(days=DIAS_DE_COTACAO // 2)
+
+
+def _ingenua(as_of, amostra):
+    """Uma consulta de cotação por holding."""
+    from apps.assets.models import PriceQuote
+    from apps.holdings.models import Holding
+
+    total = Decimal(0)
+    for holding in Holding.objects.filter(portfolio__host="host0001")[:amostra]:
+        cotacao = (
+            PriceQuote.objects.filter(asset_id=holding.asset_id, data__lte=as_of)
+            .order_by("-data")
+            .first()
+        )
+        if cotacao is not None:
+            total += holding.quantidade_total * cotacao.fechamento
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--portfolios", type=int, default=1000)
+    parser.add_argument("--holdings-por-portfolio", type=int, default=100)
+    parser.add_argument("--ativos", type=int, default=500)
+    parser.add_argument("--amostra-ingenua", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("avaliacao"):
+        from apps.holdings.models import Holding
+        from apps.portifolios.services import resumos_do_host
+
+        as_of = _popular(args)
+        holdings = Holding.objects.count()
+
+        with contar_consultas() as consultas:
+            inicio = time.perf_counter()
+            resumos = list(resumos_do_host("host0001", as_of=as_of))
+            duracao = time.perf_counter() - inicio
+        valor = sum(r["totais"]["valor_mercado"] for _pk, r in resumos)
+
+        amostra = min(args.amostra_ingenua, holdings)
+        inicio = time.perf_counter()
+        _ingenua(as_of, amostra)
+        duracao_ingenua = (time.perf_counter() - inicio) * holdings / amostra
+
+    print(f"{holdings} holdings em {len(resumos)} portfólios, as_of {as_of}")
+    print(
+        f"  uma consulta   {duracao:7.2f}s  {holdings / duracao:8.0f} holdings/s  "
+        f"{consultas.total} consultas  (valor de mercado {valor:.2f})"
+    )
+    print(
+        f"  por holding    {duracao_ingenua:7.2f}s  "
+        f"{holdings / duracao_ingenua:8.0f} holdings/s  {holdings + 1} consultas "
+        f"(extrapolado de {amostra})"
+    )
+
+
+if __name__ == "__main__":
+    main()
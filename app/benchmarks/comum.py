@@ -0,0 +1,102 @@
+"""Infraestrutura compartilhada pelos benchmarks."""
+
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def configurar_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def banco_descartavel(nome="benchmark"):
+    """Cria (e remove ao final) um banco SQLite migrado só para o benchmark.
+
+    O banco de desenvolvimento (`db.sqlite3`) nunca é tocado.
+    """
+    configurar_django()
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    with tempfile.TemporaryDirectory() as pasta:
+        connection.settings_dict["TEST"]["NAME"] = str(Path(pasta) / f"{nome}.sqlite3")
+        setup_test_environment()
+        nome_original = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa `funcao` `repeticoes` vezes e devolve as durações em ms."""
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    return duracoes
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def resumir(duracoes):
+    return {
+        "media_ms": statistics.fmean(duracoes) if duracoes else 0.0,
+        "p50_ms": percentil(duracoes, 50),
+        "p95_ms": percentil(duracoes, 95),
+        "p99_ms": percentil(duracoes, 99),
+    }
+
+
+def usuario_de_benchmark(username="bench_admin", role="ADMIN_SUPER", host=""):
+    from apps.accounts.models import UserProfile
+    from django.contrib.auth.models import User
+
+    user = User.objects.create_user(username=username, password="pass")
+    UserProfile.objects.filter(user=user).update(role=role, host=host)
+    return User.objects.get(pk=user.pk)
+
+
+class ContadorDeConsultas:
+    """`execute_wrapper` que só conta as consultas executadas."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def contar_consultas():
+    """Conta consultas sem depender do log de `connection.queries`.
+
+    O log é zerado a cada `request_started`, então não serve para medir uma
+    requisição inteira de fora do handler.
+    """
+    from django.db import connection
+
+    contador = ContadorDeConsultas()
+    with connection.execute_wrapper(contador):
+        yield contador
@@ -0,0 +1,94 @@
+"""Ingestão de cotações com `import_quotes`.
+
+    python -m benchmarks.cotacoes --tickers 2000 --anos 10
+
+Gera um CSV de cotações diárias (252 pregões por ano) num diretório
+temporário, importa-o num banco descartável e importa de novo o mesmo
+arquivo (reexecução idempotente, todas as linhas viram UPDATE). Mostra
+linhas por segundo de cada passada.
+"""
+
+import argparse
+import csv
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.comum import banco_descartavel
+
+PREGOES_POR_ANO = 252
+
+
+def _dias_uteis(inicio, quantidade):
+    dia = inicio
+    while quantidade:
+        if dia.weekday() < 5:
+            yield dia
+            quantidade -= 1
+        dia += timedelta(days=1)
+
+
+def _gerar_csv(caminho, tickers, dias):
+    rng = random.Random(42)
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(
+            ["ticker", "data", "fechamento", "abertura", "maxima", "minima"]
+        )
+        precos = {ticker: 10 + rng.random() * 90 for ticker in tickers}
+        for dia in dias:
+            texto = dia.isoformat()
+            for ticker in tickers:
+                abertura = precos[ticker]
+                fechamento = max(0.01, abertura * (1 + rng.gauss(0, 0.02)))
+                precos[ticker] = fechamento
+                escritor.writerow(
+                    [
+                        ticker,
+                        texto,
+                        f"{fechamento:.4f}",
+                        f"{abertura:.4f}",
+                        f"{max(abertura, fechamento) * 1.01:.4f}",
+                        f"{min(abertura, fechamento) * 0.99:.4f}",
+                    ]
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    dias = list(_dias_uteis(date(2015, 1, 1), args.anos * PREGOES_POR_ANO))
+    linhas = len(tickers) * len(dias)
+
+    with tempfile.TemporaryDirectory() as pasta, banco_descartavel("cotacoes"):
+        from apps.assets.models import Asset
+        from django.core.management import call_command
+
+        caminho = Path(pasta) / "cotacoes.csv"
+        inicio = time.perf_counter()
+        _gerar_csv(caminho, tickers, dias)
+        print(
+            f"CSV com {linhas} linhas gerado em {time.perf_counter() - inicio:.1f}s "
+            f"({caminho.stat().st_size / 2**20:.0f} MiB)"
+        )
+        Asset.objects.bulk_create(
+            Asset(ticker=ticker, nome=ticker, tipo="ACAO") for ticker in tickers
+        )
+        opcoes = {"chunk_size": args.chunk_size} if args.chunk_size else {}
+        for passada in ("primeira carga", "reimportação"):
+            inicio = time.perf_counter()
+            call_command("import_quotes", str(caminho), stdout=StringIO(), **opcoes)
+            duracao = time.perf_counter() - inicio
+            print(f"  {passada:<15} {duracao:7.1f}s  {linhas / duracao:9.0f} linhas/s")
+
+
+if __name__ == "__main__":
+    main()
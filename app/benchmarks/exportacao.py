@@ -0,0 +1,139 @@
+"""Pico de memória (RSS) da exportação em streaming de transações.
+
+    python -m benchmarks.exportacao --linhas 10000 1000000 --formato ndjson
+
+Para cada tamanho, popula um banco descartável e mede a exportação completa
+(`/api/transactions/export/`) num processo novo, que só lê o corpo e o
+descarta. O pico de RSS do processo (`VmHWM`; `ru_maxrss` fora do Linux)
+deve ficar no mesmo patamar qualquer que seja o número de linhas.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.comum import banco_descartavel, configurar_django
+
+LOTE_INSERCAO = 20_000
+
+
+def _popular(linhas):
+    from apps.assets.models import Asset
+    from apps.holdings.models import Holding
+    from apps.portifolios.models import Portfolio
+    from apps.transactions.models import Transaction
+
+    from benchmarks.comum import usuario_de_benchmark
+
+    user = usuario_de_benchmark()
+    portfolio = Portfolio.objects.create(nome="Export", host="alpha", criado_por=user)
+    ativos = Asset.objects.bulk_create(
+        Asset(ticker=f"X{i}", nome=f"Export {i}", tipo="ACAO") for i in range(100)
+    )
+    holdings = Holding.objects.bulk_create(
+        Holding(portfolio=portfolio, asset=ativo) for ativo in ativos
+    )
+    inicio = date(2020, 1, 1)
+    for base in range(0, linhas, LOTE_INSERCAO):
+        Transaction.objects.bulk_create(
+            Transaction(
+                holding=holdings[i % len(holdings)],
+                tipo="COMPRA",
+                quantidade=Decimal(i % 500 + 1),
+                preco=Decimal(i % 20000 + 100) / 100,
+                data=inicio + timedelta(days=i % 2000),
+                criado_por=user,
+            )
+            for i in range(base, min(base + LOTE_INSERCAO, linhas))
+        )
+    return user.username
+
+
+def _pico_rss_kb():
+    # ru_maxrss sobrevive ao exec e traria o pico do processo pai
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _medir(banco, username, formato):
+    """Executado no processo filho: exporta tudo e devolve as medidas."""
+    configurar_django()
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+
+    setup_test_environment()
+    connection.settings_dict["NAME"] = banco
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username=username))
+    rss_inicial = _pico_rss_kb()
+    inicio = time.perf_counter()
+    resp = client.get(f"/api/transactions/export/?format={formato}")
+    assert resp.status_code == 200, resp.status_code
+    tamanho = sum(len(pedaco) for pedaco in resp.streaming_content)
+    return {
+        "segundos": time.perf_counter() - inicio,
+        "bytes": tamanho,
+        "rss_inicial_kb": rss_inicial,
+        "rss_pico_kb": _pico_rss_kb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--formato", choices=["csv", "ndjson"], default="ndjson")
+    parser.add_argument("--medir", nargs=2, metavar=("BANCO", "USUARIO"))
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(_medir(*args.medir, args.formato)))
+        return
+
+    resultados = {}
+    for linhas in args.linhas:
+        with banco_descartavel(f"exportacao_{linhas}") as connection:
+            username = _popular(linhas)
+            banco = connection.settings_dict["NAME"]
+            filho = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.exportacao",
+                    "--formato",
+                    args.formato,
+                    "--medir",
+                    str(banco),
+                    username,
+                ],
+                cwd=Path(__file__).resolve().parent.parent,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            resultados[linhas] = json.loads(filho.stdout)
+
+    print(f"Exportação {args.formato} de transações")
+    for linhas, r in resultados.items():
+        print(
+            f"  {linhas:>9} linhas: {r['bytes'] / 2**20:8.1f} MiB em "
+            f"{r['segundos']:6.1f}s, RSS {r['rss_inicial_kb'] / 1024:6.1f} -> "
+            f"{r['rss_pico_kb'] / 1024:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
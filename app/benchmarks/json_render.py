@@ -0,0 +1,97 @@
+"""Renderização JSON de uma lista de 10 mil holdings.
+
+    python -m benchmarks.json_render --holdings 10000 --repeticoes 20
+
+Compara o `JSONRenderer` do DRF com o `JSONRapidoRenderer` (com `orjson` e no
+fallback da biblioteca padrão) em dois formatos: a saída do
+`HoldingSerializer` (Decimais já como texto) e linhas cruas com `Decimal` e
+UUID, como as do `summary`. Só o passo de renderização é medido.
+"""
+
+import argparse
+
+from benchmarks.comum import banco_descartavel, cronometrar, resumir
+
+
+def _popular(quantidade):
+    from apps.assets.models import Asset
+    from apps.holdings.models import Holding
+    from apps.portifolios.models import Portfolio
+
+    from benchmarks.comum import usuario_de_benchmark
+
+    user = usuario_de_benchmark()
+    portfolios = Portfolio.objects.bulk_create(
+        Portfolio(nome=f"Json {i}", host="alpha", criado_por=user)
+        for i in range(quantidade // 100 + 1)
+    )
+    ativos = Asset.objects.bulk_create(
+        Asset(ticker=f"J{i}", nome=f"Json {i}", tipo="ACAO") for i in range(100)
+    )
+    Holding.objects.bulk_create(
+        (
+            Holding(
+                portfolio=portfolios[i // 100],
+                asset=ativos[i % 100],
+                quantidade_total=i % 997 + 1,
+                preco_medio=f"{i % 5000 + 1}.{i % 100:02d}",
+            )
+            for i in range(quantidade)
+        ),
+        batch_size=2000,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holdings", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("json_render"):
+        from apps.holdings.models import Holding
+        from apps.holdings.serializers import HoldingSerializer
+        from core.renderers import JSONRapidoRenderer
+        from django.test import override_settings
+        from rest_framework.renderers import JSONRenderer
+
+        _popular(args.holdings)
+        holdings = Holding.objects.select_related("asset", "portfolio")
+        cargas = {
+            "serializer": list(HoldingSerializer(holdings, many=True).data),
+            "valores crus": list(
+                holdings.values(
+                    "id",
+                    "portfolio_id",
+                    "asset__ticker",
+                    "quantidade_total",
+                    "preco_medio",
+                )
+            ),
+        }
+
+        resultados = {}
+        for nome, dados in cargas.items():
+            esperado = JSONRenderer().render(dados)
+            for rotulo, renderer, acelerado in (
+                ("DRF JSONRenderer", JSONRenderer(), True),
+                ("rápido (orjson)", JSONRapidoRenderer(), True),
+                ("rápido (stdlib)", JSONRapidoRenderer(), False),
+            ):
+                with override_settings(JSON_ACELERADO=acelerado):
+                    assert renderer.render(dados) == esperado, rotulo
+                    resultados[(nome, rotulo)] = resumir(
+                        cronometrar(lambda: renderer.render(dados), args.repeticoes)
+                    )
+
+    print(f"{args.holdings} holdings, p50 em ms")
+    for (nome, rotulo), resumo in resultados.items():
+        base = resultados[(nome, "DRF JSONRenderer")]["p50_ms"]
+        print(
+            f"  {nome:<13} {rotulo:<17} {resumo['p50_ms']:8.2f}"
+            f"  ({base / resumo['p50_ms']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
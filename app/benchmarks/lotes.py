@@ -0,0 +1,120 @@
+"""Resultado realizado por portfólio e período: agregado vs. replay do ledger.
+
+    python -m benchmarks.lotes --portfolios 50 --transacoes-por-portfolio 2000
+
+Popula um host com `portfolio_seed --scale` (que já grava lotes e
+realizações) e compara `resultado_realizado` de cada portfólio num semestre
+(uma consulta pelo índice `(portfolio, data)`) com o cálculo de relatório
+que havia antes: ler o ledger inteiro do portfólio e casar vendas com lotes
+em Python. Mede também `reconstruir_lotes` do host.
+"""
+
+import argparse
+import time
+from collections import deque
+from datetime import date
+from io import StringIO
+
+from benchmarks.comum import banco_descartavel, cronometrar, resumir
+
+INICIO = date(2020, 4, 1)
+FIM = date(2020, 9, 30)
+
+
+def _pelo_ledger(portfolio_id):
+    """FIFO refeito do ledger do portfólio a cada consulta."""
+    from apps.transactions.models import Transaction
+
+    resultado = 0
+    abertos: dict[int, deque] = {}
+    for holding_id, tipo, quantidade, preco, data in (
+        Transaction.objects.filter(holding__portfolio_id=portfolio_id)
+        .order_by("holding_id", "data", "id")
+        .values_list("holding_id", "tipo", "quantidade", "preco", "data")
+    ):
+        fila = abertos.setdefault(holding_id, deque())
+        if tipo == "COMPRA":
+            fila.append([quantidade, preco])
+            continue
+        while quantidade > 0 and fila:
+            consumida = min(quantidade, fila[0][0])
+            if INICIO <= data <= FIM:
+                resultado += consumida * (preco - fila[0][1])
+            fila[0][0] -= consumida
+            quantidade -= consumida
+            if not fila[0][0]:
+                fila.popleft()
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--portfolios", type=int, default=50)
+    parser.add_argument("--holdings-por-portfolio", type=int, default=20)
+    parser.add_argument("--transacoes-por-portfolio", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("lotes"):
+        from apps.portifolios.models import Portfolio
+        from apps.portifolios.services import resultado_realizado
+        from apps.transactions.models import Transaction
+        from apps.transactions.services import reconstruir_lotes
+        from django.core.management import call_command
+
+        inicio = time.perf_counter()
+        call_command(
+            "portfolio_seed",
+            "--scale",
+            "--num-hosts",
+            "1",
+            "--portfolios-per-host",
+            str(args.portfolios),
+            "--num-assets",
+            str(args.holdings_por_portfolio * 2),
+            "--holdings-per-portfolio",
+            str(args.holdings_por_portfolio),
+            "--transactions-per-portfolio",
+            str(args.transacoes_por_portfolio),
+            stdout=StringIO(),
+        )
+        duracao_seed = time.perf_counter() - inicio
+        portfolios = list(Portfolio.objects.all())
+        transacoes = Transaction.objects.count()
+
+        for portfolio in portfolios[:5]:
+            agregado = resultado_realizado(portfolio, INICIO, FIM)["resultado"]
+            # o SQLite soma decimais como REAL
+            assert round(agregado, 2) == round(_pelo_ledger(portfolio.pk), 2)
+
+        def agregar():
+            for portfolio in portfolios:
+                resultado_realizado(portfolio, INICIO, FIM)
+
+        def refazer():
+            for portfolio in portfolios:
+                _pelo_ledger(portfolio.pk)
+
+        com_lotes = resumir(cronometrar(agregar, args.repeticoes))
+        pelo_ledger = resumir(cronometrar(refazer, args.repeticoes))
+
+        inicio = time.perf_counter()
+        reconstrucao = reconstruir_lotes(host="host0001")
+        duracao_reconstrucao = time.perf_counter() - inicio
+
+    n = len(portfolios)
+    print(
+        f"{n} portfólios, {transacoes} transações; período {INICIO} a {FIM} "
+        f"(seed com lotes em {duracao_seed:.1f}s)"
+    )
+    print(f"  agregado de RealizedGain  {com_lotes['p50_ms'] / n:8.2f} ms/portfólio")
+    print(f"  replay do ledger          {pelo_ledger['p50_ms'] / n:8.2f} ms/portfólio")
+    print(
+        f"  reconstruir_lotes do host {duracao_reconstrucao:.2f}s "
+        f"({reconstrucao['transacoes'] / duracao_reconstrucao:.0f} transações/s, "
+        f"{reconstrucao['realizacoes']} realizações)"
+    )
+
+
+if __name__ == "__main__":
+    main()
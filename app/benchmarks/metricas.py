@@ -0,0 +1,71 @@
+"""Custo do `MetricasMiddleware` na listagem de portfólios.
+
+    python -m benchmarks.metricas --portfolios 200 --repeticoes 2000
+
+As duas configurações (com e sem o middleware) são medidas em rodadas
+alternadas para que variações da máquina afetem as duas igualmente.
+"""
+
+import argparse
+
+from benchmarks.comum import (
+    banco_descartavel,
+    cronometrar,
+    resumir,
+    usuario_de_benchmark,
+)
+
+MIDDLEWARE_METRICAS = "core.middleware.MetricasMiddleware"
+
+
+def _cliente(user, middleware):
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    with override_settings(MIDDLEWARE=middleware):
+        client = APIClient()
+        client.force_authenticate(user)
+        client.get("/api/portfolios/")  # carrega a cadeia de middlewares
+    return client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--portfolios", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    parser.add_argument("--rodadas", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("metricas"):
+        from apps.portifolios.models import Portfolio
+        from django.conf import settings
+
+        user = usuario_de_benchmark()
+        Portfolio.objects.bulk_create(
+            Portfolio(nome=f"Bench {i}", host=f"h{i % 10}", criado_por=user)
+            for i in range(args.portfolios)
+        )
+        com = list(settings.MIDDLEWARE)
+        sem = [m for m in com if m != MIDDLEWARE_METRICAS]
+        clientes = {"sem": _cliente(user, sem), "com": _cliente(user, com)}
+
+        duracoes: dict[str, list[float]] = {"sem": [], "com": []}
+        por_rodada = max(1, args.repeticoes // args.rodadas)
+        for _ in range(args.rodadas):
+            for nome, client in clientes.items():
+                duracoes[nome] += cronometrar(
+                    lambda: client.get("/api/portfolios/"), por_rodada
+                )
+
+    resumos = {nome: resumir(valores) for nome, valores in duracoes.items()}
+    for nome, resumo in resumos.items():
+        print(
+            f"{nome} middleware: media {resumo['media_ms']:.3f} ms, "
+            f"p50 {resumo['p50_ms']:.3f} ms, p95 {resumo['p95_ms']:.3f} ms"
+        )
+    overhead = resumos["com"]["p50_ms"] / resumos["sem"]["p50_ms"] - 1
+    print(f"overhead (p50): {overhead:+.2%}")
+
+
+if __name__ == "__main__":
+    main()
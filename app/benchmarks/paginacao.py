@@ -0,0 +1,113 @@
+"""Custo de uma página em função da posição: cursor vs. número de página.
+
+    python -m benchmarks.paginacao --linhas 200000 --paginas 1 2 1000 19000
+
+Com cursor a consulta é sempre `WHERE id > ? ORDER BY id LIMIT n`; com número
+de página ela usa `OFFSET` e ainda faz um `COUNT(*)` por requisição.
+"""
+
+import argparse
+
+from benchmarks.comum import (
+    banco_descartavel,
+    cronometrar,
+    resumir,
+    usuario_de_benchmark,
+)
+
+
+def _popular(linhas):
+    from apps.assets.models import Asset
+
+    Asset.objects.bulk_create(
+        (
+            Asset(ticker=f"P{i}", nome=f"Paginacao {i}", tipo="ACAO")
+            for i in range(linhas)
+        ),
+        batch_size=2000,
+    )
+
+
+def _url_do_cursor(pagina, tamanho):
+    """URL da página `pagina` (1-based), como se o cliente seguisse `next`."""
+    from apps.assets.models import Asset
+    from core.pagination import CursorPaginacao
+    from rest_framework.pagination import Cursor
+
+    if pagina == 1:
+        return "/api/assets/"
+    anterior = (
+        Asset.objects.order_by("id")
+        .values_list("id", flat=True)[(pagina - 1) * tamanho - 1]
+    )
+    paginador = CursorPaginacao()
+    paginador.base_url = "/api/assets/"
+    return paginador.encode_cursor(
+        Cursor(offset=0, reverse=False, position=str(anterior))
+    )
+
+
+def _medir(client, url, repeticoes):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client.get(url)  # aquecimento
+    with CaptureQueriesContext(connection) as consultas:
+        client.get(url)
+    # lido antes das próximas requisições: request_started zera o log
+    total_consultas = len(consultas)
+    resumo = resumir(cronometrar(lambda: client.get(url), repeticoes))
+    resumo["consultas"] = total_consultas
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument(
+        "--paginas", type=int, nargs="+", default=[1, 2, 1000, 19_000]
+    )
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("paginacao"):
+        from apps.assets.views import AssetViewSet
+        from django.conf import settings
+        from rest_framework.pagination import PageNumberPagination
+        from rest_framework.test import APIClient
+
+        tamanho = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        _popular(args.linhas)
+        client = APIClient()
+        client.force_authenticate(usuario_de_benchmark())
+
+        resultados = {
+            "cursor": [
+                _medir(client, _url_do_cursor(pagina, tamanho), args.repeticoes)
+                for pagina in args.paginas
+            ]
+        }
+
+        original = AssetViewSet.pagination_class
+        AssetViewSet.pagination_class = PageNumberPagination
+        try:
+            resultados["numero de pagina"] = [
+                _medir(client, f"/api/assets/?page={pagina}", args.repeticoes)
+                for pagina in args.paginas
+            ]
+        finally:
+            AssetViewSet.pagination_class = original
+
+    print(f"{args.linhas} ativos, p50 em ms (consultas por requisição)")
+    print(" " * 18 + "".join(f"página {pagina:<9}" for pagina in args.paginas))
+    for nome, medidas in resultados.items():
+        print(
+            f"  {nome:<16}"
+            + "".join(
+                f"{m['p50_ms']:7.2f} ({m['consultas']})  " for m in medidas
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Último preço por ativo: LRU do processo contra consulta ao banco.
+
+    python -m benchmarks.precos --ativos 2000 --dias 250 --lote 100
+
+Popula `--ativos` ativos com `--dias` cotações cada e mede lotes aleatórios de
+`--lote` ativos (como um resumo de portfólio) resolvidos por
+`ultimos_precos` (LRU já carregado) e pela subquery de última cotação.
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.comum import banco_descartavel, contar_consultas, cronometrar, resumir
+
+
+def _popular(ativos, dias):
+    from apps.assets.models import Asset, PriceQuote
+
+    Asset.objects.bulk_create(
+        Asset(ticker=f"P{i:05d}", nome=f"Ativo {i}", tipo="ACAO") for i in range(ativos)
+    )
+    inicio = date(2024, 1, 1)
+    for asset_id in Asset.objects.values_list("id", flat=True):
+        PriceQuote.objects.bulk_create(
+            PriceQuote(
+                asset_id=asset_id,
+                data=inicio + timedelta(days=dia),
+                fechamento=Decimal(1000 + (asset_id * 7 + dia) % 9000) / 100,
+            )
+            for dia in range(dias)
+        )
+    return list(Asset.objects.values_list("id", flat=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ativos", type=int, default=2000)
+    parser.add_argument("--dias", type=int, default=250)
+    parser.add_argument("--lote", type=int, default=100)
+    parser.add_argument("--repeticoes", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("precos"):
+        from apps.assets import precos
+
+        ids = _popular(args.ativos, args.dias)
+        sorteio = random.Random(42)
+        lotes = [sorteio.sample(ids, args.lote) for _ in range(args.repeticoes)]
+
+        precos.ultimos_precos(ids[:1])
+        lotes_lru = iter(lotes)
+        with contar_consultas() as consultas_lru:
+            lru = cronometrar(
+                lambda: precos.ultimos_precos(next(lotes_lru)), args.repeticoes
+            )
+        lotes_banco = iter(lotes)
+        with contar_consultas() as consultas_banco:
+            banco = cronometrar(
+                lambda: precos._do_banco(next(lotes_banco)), args.repeticoes
+            )
+
+    print(f"{args.ativos} ativos x {args.dias} cotações, lotes de {args.lote}")
+    for nome, duracoes, consultas in (
+        ("LRU", lru, consultas_lru),
+        ("banco", banco, consultas_banco),
+    ):
+        r = resumir(duracoes)
+        print(
+            f"  {nome:6} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  "
+            f"{consultas.total} consultas"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Leituras em paralelo com um escritor: só o primário vs. réplica de leitura.
+
+    python -m benchmarks.replica --leitores 8 --segundos 5 --intervalo 1
+
+Os leitores pedem o histórico de transações de um portfólio e o escritor
+importa lotes de `--lote` compras nesse mesmo portfólio, pelo cliente de
+teste. Cada um é um processo (como os workers de um servidor WSGI, sem
+disputar o GIL) e fecha as conexões a cada requisição, como com
+`CONN_MAX_AGE=0`. Na rodada com réplica, uma thread copia o banco para o
+arquivo da réplica a cada `--intervalo` segundos (`copy_replica`). O cache
+de respostas fica desligado.
+
+A réplica tira dos leitores a espera pelas travas do escritor; com um único
+núcleo o tempo de CPU domina e as duas rodadas empatam.
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from urllib.parse import quote
+
+from benchmarks.comum import banco_descartavel, configurar_django, resumir
+
+
+def _trabalhador(user, chamar, ate, saida):
+    from django.db import OperationalError, connections
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    medidas: list[float] = []
+    erros: list[int] = []
+    try:
+        while time.perf_counter() < ate:
+            inicio = time.perf_counter()
+            try:
+                status = chamar(client)
+            except OperationalError:
+                status = 500
+            finally:
+                connections.close_all()
+            if status >= 500:
+                erros.append(status)
+                continue
+            medidas.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        connections.close_all()
+        saida.put((chamar.__name__, medidas, len(erros)))
+
+
+def _copiador(arquivo, intervalo, ate, copias):
+    from core.replicas import copiar
+    from django.db import connection
+
+    origem = connection.settings_dict["NAME"]
+    while time.perf_counter() < ate:
+        copiar(origem, arquivo)
+        copias.append(time.perf_counter())
+        time.sleep(intervalo)
+
+
+def _rodada(nome, com_replica, args):
+    from django.db import connection, connections
+    from django.test import override_settings
+
+    caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    connection.close()
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = Path(pasta) / "replica.sqlite3"
+        replica = "replica" if com_replica else ""
+        with override_settings(
+            CACHES=caches, REPLICA_DB=replica, REPLICA_ARQUIVO=arquivo
+        ), banco_descartavel(f"replica_{nome}"):
+            from apps.holdings.models import Holding
+            from core.replicas import copiar
+            from django.contrib.auth.models import User
+            from django.core.management import call_command
+
+            call_command(
+                "portfolio_seed",
+                "--scale",
+                "--num-hosts",
+                "1",
+                "--portfolios-per-host",
+                "20",
+                "--num-assets",
+                "50",
+                "--holdings-per-portfolio",
+                "20",
+                "--transactions-per-portfolio",
+                "200",
+                stdout=StringIO(),
+            )
+            if com_replica:
+                copiar(connection.settings_dict["NAME"], arquivo)
+                connections.settings["replica"] = {
+                    **connections.settings["default"],
+                    "NAME": f"file:{quote(str(arquivo))}?mode=ro",
+                    "OPTIONS": {"timeout": 20},
+                }
+            user = User.objects.get(username="senior_host0001")
+            holding = Holding.objects.order_by("id").first()
+            url = f"/api/portfolios/{holding.portfolio_id}/transactions/"
+            corpo = "asset,tipo,quantidade,preco,data\n" + (
+                f"{holding.asset_id},COMPRA,1.00,10.00,2025-11-11\n" * args.lote
+            )
+
+            def ler(client):
+                return client.get(url + "?page_size=50").status_code
+
+            def escrever(client):
+                return client.post(
+                    url + "bulk/", corpo, content_type="text/csv"
+                ).status_code
+
+            medidas: dict = {"ler": [], "escrever": []}
+            erros = 0
+            copias: list[float] = []
+            connections.close_all()
+            contexto = multiprocessing.get_context("fork")
+            saida = contexto.Queue()
+            ate = time.perf_counter() + args.segundos
+            processos = [
+                contexto.Process(target=_trabalhador, args=(user, ler, ate, saida))
+                for _ in range(args.leitores)
+            ]
+            processos.append(
+                contexto.Process(target=_trabalhador, args=(user, escrever, ate, saida))
+            )
+            copiador = threading.Thread(
+                target=_copiador, args=(arquivo, args.intervalo, ate, copias)
+            )
+            for processo in processos:
+                processo.start()
+            if com_replica:
+                copiador.start()
+            for _ in processos:
+                funcao, duracoes, falhas = saida.get()
+                medidas[funcao].extend(duracoes)
+                erros += falhas
+            for processo in processos:
+                processo.join()
+            if com_replica:
+                copiador.join()
+            connections.close_all()
+            connections.settings.pop("replica", None)
+
+    leituras, escritas = medidas["ler"], medidas["escrever"]
+    return {
+        "leituras_por_s": len(leituras) / args.segundos,
+        "escritas_por_s": len(escritas) / args.segundos,
+        "leitura": resumir(leituras),
+        "escrita": resumir(escritas),
+        "erros": erros,
+        "copias": len(copias),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leitores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--intervalo", type=float, default=1.0)
+    parser.add_argument("--lote", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    configurar_django()
+    resultados = {
+        "primario": _rodada("primario", False, args),
+        "replica": _rodada("replica", True, args),
+    }
+
+    print(
+        f"{args.leitores} leitores + 1 escritor (lotes de {args.lote}) "
+        f"por {args.segundos:.0f}s"
+    )
+    for nome, r in resultados.items():
+        print(
+            f"  {nome:<9}: {r['leituras_por_s']:7.1f} leituras/s "
+            f"(p95 {r['leitura']['p95_ms']:.1f} ms), "
+            f"{r['escritas_por_s']:6.1f} escritas/s "
+            f"(p95 {r['escrita']['p95_ms']:.1f} ms), {r['erros']} erros, "
+            f"{r['copias']} cópias"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Leitura + serialização de páginas de 1000 linhas: serializer de model vs.
+`LeituraLeve`.
+
+    python -m benchmarks.serializers_leves --linhas 1000 --repeticoes 30
+
+Mede, para holdings e portfólios, o caminho completo a partir do queryset
+(consulta, instanciação e serialização) até a lista de dicts pronta para o
+renderer. "model" é o `ModelSerializer` com `select_related`; "leve" é o
+`values()` da `LeituraLeve`, na saída padrão e com `?fields=` reduzido.
+"""
+
+import argparse
+
+from benchmarks.comum import banco_descartavel, cronometrar, resumir
+
+
+def _popular(quantidade):
+    from apps.assets.models import Asset
+    from apps.holdings.models import Holding
+    from apps.portifolios.models import Portfolio
+    from django.contrib.auth.models import User
+
+    donos = User.objects.bulk_create(
+        User(username=f"leve{i}", password="!") for i in range(quantidade)
+    )
+    portfolios = Portfolio.objects.bulk_create(
+        Portfolio(nome=f"Leve {i}", host="alpha", criado_por=donos[i])
+        for i in range(quantidade)
+    )
+    ativos = Asset.objects.bulk_create(
+        Asset(ticker=f"L{i}", nome=f"Leve {i}", tipo="ACAO") for i in range(100)
+    )
+    Holding.objects.bulk_create(
+        (
+            Holding(
+                portfolio=portfolios[i],
+                asset=ativos[i % 100],
+                quantidade_total=i % 997 + 1,
+                preco_medio=f"{i % 5000 + 1}.{i % 100:02d}",
+            )
+            for i in range(quantidade)
+        ),
+        batch_size=2000,
+    )
+
+
+def _requisicao(query=""):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    return Request(APIRequestFactory().get(f"/{query}"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("serializers_leves"):
+        from apps.holdings.models import Holding
+        from apps.holdings.serializers import HoldingLeitura, HoldingSerializer
+        from apps.portifolios.models import Portfolio
+        from apps.portifolios.serializers import PortfolioLeitura, PortfolioSerializer
+
+        _popular(args.linhas)
+        holdings = Holding.objects.select_related("asset", "portfolio").order_by("id")
+        portfolios = Portfolio.objects.select_related("criado_por").order_by("id")
+
+        def leve(classe, queryset, query=""):
+            leitura = classe(_requisicao(query))
+            return lambda: leitura.serializar(leitura.consulta(queryset))
+
+        casos = {
+            "holdings": {
+                "model": lambda: HoldingSerializer(holdings.all(), many=True).data,
+                "leve": leve(HoldingLeitura, holdings),
+                "leve ?fields=": leve(
+                    HoldingLeitura, holdings, "?fields=id,asset,preco_medio"
+                ),
+            },
+            "portfolios": {
+                "model": lambda: PortfolioSerializer(portfolios.all(), many=True).data,
+                "leve": leve(PortfolioLeitura, portfolios),
+                "leve ?fields=": leve(PortfolioLeitura, portfolios, "?fields=id,nome"),
+            },
+        }
+        resultados = {
+            recurso: {
+                nome: resumir(cronometrar(funcao, args.repeticoes))
+                for nome, funcao in variantes.items()
+            }
+            for recurso, variantes in casos.items()
+        }
+
+    print(f"Páginas de {args.linhas} linhas, ms (p50 / p95)")
+    for recurso, medidas in resultados.items():
+        base = medidas["model"]["p50_ms"]
+        for nome, r in medidas.items():
+            print(
+                f"  {recurso:<11} {nome:<14} {r['p50_ms']:7.2f} / {r['p95_ms']:7.2f}"
+                f"   {base / r['p50_ms']:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
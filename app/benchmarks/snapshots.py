@@ -0,0 +1,135 @@
+"""Posição de um portfólio numa data: snapshots diários vs. ledger inteiro.
+
+    python -m benchmarks.snapshots --holdings 200 --dias 750 --repeticoes 5
+
+Um portfólio com `--holdings` holdings e uma compra (e, a cada três dias, uma
+venda) por holding em cada um de `--dias` dias. Compara `resumo_portfolio`
+com `as_of` no meio do período, lendo o snapshot mais próximo e o delta
+(`apps.transactions.snapshots`), com o replay de todo o ledger até a data.
+Também mede `atualizar_snapshots` completo e uma execução incremental depois
+de mais um dia de transações.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.comum import (
+    banco_descartavel,
+    contar_consultas,
+    cronometrar,
+    resumir,
+    usuario_de_benchmark,
+)
+
+INICIO = date(2022, 1, 1)
+
+
+def _popular(args):
+    from apps.assets.models import Asset
+    from apps.holdings.models import Holding
+    from apps.portifolios.models import Portfolio
+    from apps.transactions.models import Transaction
+    from apps.transactions.services import reconstruir_holdings
+
+    user = usuario_de_benchmark()
+    portfolio = Portfolio.objects.create(nome="Bench", host="bench", criado_por=user)
+    assets = Asset.objects.bulk_create(
+        Asset(ticker=f"SNP{i:04d}", nome=f"Ativo {i}", tipo="ACAO")
+        for i in range(args.holdings)
+    )
+    holdings = Holding.objects.bulk_create(
+        Holding(portfolio=portfolio, asset=asset) for asset in assets
+    )
+    for dia in range(args.dias):
+        Transaction.objects.bulk_create(_do_dia(user, holdings, dia))
+    reconstruir_holdings(portfolio=portfolio)
+    return user, portfolio, holdings
+
+
+def _do_dia(user, holdings, dia):
+    from apps.transactions.models import Transaction
+
+    for holding in holdings:
+        comum = {"holding": holding, "criado_por": user}
+        comum["data"] = INICIO + timedelta(days=dia)
+        preco = Decimal(1000 + (holding.pk * 7 + dia) % 900) / 100
+        yield Transaction(tipo="COMPRA", quantidade=3, preco=preco, **comum)
+        if dia % 3 == 2:
+            yield Transaction(tipo="VENDA", quantidade=2, preco=preco, **comum)
+
+
+def _pelo_ledger(portfolio, as_of):
+    """Quantidade e preço médio na data refazendo o ledger desde o início."""
+    from apps.transactions.models import Transaction
+    from apps.transactions.services import _replay_do_ledger
+
+    ledger = (
+        Transaction.objects.filter(holding__portfolio=portfolio, data__lte=as_of)
+        .order_by("holding_id", "data", "id")
+        .values_list("holding_id", "tipo", "quantidade", "preco")
+    )
+    return {h: (q, p) for h, q, p in _replay_do_ledger(ledger)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holdings", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=750)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with banco_descartavel("snapshots"):
+        from apps.portifolios.services import resumo_portfolio
+        from apps.transactions.models import Transaction
+        from apps.transactions.snapshots import atualizar_snapshots
+
+        user, portfolio, holdings = _popular(args)
+        transacoes = Transaction.objects.count()
+        as_of = INICIO + timedelta(days=args.dias // 2)
+
+        inicio = time.perf_counter()
+        completo = atualizar_snapshots()
+        duracao_completa = time.perf_counter() - inicio
+        Transaction.objects.bulk_create(_do_dia(user, holdings, args.dias))
+        inicio = time.perf_counter()
+        incremental = atualizar_snapshots()
+        duracao_incremental = time.perf_counter() - inicio
+
+        resumo = resumo_portfolio(portfolio, as_of=as_of)
+        esperado = _pelo_ledger(portfolio, as_of)
+        quantidades = {
+            linha["asset"]: linha["quantidade"] for linha in resumo["holdings"]
+        }
+        assert sorted(quantidades.values()) == sorted(q for q, _p in esperado.values())
+
+        with contar_consultas() as consultas:
+            resumo_portfolio(portfolio, as_of=as_of)
+        com_snapshots = resumir(
+            cronometrar(
+                lambda: resumo_portfolio(portfolio, as_of=as_of), args.repeticoes
+            )
+        )
+        pelo_ledger = resumir(
+            cronometrar(lambda: _pelo_ledger(portfolio, as_of), args.repeticoes)
+        )
+
+    print(
+        f"{args.holdings} holdings, {transacoes} transações em {args.dias} dias, "
+        f"as_of {as_of}"
+    )
+    print(
+        f"  resumo com snapshots  p50 {com_snapshots['p50_ms']:8.1f} ms  "
+        f"{consultas.total} consultas"
+    )
+    print(f"  replay do ledger      p50 {pelo_ledger['p50_ms']:8.1f} ms")
+    print(
+        f"  snapshots: completo {duracao_completa:.2f}s "
+        f"({completo['snapshots']} gravados), incremental de um dia "
+        f"{duracao_incremental:.2f}s ({incremental['transacoes']} transações)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Leitores em paralelo com um escritor: configuração atual vs. perfil SQLite.
+
+    python -m benchmarks.sqlite_concorrencia --leitores 8 --segundos 5
+
+Cada configuração roda num banco novo (o `journal_mode=WAL` fica gravado no
+arquivo). Os leitores pedem o `summary` de um portfólio e o escritor lança
+compras nesse mesmo portfólio, todos pelo cliente de teste em threads com
+conexões próprias. O cache de respostas fica desligado.
+"""
+
+import argparse
+import threading
+import time
+from io import StringIO
+
+from benchmarks.comum import banco_descartavel, configurar_django, resumir
+
+
+def _pragmas_do_perfil():
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": "268435456",
+        "cache_size": "-65536",
+        "temp_store": "MEMORY",
+        "busy_timeout": "20000",
+    }
+
+
+def _trabalhador(user, chamar, ate, medidas, erros):
+    from django.db import OperationalError, connection
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    try:
+        while time.perf_counter() < ate:
+            inicio = time.perf_counter()
+            try:
+                status = chamar(client)
+            except OperationalError:
+                status = 500
+            if status >= 500:
+                erros.append(status)
+                continue
+            medidas.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        connection.close()
+
+
+def _rodada(nome, pragmas, args):
+    from django.db import connection
+    from django.test import override_settings
+
+    caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    connection.close()
+    with override_settings(SQLITE_PRAGMAS=pragmas, CACHES=caches):
+        with banco_descartavel(f"concorrencia_{nome}"):
+            from apps.holdings.models import Holding
+            from django.contrib.auth.models import User
+            from django.core.management import call_command
+
+            call_command(
+                "portfolio_seed",
+                "--scale",
+                "--num-hosts",
+                "1",
+                "--portfolios-per-host",
+                "20",
+                "--num-assets",
+                "50",
+                "--holdings-per-portfolio",
+                "20",
+                "--transactions-per-portfolio",
+                "200",
+                stdout=StringIO(),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal = cursor.fetchone()[0]
+            user = User.objects.get(username="senior_host0001")
+            holding = Holding.objects.order_by("id").first()
+            url = f"/api/portfolios/{holding.portfolio_id}/"
+            compra = {
+                "asset": holding.asset_id,
+                "tipo": "COMPRA",
+                "quantidade": "1.00",
+                "preco": "10.00",
+                "data": "2025-11-11",
+            }
+
+            def ler(client):
+                return client.get(url + "summary/").status_code
+
+            def escrever(client):
+                return client.post(
+                    url + "transactions/", compra, format="json"
+                ).status_code
+
+            leituras: list[float] = []
+            escritas: list[float] = []
+            erros: list[int] = []
+            ate = time.perf_counter() + args.segundos
+            threads = [
+                threading.Thread(
+                    target=_trabalhador, args=(user, ler, ate, leituras, erros)
+                )
+                for _ in range(args.leitores)
+            ]
+            threads.append(
+                threading.Thread(
+                    target=_trabalhador, args=(user, escrever, ate, escritas, erros)
+                )
+            )
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            connection.close()
+
+    return {
+        "journal_mode": journal,
+        "leituras_por_s": len(leituras) / args.segundos,
+        "escritas_por_s": len(escritas) / args.segundos,
+        "leitura": resumir(leituras),
+        "escrita": resumir(escritas),
+        "erros": len(erros),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leitores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    configurar_django()
+    resultados = {
+        "atual": _rodada("atual", {}, args),
+        "desempenho": _rodada("desempenho", _pragmas_do_perfil(), args),
+    }
+
+    print(f"{args.leitores} leitores + 1 escritor por {args.segundos:.0f}s")
+    for nome, r in resultados.items():
+        print(
+            f"  {nome:<11} ({r['journal_mode']}): "
+            f"{r['leituras_por_s']:7.1f} leituras/s "
+            f"(p95 {r['leitura']['p95_ms']:.1f} ms), "
+            f"{r['escritas_por_s']:6.1f} escritas/s "
+            f"(p95 {r['escrita']['p95_ms']:.1f} ms), {r['erros']} erros"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+
+from core import lru, metricas
+from core.cache import zerar_estatisticas
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpo():
+    """O banco de teste volta ao estado inicial a cada teste; o cache também."""
+    cache.clear()
+    zerar_estatisticas()
+    metricas.zerar()
+    lru.zerar_estatisticas()
+    yield
+    cache.clear()
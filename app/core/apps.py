@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .shards import conectar_exclusoes, preparar_conexao
+        from .sqlite import aplicar_pragmas
+
+        connection_created.connect(aplicar_pragmas, dispatch_uid="sqlite_pragmas")
+        connection_created.connect(preparar_conexao, dispatch_uid="shards")
+        conectar_exclusoes()
@@ -0,0 +1,158 @@
+"""Cache de respostas versionado por escopo (portfólio, host, admin).
+
+Cada escopo tem um contador de versão guardado no próprio cache e as chaves
+das respostas incluem as versões dos escopos de que dependem. Invalidar é só
+incrementar um contador (O(1)); as entradas antigas deixam de ser lidas e
+expiram sozinhas. Funciona com qualquer backend do Django (LocMemCache,
+FileBasedCache, ...).
+"""
+
+import hashlib
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.replicas import no_primario
+
+ESCOPO_TUDO = "tudo"
+ESCOPO_ADMIN = "admin"
+# respostas que usam cotações (resumos com `as_of`)
+ESCOPO_COTACOES = "cotacoes"
+
+_contadores = {"hits": 0, "misses": 0}
+_lock = Lock()
+_AUSENTE = object()
+
+
+def escopo_portfolio(portfolio_id):
+    return f"portfolio:{portfolio_id}"
+
+
+def escopo_host(host):
+    return f"host:{host}"
+
+
+def _chave_versao(escopo):
+    return f"versao:{escopo}"
+
+
+def _versoes(escopos):
+    chaves = [_chave_versao(escopo) for escopo in escopos]
+    versoes = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in versoes:
+            # Versão inicial baseada no relógio: se o contador for descartado
+            # pelo backend, a nova versão não reaproveita respostas antigas.
+            cache.add(chave, time.time_ns(), timeout=None)
+            versoes[chave] = cache.get(chave)
+    return [versoes[chave] for chave in chaves]
+
+
+def versao(escopo):
+    """Versão atual de um escopo (muda a cada invalidação)."""
+    return _versoes([escopo])[0]
+
+
+def _incrementar(escopo):
+    chave = _chave_versao(escopo)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.add(chave, time.time_ns(), timeout=None)
+
+
+def invalidar(*escopos):
+    """Invalida os escopos agora e de novo quando a transação for confirmada.
+
+    O incremento imediato cobre leituras dentro da própria transação; o do
+    `on_commit` descarta o que outro processo tenha guardado com dados
+    anteriores ao commit, então não há leitura velha depois do commit.
+    """
+
+    def incrementar():
+        for escopo in escopos:
+            _incrementar(escopo)
+
+    incrementar()
+    transaction.on_commit(incrementar)
+
+
+def invalidar_portfolio(portfolio_id, host):
+    invalidar(escopo_portfolio(portfolio_id), escopo_host(host), ESCOPO_ADMIN)
+
+
+def invalidar_tudo():
+    invalidar(ESCOPO_TUDO)
+
+
+def invalidar_cotacoes():
+    invalidar(ESCOPO_COTACOES)
+
+
+def chave(escopos, *partes):
+    versoes = _versoes([ESCOPO_TUDO, *escopos])
+    assinatura = "|".join(
+        [f"{e}={v}" for e, v in zip([ESCOPO_TUDO, *escopos], versoes)]
+        + [str(parte) for parte in partes]
+    )
+    return "resposta:" + hashlib.sha1(assinatura.encode("utf-8")).hexdigest()
+
+
+def obter(chave_resposta):
+    """Retorna `(encontrado, valor)` e atualiza os contadores de hit/miss."""
+    valor = cache.get(chave_resposta, _AUSENTE)
+    encontrado = valor is not _AUSENTE
+    with _lock:
+        _contadores["hits" if encontrado else "misses"] += 1
+    return encontrado, (valor if encontrado else None)
+
+
+def guardar(chave_resposta, valor, timeout=None):
+    if timeout is None:
+        timeout = settings.CACHE_RESPOSTAS_TIMEOUT
+    cache.set(chave_resposta, valor, timeout=timeout)
+
+
+def timeout_com_cotacoes():
+    """Timeout de respostas sob `ESCOPO_COTACOES`.
+
+    Com cache local a versão das cotações não chega de outros processos
+    (`import_quotes`); como o LRU de preços, essas respostas duram no máximo
+    `PRECOS_LRU_TTL` segundos.
+    """
+    ttl = settings.PRECOS_LRU_TTL
+    if not ttl:
+        return settings.CACHE_RESPOSTAS_TIMEOUT
+    return min(ttl, settings.CACHE_RESPOSTAS_TIMEOUT)
+
+
+def obter_ou_calcular(chave_resposta, calcular, timeout=None):
+    """Retorna `(valor, encontrado)`, calculando e guardando em caso de miss.
+
+    O cálculo lê do primário: um valor da réplica atrasada ficaria guardado
+    sob a versão já invalidada.
+    """
+    encontrado, valor = obter(chave_resposta)
+    if not encontrado:
+        with no_primario():
+            valor = calcular()
+        guardar(chave_resposta, valor, timeout)
+    return valor, encontrado
+
+
+def cabecalho(encontrado):
+    return {"X-Cache": "HIT" if encontrado else "MISS"}
+
+
+def estatisticas():
+    with _lock:
+        return dict(_contadores)
+
+
+def zerar_estatisticas():
+    with _lock:
+        for nome in _contadores:
+            _contadores[nome] = 0
@@ -5,6 +5,8 @@ from datetime import date
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from core.middleware import requisicao_atomica
+
 from apps.portifolios.models import Portfolio
 from apps.assets.models import Asset
 from apps.transactions.models import Transaction
@@ -12,12 +14,13 @@ from apps.holdings.models import Holding
 
 
 @csrf_exempt
+@requisicao_atomica
 def test_atomic_view(request):
     """Endpoint de teste (apenas para DEBUG/testes) que verifica atomicidade.
 
     Recebe um JSON com: portfolio (uuid), asset (id), tipo, quantidade, preco.
     A view cria uma Transaction e então lança uma exceção para forçar rollback.
-    Quando `ATOMIC_REQUESTS = True`, as alterações no banco devem ser revertidas.
+    Com o `TransacaoMiddleware`, as alterações no banco devem ser revertidas.
     """
     if request.method != "POST":
         return JsonResponse({"detail": "Apenas POST"}, status=405)
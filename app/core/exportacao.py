@@ -0,0 +1,92 @@
+"""Exportação em streaming (CSV ou NDJSON) de uma `LeituraLeve`.
+
+O queryset é lido com `values().iterator(chunk_size=...)` e cada lote é
+serializado e enviado antes do próximo ser lido: a memória usada não depende
+de quantas linhas são exportadas. O formato vem de `?format=csv|ndjson`; a
+view precisa usar `NegociacaoExportacao` para que o DRF não tente achar um
+renderer com esse nome.
+"""
+
+import csv
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from core.renderers import dumps
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class NegociacaoExportacao(DefaultContentNegotiation):
+    """Usa sempre o primeiro renderer (JSON, para as respostas de erro).
+
+    Nas exportações `?format=` escolhe o formato do arquivo, não o renderer.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
+
+
+def formato_pedido(request):
+    formato = request.query_params.get("format", "csv")
+    if formato not in FORMATOS:
+        raise ValidationError(
+            {"format": [f"Formato desconhecido: {formato}. Use csv ou ndjson."]}
+        )
+    return formato
+
+
+def _lotes(linhas, tamanho):
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, tamanho)):
+        yield lote
+
+
+def _csv(leitura, lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(leitura.nomes())
+    for lote in lotes:
+        for item in leitura.serializar(lote):
+            linha = []
+            for valor in item.values():
+                if isinstance(valor, dict):
+                    linha.extend(valor.values())
+                else:
+                    linha.append(valor)
+            escritor.writerow(linha)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # só o cabeçalho, quando não há linhas
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson(leitura, lotes):
+    for lote in lotes:
+        yield b"".join(dumps(item) + b"\n" for item in leitura.serializar(lote))
+
+
+def exportar(leitura, queryset, formato, nome):
+    """`StreamingHttpResponse` com as linhas de `queryset` no `formato` pedido.
+
+    `queryset` deve vir já com o escopo do usuário aplicado; a ordem é por
+    `id` para que exportações repetidas saiam iguais.
+    """
+    tamanho = settings.EXPORTACAO_LOTE
+    linhas = leitura.consulta(queryset.order_by("id")).iterator(chunk_size=tamanho)
+    gerar = _csv if formato == "csv" else _ndjson
+    resposta = StreamingHttpResponse(
+        gerar(leitura, _lotes(linhas, tamanho)), content_type=FORMATOS[formato]
+    )
+    resposta["Content-Disposition"] = f'attachment; filename="{nome}.{formato}"'
+    return resposta
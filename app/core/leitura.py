@@ -0,0 +1,187 @@
+"""Serialização de leitura sobre `values()`, sem instanciar models.
+
+Uma `LeituraLeve` declara as colunas de saída e de onde cada uma vem (um ou
+mais lookups do `values()` e, opcionalmente, uma função de formatação). A
+saída padrão reproduz a do serializer de model equivalente; `?fields=a,b`
+limita os campos e `?expand=x` troca o texto de uma relação pelo objeto
+aninhado declarado em `expansoes`.
+
+    leitura = HoldingLeitura(request)
+    pagina = self.paginate_queryset(leitura.consulta(queryset))
+    return self.get_paginated_response(leitura.serializar(pagina))
+"""
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class Coluna:
+    """Campo de saída: lookups lidos do `values()` e a formatação do valor."""
+
+    __slots__ = ("lookups", "formatar")
+
+    def __init__(self, *lookups, formatar=None):
+        self.lookups = lookups
+        self.formatar = formatar
+
+    def formatador(self):
+        """Formatação usada nesta requisição (resolvida uma vez por leitura)."""
+        return self.formatar
+
+
+class ColunaDataHora(Coluna):
+    """Como `serializers.DateTimeField`: fuso atual, ISO 8601, `Z` para UTC.
+
+    O fuso é lido uma vez por leitura, e não a cada valor como no DRF.
+    """
+
+    __slots__ = ()
+
+    def formatador(self):
+        fuso = timezone.get_current_timezone()
+
+        def formatar(valor):
+            if valor is None:
+                return None
+            if timezone.is_naive(valor):
+                valor = timezone.make_aware(valor, fuso)
+            texto = valor.astimezone(fuso).isoformat()
+            return texto[:-6] + "Z" if texto.endswith("+00:00") else texto
+
+        return formatar
+
+
+def texto_decimal(valor):
+    """Como `serializers.DecimalField` (o banco já devolve o valor quantizado)."""
+    if valor is None or not api_settings.COERCE_DECIMAL_TO_STRING:
+        return valor
+    return "{:f}".format(valor)
+
+
+def texto_data(valor):
+    """Como `serializers.DateField` (ISO 8601)."""
+    return None if valor is None else valor.isoformat()
+
+
+def texto(valor):
+    return None if valor is None else str(valor)
+
+
+def _lista(parametro):
+    if parametro is None:
+        return None
+    return [nome.strip() for nome in parametro.split(",") if nome.strip()]
+
+
+def _preparar(coluna):
+    return coluna.lookups, coluna.formatador()
+
+
+class LeituraLeve:
+    campos: dict[str, Coluna] = {}
+    expansoes: dict[str, dict[str, Coluna]] = {}
+    # sempre lido, mesmo fora de `?fields=`: a paginação por cursor usa o id
+    chave = "id"
+
+    def __init__(self, request):
+        pedidos = _lista(request.query_params.get("fields"))
+        expandir = _lista(request.query_params.get("expand")) or []
+
+        desconhecidos = [n for n in pedidos or [] if n not in self.campos]
+        if desconhecidos:
+            raise ValidationError(
+                {"fields": [f"Campo desconhecido: {n}" for n in desconhecidos]}
+            )
+        desconhecidos = [n for n in expandir if n not in self.expansoes]
+        if desconhecidos:
+            raise ValidationError(
+                {"expand": [f"Relação não expansível: {n}" for n in desconhecidos]}
+            )
+
+        # (nome, (lookups, formatar)) ou (nome, [(sub, (lookups, formatar))])
+        self.saida: list = []
+        for nome, coluna in self.campos.items():
+            if pedidos is not None and nome not in pedidos:
+                continue
+            if nome in expandir:
+                aninhado = [
+                    (sub, _preparar(c)) for sub, c in self.expansoes[nome].items()
+                ]
+                self.saida.append((nome, aninhado))
+            else:
+                self.saida.append((nome, _preparar(coluna)))
+
+    def _lookups(self):
+        lookups = {self.chave}
+        for _nome, coluna in self.saida:
+            colunas = coluna if isinstance(coluna, list) else [(None, coluna)]
+            for _sub, (sub_lookups, _formatar) in colunas:
+                lookups.update(sub_lookups)
+        return sorted(lookups)
+
+    def nomes(self):
+        """Nomes das colunas da saída, com `relacao.campo` para expansões."""
+        nomes = []
+        for nome, coluna in self.saida:
+            if isinstance(coluna, list):
+                nomes.extend(f"{nome}.{sub}" for sub, _c in coluna)
+            else:
+                nomes.append(nome)
+        return nomes
+
+    def consulta(self, queryset):
+        """`values()` com apenas as colunas necessárias para a saída pedida."""
+        return queryset.values(*self._lookups())
+
+    @staticmethod
+    def _valor(linha, coluna):
+        lookups, formatar = coluna
+        if len(lookups) == 1:
+            valor = linha[lookups[0]]
+            return formatar(valor) if formatar else valor
+        return formatar(*(linha[lookup] for lookup in lookups))
+
+    def serializar(self, linhas):
+        valor = self._valor
+        saida = self.saida
+        resultado = []
+        for linha in linhas:
+            item = {}
+            for nome, coluna in saida:
+                if isinstance(coluna, list):
+                    item[nome] = {sub: valor(linha, c) for sub, c in coluna}
+                else:
+                    item[nome] = valor(linha, coluna)
+            resultado.append(item)
+        return resultado
+
+
+class LeituraLeveMixin:
+    """`list`/`retrieve` de viewsets servidos por uma `LeituraLeve`.
+
+    Escopo (`get_queryset`), filtros e paginação continuam os do viewset;
+    só a leitura e a serialização das linhas mudam.
+    """
+
+    leitura_class: type[LeituraLeve]
+
+    def list(self, request, *args, **kwargs):
+        leitura = self.leitura_class(request)
+        queryset = leitura.consulta(self.filter_queryset(self.get_queryset()))
+        pagina = self.paginate_queryset(queryset)
+        if pagina is None:
+            return Response(leitura.serializar(queryset))
+        return self.get_paginated_response(leitura.serializar(pagina))
+
+    def retrieve(self, request, *args, **kwargs):
+        leitura = self.leitura_class(request)
+        queryset = leitura.consulta(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        linha = get_object_or_404(
+            queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, linha)
+        return Response(leitura.serializar([linha])[0])
@@ -0,0 +1,70 @@
+"""Caches LRU em memória do processo, limitados em número de entradas.
+
+Cada `CacheLRU` se registra pelo nome ao ser criado; `core.metricas` exporta
+os acertos, faltas e o tamanho de todos os registrados. Como as métricas, os
+caches são por processo.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+_registrados: dict[str, "CacheLRU"] = {}
+
+
+class CacheLRU:
+    """Mapeamento limitado a `tamanho` entradas; a menos usada sai primeiro."""
+
+    def __init__(self, nome, tamanho):
+        self.nome = nome
+        self.tamanho = tamanho
+        self._dados: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        _registrados[nome] = self
+
+    def __len__(self):
+        return len(self._dados)
+
+    def obter_muitos(self, chaves):
+        """Dicionário só com as chaves encontradas; as demais contam como falta."""
+        encontrados = {}
+        with self._lock:
+            for chave in chaves:
+                try:
+                    self._dados.move_to_end(chave)
+                except KeyError:
+                    self.misses += 1
+                    continue
+                encontrados[chave] = self._dados[chave]
+                self.hits += 1
+        return encontrados
+
+    def guardar_muitos(self, itens):
+        with self._lock:
+            for chave, valor in itens.items():
+                self._dados[chave] = valor
+                self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho:
+                self._dados.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entradas": len(self)}
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+def registrados():
+    return dict(sorted(_registrados.items()))
+
+
+def zerar_estatisticas():
+    for cache_lru in _registrados.values():
+        cache_lru.zerar_estatisticas()
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.replicas import copiar
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia o banco default para o arquivo da réplica de leitura "
+        "(REPLICA_ARQUIVO), uma vez ou a cada --intervalo segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Repete a cópia a cada N segundos até ser interrompido",
+        )
+        parser.add_argument(
+            "--destino", help="Arquivo de destino (padrão: REPLICA_ARQUIVO)"
+        )
+
+    def handle(self, *args, **options):
+        origem = connections[DEFAULT_DB_ALIAS].settings_dict
+        if origem["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("copy_replica só copia bancos SQLite.")
+        destino = options.get("destino") or settings.REPLICA_ARQUIVO
+        intervalo = options["intervalo"]
+        while True:
+            inicio = time.perf_counter()
+            copiar(origem["NAME"], destino)
+            duracao = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Réplica copiada para {destino} ({duracao:.0f} ms)."
+                )
+            )
+            if intervalo <= 0:
+                return
+            time.sleep(intervalo)
@@ -0,0 +1,171 @@
+"""Métricas por endpoint em memória, expostas em formato Prometheus.
+
+Para cada `(view, método)` são acumulados: histograma de latência, número de
+consultas e tempo de banco, e bytes da resposta. As requisições mais lentas
+(com o SQL executado) ficam num conjunto limitado a `METRICAS_LENTAS`.
+
+Os valores são por processo: com vários workers, cada um expõe os seus.
+"""
+
+import heapq
+import itertools
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core import cache as cache_respostas
+from core import lru
+from core.permissions import IsAdminSuper
+
+# limites (segundos) dos buckets do histograma de latência
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_POR_REQUISICAO = 50
+
+_lock = Lock()
+_endpoints: dict[tuple[str, str], dict] = {}
+_lentas: list = []
+_sequencia = itertools.count()
+
+
+def _novo_endpoint():
+    return {
+        "buckets": [0] * (len(BUCKETS) + 1),
+        "requisicoes": 0,
+        "latencia": 0.0,
+        "consultas": 0,
+        "tempo_banco": 0.0,
+        "bytes": 0,
+    }
+
+
+def registrar(view, metodo, status, latencia, consultas, tempo_banco, tamanho, sql):
+    """Acumula uma requisição; `sql` é a lista de comandos executados."""
+    with _lock:
+        endpoint = _endpoints.get((view, metodo))
+        if endpoint is None:
+            endpoint = _endpoints[(view, metodo)] = _novo_endpoint()
+        endpoint["buckets"][bisect_left(BUCKETS, latencia)] += 1
+        endpoint["requisicoes"] += 1
+        endpoint["latencia"] += latencia
+        endpoint["consultas"] += consultas
+        endpoint["tempo_banco"] += tempo_banco
+        endpoint["bytes"] += tamanho
+
+        limite = settings.METRICAS_LENTAS
+        if limite <= 0 or (len(_lentas) >= limite and latencia <= _lentas[0][0]):
+            return
+        registro = {
+            "view": view,
+            "metodo": metodo,
+            "status": status,
+            "latencia": latencia,
+            "consultas": consultas,
+            "sql": sql,
+        }
+        item = (latencia, next(_sequencia), registro)
+        if len(_lentas) < limite:
+            heapq.heappush(_lentas, item)
+        else:
+            heapq.heapreplace(_lentas, item)
+
+
+def requisicoes_lentas():
+    """As requisições mais lentas registradas, da mais lenta para a menos."""
+    with _lock:
+        return [registro for _l, _s, registro in sorted(_lentas, reverse=True)]
+
+
+def zerar():
+    with _lock:
+        _endpoints.clear()
+        _lentas.clear()
+
+
+def _rotulos(view, metodo, **extras):
+    pares = {"view": view, "method": metodo, **extras}
+    texto = ",".join(
+        '{}="{}"'.format(nome, str(valor).replace("\\", "\\\\").replace('"', '\\"'))
+        for nome, valor in pares.items()
+    )
+    return "{" + texto + "}"
+
+
+def exportar():
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    with _lock:
+        endpoints = {
+            chave: {**dados, "buckets": list(dados["buckets"])}
+            for chave, dados in sorted(_endpoints.items())
+        }
+
+    linhas = [
+        "# HELP http_request_duration_seconds Latência das requisições.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (view, metodo), dados in endpoints.items():
+        acumulado = 0
+        for limite, quantidade in zip((*BUCKETS, "+Inf"), dados["buckets"]):
+            acumulado += quantidade
+            rotulos = _rotulos(view, metodo, le=limite)
+            linhas.append(f"http_request_duration_seconds_bucket{rotulos} {acumulado}")
+        rotulos = _rotulos(view, metodo)
+        linhas.append(f"http_request_duration_seconds_sum{rotulos} {dados['latencia']}")
+        linhas.append(
+            f"http_request_duration_seconds_count{rotulos} {dados['requisicoes']}"
+        )
+
+    for nome, campo, ajuda in (
+        ("http_db_queries_total", "consultas", "Consultas SQL executadas."),
+        ("http_db_duration_seconds_total", "tempo_banco", "Tempo gasto no banco."),
+        ("http_response_bytes_total", "bytes", "Bytes dos corpos de resposta."),
+    ):
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} counter"]
+        for (view, metodo), dados in endpoints.items():
+            linhas.append(f"{nome}{_rotulos(view, metodo)} {dados[campo]}")
+
+    cache = cache_respostas.estatisticas()
+    linhas += [
+        "# HELP cache_respostas_total Leituras do cache de respostas.",
+        "# TYPE cache_respostas_total counter",
+        f'cache_respostas_total{{resultado="hit"}} {cache["hits"]}',
+        f'cache_respostas_total{{resultado="miss"}} {cache["misses"]}',
+    ]
+
+    caches_lru = {
+        nome: cache_lru.estatisticas() for nome, cache_lru in lru.registrados().items()
+    }
+    linhas += [
+        "# HELP cache_lru_total Leituras dos caches LRU em memória.",
+        "# TYPE cache_lru_total counter",
+    ]
+    for nome, dados in caches_lru.items():
+        linhas.append(
+            f'cache_lru_total{{cache="{nome}",resultado="hit"}} {dados["hits"]}'
+        )
+        linhas.append(
+            f'cache_lru_total{{cache="{nome}",resultado="miss"}} {dados["misses"]}'
+        )
+    linhas += [
+        "# HELP cache_lru_entradas Entradas guardadas nos caches LRU em memória.",
+        "# TYPE cache_lru_entradas gauge",
+    ]
+    for nome, dados in caches_lru.items():
+        linhas.append(f'cache_lru_entradas{{cache="{nome}"}} {dados["entradas"]}')
+    return "\n".join(linhas) + "\n"
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminSuper])
+def metricas_view(request):
+    return HttpResponse(exportar(), content_type="text/plain; version=0.0.4")
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminSuper])
+def requisicoes_lentas_view(request):
+    return Response(requisicoes_lentas())
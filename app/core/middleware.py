@@ -0,0 +1,140 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections, transaction
+
+from core import metricas, replicas
+from core.permissions import perfil
+from core.shards import bancos_de_tenants, bancos_do_perfil
+
+METODOS_SEGUROS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def requisicao_atomica(view):
+    """Marca uma view para rodar numa transação mesmo em métodos seguros."""
+    view._requisicao_atomica = True
+    return view
+
+
+class _ColetorSQL:
+    """`execute_wrapper` que conta consultas e soma o tempo no banco."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo = 0.0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo += time.perf_counter() - inicio
+            self.consultas += 1
+            if len(self.sql) < metricas.SQL_POR_REQUISICAO:
+                self.sql.append(sql)
+
+
+class MetricasMiddleware:
+    """Registra latência, consultas, tempo de banco e tamanho por endpoint.
+
+    O endpoint é o nome da URL resolvida (`resolver_match.view_name`); rotas
+    não resolvidas (404) ficam agrupadas como `"<nao_resolvida>"`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        coletor = _ColetorSQL()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            # todos os bancos: réplica e shards também contam
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(coletor))
+            response = self.get_response(request)
+        latencia = time.perf_counter() - inicio
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<nao_resolvida>"
+        tamanho = 0 if response.streaming else len(response.content)
+        metricas.registrar(
+            view,
+            request.method,
+            response.status_code,
+            latencia,
+            coletor.consultas,
+            coletor.tempo,
+            tamanho,
+            coletor.sql,
+        )
+        return response
+
+
+class TransacaoMiddleware:
+    """Substitui `ATOMIC_REQUESTS`: só métodos inseguros rodam numa transação.
+
+    GET/HEAD/OPTIONS ficam em autocommit (sem BEGIN/COMMIT nem trava do
+    SQLite durante a leitura), a não ser que a view seja marcada com
+    `requisicao_atomica`. Views com `transaction.non_atomic_requests`
+    continuam fora da transação. Como o `set_rollback` do DRF só age com
+    `ATOMIC_REQUESTS`, respostas de exceções tratadas pelo DRF
+    (`response.exception`) desfazem a transação aqui, como antes.
+
+    Com shards (`core.shards`), só o banco do host do usuário entra na
+    transação (todos para ADMIN_SUPER): a escrita de um tenant não trava o
+    banco dos outros.
+
+    Com réplica (`core.replicas`), as views seguras rodam lendo da réplica
+    (inclusive o corpo de respostas em streaming), salvo logo depois de uma
+    escrita da mesma sessão: toda resposta de método inseguro fixa a sessão
+    no primário por `REPLICA_PIN_SEGUNDOS`.
+
+    Precisa ser o último middleware: ele mesmo chama a view no
+    `process_view`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    @staticmethod
+    def _bancos(request):
+        bancos = bancos_de_tenants()
+        if len(bancos) == 1:
+            return bancos
+        # com shards o usuário é lido antes, em autocommit, para que só o
+        # banco do host dele entre na transação
+        return bancos_do_perfil(perfil(getattr(request, "user", None)))
+
+    @staticmethod
+    def _na_replica(request, view_func, view_args, view_kwargs):
+        with replicas.na_replica():
+            response = view_func(request, *view_args, **view_kwargs)
+        if response.streaming:
+            response.streaming_content = replicas.iterar_na_replica(
+                response.streaming_content
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in METODOS_SEGUROS and not getattr(
+            view_func, "_requisicao_atomica", False
+        ):
+            if replicas.pode_ler_da_replica(request):
+                return self._na_replica(request, view_func, view_args, view_kwargs)
+            return None
+        fora = getattr(view_func, "_non_atomic_requests", set())
+        bancos = [alias for alias in self._bancos(request) if alias not in fora]
+        with ExitStack() as pilha:
+            for alias in bancos:
+                pilha.enter_context(transaction.atomic(using=alias))
+            response = view_func(request, *view_args, **view_kwargs)
+            if getattr(response, "exception", False):
+                for alias in bancos:
+                    transaction.set_rollback(True, using=alias)
+        if request.method not in METODOS_SEGUROS:
+            replicas.fixar_no_primario(response)
+        return response
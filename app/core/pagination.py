@@ -0,0 +1,95 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorPaginacao(CursorPagination):
+    """Paginação por cursor (keyset) sobre `id`.
+
+    Cada página é um `WHERE id > cursor ORDER BY id LIMIT n`: não há
+    `COUNT(*)` nem `OFFSET`, então a página 1000 custa o mesmo que a página
+    1. O cliente escolhe o tamanho com `?page_size=`, limitado a
+    `max_page_size`.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPaginacao(BasePagination):
+    """Paginação por chave composta decrescente `(campo, id)`.
+
+    Para ordenações cujo primeiro campo se repete muito (ex.: datas), o
+    cursor guarda o par `(campo, id)` do último item e a próxima página é
+    `WHERE campo <= ? AND (campo < ? OR (campo = ? AND id < ?))`, que segue o
+    índice `(..., campo, id)` sem `OFFSET`. Só há link para a próxima página.
+    """
+
+    campo = "data"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor inválido"
+
+    def get_page_size(self, request):
+        try:
+            pedido = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if pedido <= 0:
+            return self.page_size
+        return min(pedido, self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        """`(valor, pk)` do cursor, com `valor` já no tipo do campo."""
+        codificado = request.query_params.get(self.cursor_query_param)
+        if codificado is None:
+            return None
+        campo = model._meta.get_field(self.campo)
+        try:
+            valor, pk = json.loads(b64decode(codificado.encode("ascii")))
+            return campo.to_python(valor), int(pk)
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item):
+        valor = getattr(item, self.campo)
+        dados = json.dumps([str(valor), item.pk]).encode("utf-8")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, b64encode(dados).decode("ascii")
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        queryset = queryset.order_by(f"-{self.campo}", "-id")
+        posicao = self.decode_cursor(request, queryset.model)
+        if posicao is not None:
+            valor, pk = posicao
+            anteriores = Q(**{f"{self.campo}__lt": valor}) | Q(
+                **{self.campo: valor, "id__lt": pk}
+            )
+            queryset = queryset.filter(**{f"{self.campo}__lte": valor}).filter(
+                anteriores
+            )
+        itens = list(queryset[: self.page_size + 1])
+        self.pagina = itens[: self.page_size]
+        self.tem_proxima = len(itens) > self.page_size
+        return self.pagina
+
+    def get_next_link(self):
+        if not self.tem_proxima:
+            return None
+        return self.encode_cursor(self.pagina[-1])
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -1,16 +1,27 @@
 from rest_framework import permissions
 from typing import Any
 
+from core.shards import em_todos_os_bancos
+
+
+def perfil(user):
+    """`UserProfile` do usuário autenticado, ou `None`.
+
+    Com `PerfilBackend` o perfil já vem carregado junto com o usuário da
+    sessão, então isto não consulta o banco.
+    """
+    return getattr(user, "profile", None)
+
 
 class IsAdminSuper(permissions.BasePermission):
     def has_permission(self, request, view):
-        profile = getattr(request.user, "profile", None)
+        profile = perfil(request.user)
         return bool(profile and profile.role == profile.ROLE_ADMIN_SUPER)
 
 
 class IsInvestorSeniorSameHost(permissions.BasePermission):
     def has_permission(self, request, view):
-        profile = getattr(request.user, "profile", None)
+        profile = perfil(request.user)
         if not profile:
             return False
         return profile.role == profile.ROLE_INVESTIDOR_SENIOR
@@ -23,7 +34,7 @@ class ReadOnlyForJunior(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        profile = getattr(request.user, "profile", None)
+        profile = perfil(request.user)
         if not profile:
             return False
         if profile.role == profile.ROLE_INVESTIDOR_JUNIOR:
@@ -38,7 +49,7 @@ class IsSeniorOrAdmin(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        profile = getattr(request.user, "profile", None)
+        profile = perfil(request.user)
         if not profile:
             return False
         if profile.role == profile.ROLE_ADMIN_SUPER:
@@ -54,7 +65,7 @@ class IsSeniorOrAdmin(permissions.BasePermission):
 
         `obj` pode ser um Portfolio ou um objeto relacionado a Portfolio/Holding.
         """
-        profile = getattr(request.user, "profile", None)
+        profile = perfil(request.user)
         if not profile:
             return False
         if profile.role == profile.ROLE_ADMIN_SUPER:
@@ -82,8 +93,9 @@ class IsSeniorOrAdmin(permissions.BasePermission):
 class HostAndRoleBasedScopeMixin:
     """Mixin que aplica escopo por `host` conforme o perfil do usuário.
 
-    - ADMIN_SUPER: vê todos os registros
-    - INVESTIDOR_SENIOR/JUNIOR: filtra por `profile.host`
+    - ADMIN_SUPER: vê todos os registros, em todos os bancos
+    - INVESTIDOR_SENIOR/JUNIOR: filtra por `profile.host` (e, com isso, lê do
+      shard do host)
     """
 
     def get_queryset(self: Any) -> Any:  # type: ignore[misc]
@@ -91,11 +103,10 @@ class HostAndRoleBasedScopeMixin:
         # `super().get_queryset()` e `self.request` existem. Anotamos
         # `self` como Any para satisfazer o verificador de tipos.
         qs = super().get_queryset()  # type: ignore[call-arg,misc]
-        user = getattr(self.request, "user", None)
-        profile = getattr(user, "profile", None)
+        profile = perfil(getattr(self.request, "user", None))
         if profile is None:
             return qs.none()
         if profile.role == profile.ROLE_ADMIN_SUPER:
-            return qs
+            return em_todos_os_bancos(qs)
 
         return qs.filter(host=profile.host)
@@ -0,0 +1,171 @@
+"""Renderer e parser JSON com `orjson` opcional.
+
+Com `orjson` instalado (e `JSON_ACELERADO` ligado) a serialização é feita por
+ele; sem ele, pelo `json` da biblioteca padrão com as mesmas opções do
+`JSONRenderer` do DRF. Tipos que o `orjson` formataria de outro jeito
+(datetime, Decimal) passam pelo mesmo `default` do DRF, e UUID, str, int,
+listas e dicts saem idênticos. Floats também, exceto os não finitos e os que
+a biblioteca padrão escreve com expoente (`abs` abaixo de 1e-4 ou a partir de
+1e16): o `orjson` escreve `1e16` onde o DRF escreve `1e+16` e `null` onde ele
+recusa NaN. Um `Decimal` que viraria um desses floats faz o corpo inteiro
+ir para a biblioteca padrão; floats nativos não são inspecionados (percorrer
+os dados custaria mais que o ganho do `orjson`) e saem no formato dele.
+
+`JSON_DECIMAL` escolhe como `Decimal`s que chegam crus ao renderer saem:
+`"numero"` (float, como o DRF sempre fez) ou `"texto"` (string exata). Campos
+`DecimalField` dos serializers já chegam como texto, conforme
+`COERCE_DECIMAL_TO_STRING`.
+"""
+
+import codecs
+import decimal
+import io
+import json
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None  # type: ignore[assignment]
+
+SEPARADORES_COMPACTOS = (",", ":")
+SEPARADORES_LONGOS = (", ", ": ")
+# o orjson lê inteiros com mais de 64 bits como float; esses corpos vão para
+# a biblioteca padrão, que os mantém exatos
+_INTEIRO_LONGO = re.compile(rb"\d{19}")
+
+
+def decimal_como_texto():
+    return settings.JSON_DECIMAL == "texto"
+
+
+def acelerado():
+    return orjson is not None and settings.JSON_ACELERADO
+
+
+class EncoderJSON(JSONEncoder):
+    """`JSONEncoder` do DRF com a representação de `Decimal` configurável."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.converter_decimal = str if decimal_como_texto() else float
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return self.converter_decimal(obj)
+        return super().default(obj)
+
+
+_encoder = EncoderJSON()
+OPCOES_ORJSON = (
+    (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+)
+
+
+def _escapar_separadores_de_linha(dados):
+    # como o DRF: U+2028/U+2029 escapados para o JSON ser JavaScript válido
+    return dados.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+        b"\xe2\x80\xa9", b"\\u2029"
+    )
+
+
+def _dumps_stdlib(dados, indent=None, compacto=True, ensure_ascii=False, estrito=True):
+    if indent is not None:
+        separadores = SEPARADORES_COMPACTOS[0], SEPARADORES_LONGOS[1]
+    else:
+        separadores = SEPARADORES_COMPACTOS if compacto else SEPARADORES_LONGOS
+    texto = json.dumps(
+        dados,
+        cls=EncoderJSON,
+        indent=indent,
+        ensure_ascii=ensure_ascii,
+        allow_nan=not estrito,
+        separators=separadores,
+    )
+    return _escapar_separadores_de_linha(texto.encode())
+
+
+def _formato_igual_no_orjson(valor):
+    """Se o `orjson` escreve o float `valor` como a biblioteca padrão."""
+    return not valor or 1e-4 <= abs(valor) < 1e16
+
+
+def _padrao_orjson():
+    """`default` do orjson: Decimal resolvido direto, o resto como no DRF."""
+    converter = str if decimal_como_texto() else float
+
+    def padrao(obj):
+        if obj.__class__ is decimal.Decimal:
+            valor = converter(obj)
+            if converter is float and not _formato_igual_no_orjson(valor):
+                # vira `JSONEncodeError`, e `dumps` usa a biblioteca padrão
+                raise ValueError(f"float fora do formato do orjson: {valor!r}")
+            return valor
+        return _encoder.default(obj)
+
+    return padrao
+
+
+def dumps(dados):
+    """Serializa `dados` em bytes JSON compactos (mesma saída do renderer)."""
+    if acelerado():
+        try:
+            return _escapar_separadores_de_linha(
+                orjson.dumps(dados, default=_padrao_orjson(), option=OPCOES_ORJSON)
+            )
+        except orjson.JSONEncodeError:
+            # ex.: inteiros maiores que 64 bits ou Decimals que virariam floats
+            # com expoente; a biblioteca padrão resolve (ou recusa NaN)
+            pass
+    return _dumps_stdlib(dados)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """`JSONRenderer` que usa `dumps` quando a saída é compacta.
+
+    Saída indentada (navegador/`?indent=`) continua na biblioteca padrão.
+    """
+
+    encoder_class = EncoderJSON
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact and not self.ensure_ascii and self.strict:
+            return dumps(data)
+        return _dumps_stdlib(
+            data,
+            indent=indent,
+            compacto=self.compact,
+            ensure_ascii=self.ensure_ascii,
+            estrito=self.strict,
+        )
+
+
+class JSONRapidoParser(JSONParser):
+    """`JSONParser` que lê o corpo com `orjson` quando disponível."""
+
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not acelerado():
+            return super().parse(stream, media_type, parser_context)
+
+        corpo = stream.read() if stream is not None else b""
+        if _INTEIRO_LONGO.search(corpo):
+            return super().parse(io.BytesIO(corpo), media_type, parser_context)
+        try:
+            if codecs.lookup(encoding).name == "utf-8":
+                return orjson.loads(corpo)
+            return orjson.loads(corpo.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            # mensagem de erro (e casos como inteiros enormes) iguais às do DRF
+            return super().parse(io.BytesIO(corpo), media_type, parser_context)
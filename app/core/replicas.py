@@ -0,0 +1,158 @@
+"""Leituras numa réplica do `default`, escritas sempre no primário.
+
+`REPLICA_DB` (settings) é o alias da réplica; vazio desliga tudo. Só
+requisições de métodos seguros leem da réplica (`TransacaoMiddleware` chama
+a view dentro de `na_replica`), e só o que iria para o `default`: shards não
+têm réplica. Continuam no primário:
+
+- leituras dentro de uma transação do `default` e de views marcadas com
+  `requisicao_atomica`;
+- as sessões (uma sessão velha manteria logado quem acabou de sair);
+- o que vai para o cache de respostas ou para o LRU de preços
+  (`no_primario`): um valor lido da réplica atrasada ficaria guardado sob a
+  versão nova do escopo até a próxima invalidação;
+- por `REPLICA_PIN_SEGUNDOS` depois de uma requisição que escreve, as
+  leituras da mesma sessão (cookie `primario_ate`), para que ela leia o que
+  acabou de gravar.
+
+A réplica local é uma cópia do arquivo do `default` aberta somente leitura,
+atualizada por `manage.py copy_replica --intervalo N`.
+"""
+
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+COOKIE = "primario_ate"
+# apps cujas leituras nunca vão para a réplica
+APPS_NO_PRIMARIO = {"sessions"}
+
+_na_replica: ContextVar[bool] = ContextVar("na_replica", default=False)
+
+
+def replica():
+    """Alias da réplica configurada, ou `""`."""
+    return settings.REPLICA_DB
+
+
+@contextmanager
+def na_replica():
+    """Leituras do `default` feitas neste contexto vão para a réplica."""
+    token = _na_replica.set(bool(replica()))
+    try:
+        yield
+    finally:
+        _na_replica.reset(token)
+
+
+@contextmanager
+def no_primario():
+    """Leituras feitas neste contexto ficam no primário."""
+    token = _na_replica.set(False)
+    try:
+        yield
+    finally:
+        _na_replica.reset(token)
+
+
+def leitura(alias):
+    """Banco de onde ler o que está em `alias` no contexto atual."""
+    if alias != DEFAULT_DB_ALIAS or not _na_replica.get():
+        return alias
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return alias
+    return replica() or alias
+
+
+def primario(alias):
+    """Banco onde gravar um objeto lido de `alias`."""
+    if alias and alias == replica():
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+class RoteadorDeReplica:
+    """Router: leituras do `default` na réplica quando `na_replica` vale.
+
+    Fica depois de `core.shards.RoteadorPorHost`, que já decide o banco dos
+    modelos do tenant e de leituras a partir de uma instância.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in APPS_NO_PRIMARIO:
+            return None
+        banco = leitura(DEFAULT_DB_ALIAS)
+        return banco if banco != DEFAULT_DB_ALIAS else None
+
+    def db_for_write(self, model, instance=None, **hints):
+        if instance is not None and instance._state.db == replica():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {primario(obj1._state.db), primario(obj2._state.db)}
+        return True if bancos == {DEFAULT_DB_ALIAS} else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if replica() and db == replica():
+            return False
+        return None
+
+
+def pode_ler_da_replica(request):
+    """Se a requisição (de método seguro) pode ler da réplica."""
+    if not replica():
+        return False
+    try:
+        ate = float(request.COOKIES.get(COOKIE, 0))
+    except ValueError:
+        ate = 0.0
+    return ate <= time.time()
+
+
+def fixar_no_primario(response):
+    """Mantém as próximas leituras da sessão no primário por um tempo."""
+    segundos = settings.REPLICA_PIN_SEGUNDOS
+    if not replica() or segundos <= 0:
+        return
+    response.set_cookie(
+        COOKIE,
+        f"{time.time() + segundos:.3f}",
+        max_age=math.ceil(segundos),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def iterar_na_replica(conteudo):
+    """Mantém a réplica para o corpo de uma resposta em streaming."""
+    with na_replica():
+        yield from conteudo
+
+
+def copiar(origem, destino):
+    """Copia o banco `origem` para o arquivo `destino` sem parar escritores.
+
+    Usa a API de backup do SQLite num arquivo temporário, deixa a cópia no
+    modo `DELETE` (abrível somente leitura sem `-wal`/`-shm`) e troca o
+    arquivo de uma vez: quem já tinha a réplica aberta continua lendo a cópia
+    anterior até reconectar.
+    """
+    destino = Path(destino)
+    temporario = destino.with_name(f"{destino.name}.tmp")
+    temporario.unlink(missing_ok=True)
+    fonte = sqlite3.connect(origem)
+    copia = sqlite3.connect(temporario)
+    try:
+        fonte.backup(copia)
+        copia.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        copia.close()
+        fonte.close()
+    temporario.replace(destino)
@@ -7,6 +7,7 @@ repositório (ex.: `.env`) com valores padrão.
 
 from pathlib import Path
 import os
+from urllib.parse import quote
 
 from django.core.exceptions import ImproperlyConfigured
 
@@ -68,10 +69,12 @@ INSTALLED_APPS = [
     "apps.holdings",
     "apps.transactions",
     "apps.accounts",
+    "core.apps.CoreConfig",
 ]
 
 
 MIDDLEWARE = [
+    "core.middleware.MetricasMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -79,6 +82,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # sempre o último: executa a view (numa transação só quando necessário)
+    "core.middleware.TransacaoMiddleware",
 ]
 
 
@@ -108,10 +113,148 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-        "ATOMIC_REQUESTS": True,
+        # Transação por requisição só para métodos inseguros e views marcadas:
+        # ver `core.middleware.TransacaoMiddleware`.
+        "ATOMIC_REQUESTS": False,
+        # Transações começam com BEGIN IMMEDIATE: escritores concorrentes
+        # esperam a vez (até `timeout` segundos) em vez de falharem com
+        # "database is locked" ao promover uma leitura para escrita.
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # Banco de testes em arquivo: o SQLite em memória compartilhada não
+        # aceita escritas de várias conexões, usadas nos testes de concorrência.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# Fragmentação por tenant (`core.shards`): `SHARDS=host:alias,host:alias`
+# leva portfólios, holdings e transações desses hosts para um arquivo SQLite
+# próprio (`<alias>.sqlite3` em `SHARDS_DIR`). Os demais hosts e as tabelas
+# compartilhadas ficam no `default`. Cada shard é migrado com
+# `manage.py migrate --database <alias>`.
+SHARDS: dict[str, str] = {}
+for _item in filter(None, os.environ.get("SHARDS", "").split(",")):
+    _host, _separador, _alias = _item.strip().partition(":")
+    if not (_host and _alias):
+        raise ImproperlyConfigured(f"Item inválido em SHARDS: {_item!r}")
+    SHARDS[_host] = _alias
+SHARDS_DIR = Path(os.environ.get("SHARDS_DIR", BASE_DIR))
+for _alias in sorted(set(SHARDS.values()) - {"default"}):
+    DATABASES[_alias] = {
+        **DATABASES["default"],
+        "NAME": SHARDS_DIR / f"{_alias}.sqlite3",
+        "TEST": {"NAME": SHARDS_DIR / f"test_{_alias}.sqlite3"},
+    }
+
+# Réplica de leitura (`core.replicas`): com `REPLICA_DB=<alias>`, GETs leem
+# do arquivo `REPLICA_ARQUIVO` (somente leitura) e as escritas continuam no
+# `default`. Depois de escrever, a sessão lê do primário por
+# `REPLICA_PIN_SEGUNDOS`. Localmente a réplica é uma cópia periódica do
+# `default`: `manage.py copy_replica --intervalo 2`.
+REPLICA_DB = os.environ.get("REPLICA_DB", "")
+REPLICA_ARQUIVO = Path(
+    os.environ.get("REPLICA_ARQUIVO", BASE_DIR / f"{REPLICA_DB or 'replica'}.sqlite3")
+)
+REPLICA_PIN_SEGUNDOS = float(os.environ.get("REPLICA_PIN_SEGUNDOS", "5"))
+if REPLICA_DB:
+    DATABASES[REPLICA_DB] = {
+        **DATABASES["default"],
+        "NAME": f"file:{quote(str(REPLICA_ARQUIVO))}?mode=ro",
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = [
+    "core.shards.RoteadorPorHost",
+    "core.replicas.RoteadorDeReplica",
+]
+
+# Perfil de desempenho do SQLite (opt-in): `SQLITE_PERFIL=desempenho` aplica
+# os PRAGMAs abaixo em cada conexão nova (ver `core/sqlite.py`). Cada valor
+# pode ser trocado pela variável de ambiente correspondente.
+SQLITE_PERFIL = os.environ.get("SQLITE_PERFIL", "")
+SQLITE_PRAGMAS: dict[str, str] = {}
+if SQLITE_PERFIL == "desempenho":
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # 256 MiB de mmap e ~64 MiB de cache de páginas (valor negativo = KiB)
+        "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", "268435456"),
+        "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-65536"),
+        "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+        "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "20000"),
+    }
+elif SQLITE_PERFIL:
+    raise ImproperlyConfigured(f"SQLITE_PERFIL desconhecido: {SQLITE_PERFIL!r}")
+
+
+# Cache usado pelas respostas de leitura (`core.cache`). CACHE_BACKEND=file
+# grava em disco (compartilhado entre processos); o padrão é memória local.
+if os.environ.get("CACHE_BACKEND", "locmem").lower() == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get(
+                "CACHE_LOCATION", str(BASE_DIR / ".cache")
+            ),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "carteira",
+        }
+    }
+
+# Por quantas horas uma `Idempotency-Key` de POST de transação é lembrada
+# (ver `apps/transactions/idempotencia.py`); as vencidas são apagadas por
+# `manage.py purge_idempotency_keys`.
+IDEMPOTENCIA_TTL_HORAS = int(os.environ.get("IDEMPOTENCIA_TTL_HORAS", "24"))
+
+# Custo das vendas no resultado realizado (`apps/transactions/lotes.py`):
+# `FIFO` (preço do lote mais antigo) ou `MEDIO` (preço médio do holding).
+# Depois de trocar, refaça os lotes com `manage.py rebuild_lots`.
+LOTES_METODO = os.environ.get("LOTES_METODO", "FIFO").upper()
+if LOTES_METODO not in ("FIFO", "MEDIO"):
+    raise ImproperlyConfigured(f"LOTES_METODO desconhecido: {LOTES_METODO!r}")
+
+# Quantas requisições mais lentas (com o SQL) ficam guardadas em memória
+# para `/metrics/slow/`; 0 desliga.
+METRICAS_LENTAS = int(os.environ.get("METRICAS_LENTAS", "20"))
+
+# Tempo (segundos) que uma resposta fica no cache; invalidações por versão
+# tornam a entrada inacessível antes disso.
+CACHE_RESPOSTAS_TIMEOUT = int(os.environ.get("CACHE_RESPOSTAS_TIMEOUT", "300"))
+
+# Últimos preços por ativo em LRU no processo (`apps.assets.precos`): número
+# máximo de ativos e se as entradas também vão para o cache do Django.
+PRECOS_LRU_TAMANHO = int(os.environ.get("PRECOS_LRU_TAMANHO", "10000"))
+PRECOS_CACHE_COMPARTILHADO = os.environ.get(
+    "PRECOS_CACHE_COMPARTILHADO", "False"
+).lower() in ("1", "true", "yes")
+
+# Segundos até o LRU de preços ser recarregado mesmo sem versão nova: com o
+# cache em memória local a versão não chega de outros processos (ex.:
+# `import_quotes`), então este é o atraso máximo de uma cotação; também limita
+# o tempo no cache dos resumos com `as_of`. 0 desliga.
+PRECOS_LRU_TTL = int(os.environ.get("PRECOS_LRU_TTL", "60"))
+
+# Linhas lidas do banco (e serializadas) por vez nas exportações em streaming.
+EXPORTACAO_LOTE = int(os.environ.get("EXPORTACAO_LOTE", "2000"))
+
+
+# O backend da sessão é gravado no login; o primeiro da lista é o usado por
+# `login()`/`force_login()` e carrega o perfil junto com o usuário. O
+# `ModelBackend` fica por uma versão para as sessões abertas antes do
+# `PerfilBackend`, que o referenciam e seriam encerradas sem ele.
+AUTHENTICATION_BACKENDS = [
+    "apps.accounts.backends.PerfilBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -151,8 +294,26 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": (
-        "rest_framework.pagination.PageNumberPagination"
-    ),
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.CursorPaginacao",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.JSONRapidoRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.JSONRapidoParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
+
+# JSON das respostas (ver `core/renderers.py`): usa `orjson` se instalado e
+# `JSON_ACELERADO` ligado; `JSON_DECIMAL` é "numero" (float) ou "texto".
+JSON_ACELERADO = os.environ.get("JSON_ACELERADO", "True").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+JSON_DECIMAL = os.environ.get("JSON_DECIMAL", "numero")
+if JSON_DECIMAL not in ("numero", "texto"):
+    raise ImproperlyConfigured(f"JSON_DECIMAL desconhecido: {JSON_DECIMAL!r}")
@@ -0,0 +1,459 @@
+"""Fragmentação dos dados dos tenants (`Portfolio.host`) em bancos separados.
+
+`SHARDS` (settings) mapeia host -> alias de banco; hosts fora do mapa ficam
+no `default`. `Portfolio`, `Holding`, `Transaction`, `HoldingSnapshot`, `Lot`
+e `RealizedGain` vivem no banco do host; as tabelas compartilhadas (ativos,
+cotações, usuários e perfis) só existem no `default`. Cada conexão de um
+shard anexa o arquivo do `default` somente leitura (`ATTACH ... AS
+compartilhado`), então os JOINs com `assets_asset`, `auth_user` etc.
+continuam funcionando sem copiar nada, e o `BEGIN IMMEDIATE` de um shard não
+trava o `default` nem os outros shards (todos em WAL, ver
+`preparar_conexao`). As chaves estrangeiras para essas tabelas não têm
+constraint no banco (`db_constraint=False`).
+
+O roteamento é automático: `RoteadorPorHost` segue o host de um `Portfolio`
+e o banco do pai de um `Holding`/`Transaction`, e `QuerySetDoTenant` escolhe
+o banco a partir dos filtros (`host=`, `portfolio__host=`, `portfolio=obj`,
+`holding__in=<queryset>`...). Consultas sem host (as do ADMIN_SUPER) usam
+`em_todos_os_bancos`, que as executa em cada banco em threads paralelas e
+junta os resultados na ordem da consulta.
+
+Excluir um ativo ou usuário (no `default`) exclui também, em cada shard,
+os portfólios, holdings e transações que dependem dele (`excluir_nos_shards`).
+
+Limitação: ids inteiros (`Holding`, `Transaction`) são sequenciais por
+banco e podem se repetir entre shards; só os ids de `Portfolio` (UUID) são
+únicos globalmente.
+"""
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import chain, islice
+from operator import attrgetter, itemgetter
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+from django.db.models import Q
+from django.db.models.signals import pre_delete
+from django.db.models.query import (
+    FlatValuesListIterable,
+    ModelIterable,
+    NamedValuesListIterable,
+    ValuesIterable,
+    ValuesListIterable,
+)
+
+from core.replicas import leitura, primario
+
+MODELOS_DO_TENANT = {
+    "portifolios.portfolio",
+    "holdings.holding",
+    "transactions.transaction",
+    "holdings.holdingsnapshot",
+    "transactions.lot",
+    "transactions.realizedgain",
+}
+APPS_DO_TENANT = {label.split(".")[0] for label in MODELOS_DO_TENANT}
+# relação com o pai, de onde um holding/transação herda o banco
+PAIS = {
+    "holdings.holding": "portfolio",
+    "transactions.transaction": "holding",
+    "holdings.holdingsnapshot": "holding",
+    "transactions.lot": "holding",
+    "transactions.realizedgain": "holding",
+}
+# lookups de filtro que fixam o host da consulta
+LOOKUPS_DE_HOST = {"host", "portfolio__host", "holding__portfolio__host"}
+ALIAS_COMPARTILHADO = "compartilhado"
+
+
+def do_tenant(model):
+    """Se o model (ou instância) é um dos fragmentados por host."""
+    return model._meta.label_lower in MODELOS_DO_TENANT
+
+
+def shards():
+    """Aliases dos shards configurados (sem o `default`)."""
+    return sorted(set(settings.SHARDS.values()) - {DEFAULT_DB_ALIAS})
+
+
+def bancos_de_tenants():
+    """Todos os bancos com dados de tenants: o `default` e os shards."""
+    return [DEFAULT_DB_ALIAS, *shards()]
+
+
+def banco_do_host(host):
+    return settings.SHARDS.get(host, DEFAULT_DB_ALIAS)
+
+
+def bancos_do_perfil(profile):
+    """Bancos de tenants em que uma requisição do perfil pode escrever."""
+    if profile is None or profile.role == profile.ROLE_ADMIN_SUPER:
+        return bancos_de_tenants()
+    return [banco_do_host(profile.host)]
+
+
+def preparar_conexao(sender, connection, **kwargs):
+    """`connection_created`: WAL nos bancos de tenants e o `default` anexado.
+
+    A transação de um shard mantém uma leitura aberta no `default` anexado;
+    no modo `DELETE` essa leitura impediria o commit de quem escreve no
+    `default`, por isso com shards todos os bancos de tenants usam WAL.
+    """
+    if connection.vendor != "sqlite" or not shards():
+        return
+    if connection.alias not in bancos_de_tenants():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        if connection.alias == DEFAULT_DB_ALIAS:
+            return
+        caminho = quote(str(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]))
+        cursor.execute(
+            f"ATTACH DATABASE 'file:{caminho}?mode=ro' AS {ALIAS_COMPARTILHADO}"
+        )
+
+
+def _banco_da_instancia(instance):
+    """Banco de uma instância de model do tenant, se já dá para saber."""
+    label = instance._meta.label_lower
+    if label == "portifolios.portfolio":
+        return banco_do_host(instance.host)
+    pai = instance._state.fields_cache.get(PAIS.get(label))
+    if pai is not None:
+        return _banco_da_instancia(pai)
+    return primario(instance._state.db)
+
+
+class RoteadorPorHost:
+    """Router: modelos do tenant no banco do host, o resto no `default`."""
+
+    def _banco(self, model, instance=None, **hints):
+        if not do_tenant(model):
+            # lido a partir de um objeto de shard (ex.: holding.asset)
+            return DEFAULT_DB_ALIAS if instance is not None else None
+        if instance is not None and do_tenant(instance):
+            return _banco_da_instancia(instance)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return leitura(self._banco(model, **hints))
+
+    db_for_write = _banco
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not (do_tenant(obj1) and do_tenant(obj2)):
+            return True
+        if obj1._state.adding or obj2._state.adding:
+            # o banco de um objeto novo é decidido ao salvar, pelo pai
+            return True
+        return _banco_da_instancia(obj1) == _banco_da_instancia(obj2)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in shards():
+            return None
+        if model_name is None:
+            return app_label in APPS_DO_TENANT
+        return f"{app_label}.{model_name}" in MODELOS_DO_TENANT
+
+
+def _banco_do_valor(lookup, valor):
+    if lookup in LOOKUPS_DE_HOST and isinstance(valor, str):
+        return banco_do_host(valor)
+    if isinstance(valor, models.Model) and do_tenant(valor):
+        return _banco_da_instancia(valor)
+    if isinstance(valor, models.QuerySet) and do_tenant(valor.model):
+        return valor._db
+    return None
+
+
+def _banco_dos_filtros(args, kwargs):
+    pendentes = [*args, *kwargs.items()]
+    while pendentes:
+        item = pendentes.pop()
+        if isinstance(item, Q):
+            # só condições que valem para todas as linhas (sem NOT nem OR)
+            if not item.negated and (
+                item.connector == Q.AND or len(item.children) == 1
+            ):
+                pendentes.extend(item.children)
+        elif isinstance(item, tuple):
+            banco = _banco_do_valor(*item)
+            if banco is not None:
+                return banco
+    return None
+
+
+def _separar(objs):
+    por_banco: dict = {}
+    for obj in objs:
+        banco = router.db_for_write(type(obj), instance=obj)
+        por_banco.setdefault(banco, []).append(obj)
+    return por_banco
+
+
+class QuerySetDoTenant(models.QuerySet):
+    """QuerySet que escolhe o banco pelos filtros e pelos objetos gravados.
+
+    Sem `.using()` explícito, um filtro por host ou por um objeto do tenant
+    fixa o banco da consulta; `create`, `bulk_create` e `bulk_update` gravam
+    cada objeto no banco do seu host.
+    """
+
+    def filter(self, *args, **kwargs):
+        qs = super().filter(*args, **kwargs)
+        if qs._db is None:
+            banco = _banco_dos_filtros(args, kwargs)
+            # o `default` fica com o router, que pode mandar à réplica
+            if banco != DEFAULT_DB_ALIAS:
+                qs._db = banco
+        return qs
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=router.db_for_write(self.model, instance=obj))
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        for banco, grupo in _separar(objs).items():
+            self.using(banco).bulk_create(grupo, *args, **kwargs)
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs):
+        if self._db is not None:
+            return super().bulk_update(objs, *args, **kwargs)
+        return sum(
+            self.using(banco).bulk_update(grupo, *args, **kwargs)
+            for banco, grupo in _separar(objs).items()
+        )
+
+
+GerenciadorDoTenant = models.Manager.from_queryset(QuerySetDoTenant)
+
+
+def separar_por_banco(model, pks):
+    """`{banco: [pk, ...]}` dos objetos do tenant com esses pks."""
+    pks = list(pks)
+    bancos = bancos_de_tenants()
+    if len(bancos) == 1:
+        return {bancos[0]: pks}
+    por_banco = em_paralelo(
+        lambda banco: list(
+            model.objects.using(leitura(banco))
+            .filter(pk__in=pks)
+            .values_list("pk", flat=True)
+        ),
+        bancos,
+    )
+    return {banco: ids for banco, ids in zip(bancos, por_banco) if ids}
+
+
+def em_paralelo(funcao, bancos):
+    """`[funcao(banco) for banco in bancos]`, um banco por thread.
+
+    Com um banco só roda na thread atual (e dentro da transação corrente).
+    """
+    if len(bancos) == 1:
+        return [funcao(bancos[0])]
+
+    def executar(banco):
+        try:
+            return funcao(banco)
+        finally:
+            # conexões são por thread: fecha as que esta thread abriu
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(bancos)) as executor:
+        # cada thread herda o contexto (ex.: leitura na réplica)
+        tarefas = [
+            executor.submit(copy_context().run, executar, banco) for banco in bancos
+        ]
+        return [tarefa.result() for tarefa in tarefas]
+
+
+def _dependentes_nos_shards(model):
+    """`[(model do tenant, coluna)]` que apontam em CASCADE para `model`."""
+    dependentes = []
+    for label in sorted(MODELOS_DO_TENANT):
+        for campo in apps.get_model(label)._meta.concrete_fields:
+            if (
+                campo.many_to_one
+                and campo.related_model is model
+                and campo.remote_field.on_delete is models.CASCADE
+            ):
+                dependentes.append((campo.model, campo.attname))
+    return dependentes
+
+
+def excluir_nos_shards(sender, instance, **kwargs):
+    """`pre_delete` de um model compartilhado: o CASCADE chega aos shards.
+
+    O coletor do Django só exclui os dependentes no banco do objeto (o
+    `default`); os de cada shard são excluídos aqui, e o CASCADE dentro do
+    shard (holdings -> transações, lotes...) segue pelo coletor de lá.
+    """
+    if not shards():
+        return
+    dependentes = _dependentes_nos_shards(sender)
+
+    def excluir(banco):
+        for model, coluna in dependentes:
+            model._base_manager.using(banco).filter(**{coluna: instance.pk}).delete()
+
+    em_paralelo(excluir, shards())
+
+
+def conectar_exclusoes():
+    """Liga `excluir_nos_shards` aos models compartilhados com dependentes."""
+    compartilhados = {
+        campo.related_model
+        for label in MODELOS_DO_TENANT
+        for campo in apps.get_model(label)._meta.concrete_fields
+        if campo.many_to_one and not do_tenant(campo.related_model)
+    }
+    for model in compartilhados:
+        if _dependentes_nos_shards(model):
+            pre_delete.connect(
+                excluir_nos_shards,
+                sender=model,
+                dispatch_uid=f"shards_cascata_{model._meta.label_lower}",
+            )
+
+
+def _chave_de_ordenacao(queryset):
+    """`(chave, reverso)` para juntar linhas na ordem da consulta, ou `None`."""
+    query = queryset.query
+    ordem = list(query.order_by)
+    if not ordem and query.default_ordering:
+        ordem = list(queryset.model._meta.ordering)
+    if not ordem or not all(isinstance(campo, str) for campo in ordem):
+        return None
+    direcoes = {campo.startswith("-") for campo in ordem}
+    if len(direcoes) != 1:
+        return None
+    reverso = direcoes.pop() == query.standard_ordering
+    nomes = [campo.lstrip("-") for campo in ordem]
+    nomes = [queryset.model._meta.pk.name if n == "pk" else n for n in nomes]
+
+    classe = queryset._iterable_class
+    campos = list(queryset._fields or ())
+    if classe is ModelIterable:
+        return attrgetter(*nomes), reverso
+    if classe is ValuesIterable and (not campos or set(nomes) <= set(campos)):
+        return itemgetter(*nomes), reverso
+    if classe is FlatValuesListIterable and nomes == campos:
+        return (lambda valor: valor), reverso
+    if classe in (ValuesListIterable, NamedValuesListIterable) and (
+        set(nomes) <= set(campos)
+    ):
+        return itemgetter(*(campos.index(nome) for nome in nomes)), reverso
+    return None
+
+
+class ConsultaEmTodosOsBancos:
+    """Uma consulta do tenant executada em todos os bancos.
+
+    Aceita o subconjunto de `QuerySet` usado pelas views, pela paginação por
+    cursor e pelas exportações: métodos encadeáveis são aplicados à consulta
+    base; iterar, fatiar, `get`, `count` e `exists` executam em cada banco em
+    paralelo e juntam as linhas na ordem da consulta.
+    """
+
+    ENCADEAVEIS = {
+        "filter",
+        "exclude",
+        "order_by",
+        "values",
+        "values_list",
+        "select_related",
+        "prefetch_related",
+        "annotate",
+        "only",
+        "defer",
+        "distinct",
+        "all",
+        "none",
+    }
+
+    def __init__(self, queryset, bancos):
+        self.queryset = queryset
+        self.bancos = bancos
+        self.model = queryset.model
+
+    def __getattr__(self, nome):
+        if nome not in self.ENCADEAVEIS:
+            raise AttributeError(nome)
+        metodo = getattr(self.queryset, nome)
+
+        def encadear(*args, **kwargs):
+            return ConsultaEmTodosOsBancos(metodo(*args, **kwargs), self.bancos)
+
+        return encadear
+
+    def _em_cada_banco(self, funcao):
+        return em_paralelo(
+            lambda banco: funcao(self.queryset.using(leitura(banco))), self.bancos
+        )
+
+    def _juntar(self, partes):
+        ordem = _chave_de_ordenacao(self.queryset)
+        if ordem is None:
+            return chain.from_iterable(partes)
+        chave, reverso = ordem
+        return heapq.merge(*partes, key=chave, reverse=reverso)
+
+    def __iter__(self):
+        return iter(list(self._juntar(self._em_cada_banco(list))))
+
+    def __getitem__(self, fatia):
+        if not isinstance(fatia, slice) or fatia.step is not None:
+            raise TypeError("Só fatias simples são suportadas em todos os bancos.")
+        inicio, fim = fatia.start or 0, fatia.stop
+        partes = self._em_cada_banco(lambda qs: list(qs if fim is None else qs[:fim]))
+        return list(islice(self._juntar(partes), inicio, fim))
+
+    def iterator(self, chunk_size=None):
+        """Lê banco a banco em lotes; a junção ordenada também é preguiçosa."""
+        return self._juntar(
+            self.queryset.using(leitura(banco)).iterator(chunk_size=chunk_size)
+            for banco in self.bancos
+        )
+
+    def get(self, *args, **kwargs):
+        encontrados = list(
+            chain.from_iterable(
+                self._em_cada_banco(lambda qs: list(qs.filter(*args, **kwargs)[:2]))
+            )
+        )
+        if not encontrados:
+            raise self.model.DoesNotExist(
+                f"{self.model._meta.object_name} matching query does not exist."
+            )
+        if len(encontrados) > 1:
+            raise self.model.MultipleObjectsReturned(
+                f"get() returned more than one {self.model._meta.object_name}."
+            )
+        return encontrados[0]
+
+    def count(self):
+        return sum(self._em_cada_banco(lambda qs: qs.count()))
+
+    def exists(self):
+        return any(self._em_cada_banco(lambda qs: qs.exists()))
+
+
+def em_todos_os_bancos(queryset):
+    """`queryset` em todos os bancos de tenants (sem shards, ele mesmo)."""
+    bancos = bancos_de_tenants()
+    if len(bancos) == 1:
+        return queryset
+    return ConsultaEmTodosOsBancos(queryset, bancos)
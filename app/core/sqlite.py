@@ -0,0 +1,40 @@
+"""Perfil de desempenho do SQLite aplicado a cada nova conexão.
+
+Ligado por `SQLITE_PERFIL=desempenho` (ver `SQLITE_PRAGMAS` em settings).
+Com WAL leitores não esperam o escritor e `synchronous=NORMAL` tira o fsync
+de cada commit (um commit pode se perder numa queda de energia, mas o banco
+não corrompe). `journal_mode=WAL` fica gravado no arquivo do banco: desligar
+o perfil não volta o arquivo para o modo `DELETE`.
+"""
+
+import re
+
+from django.conf import settings
+
+PRAGMAS_PERMITIDOS = {
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "busy_timeout",
+}
+_VALOR = re.compile(r"^-?\w+$")
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None) or {}
+    if not pragmas:
+        return
+    # a réplica (`core.replicas`) é aberta somente leitura e não troca de modo
+    somente_leitura = "mode=ro" in str(connection.settings_dict["NAME"])
+    with connection.cursor() as cursor:
+        for nome, valor in pragmas.items():
+            if somente_leitura and nome == "journal_mode":
+                continue
+            # os valores vêm de variáveis de ambiente e entram no SQL como texto
+            if nome not in PRAGMAS_PERMITIDOS or not _VALOR.match(str(valor)):
+                raise ValueError(f"PRAGMA inválido: {nome}={valor!r}")
+            cursor.execute(f"PRAGMA {nome} = {valor}")
@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from core import cache as cache_respostas
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(params=["locmem", "file"])
+def backend(request, tmp_path):
+    if request.param == "locmem":
+        yield
+        return
+    caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    with override_settings(CACHES=caches):
+        yield
+
+
+@pytest.fixture
+def senior(db):
+    user = User.objects.create_user(username="senior_cache", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_SENIOR
+    profile.host = "alpha"
+    profile.save()
+    client = APIClient()
+    client.login(username="senior_cache", password="pass")
+    return user, client
+
+
+def _comprar(client, portfolio, asset, quantidade):
+    resp = client.post(
+        f"/api/portfolios/{portfolio.id}/transactions/",
+        {
+            "asset": asset.id,
+            "tipo": "COMPRA",
+            "quantidade": quantidade,
+            "preco": "10.00",
+            "data": "2025-11-11",
+        },
+        format="json",
+    )
+    assert resp.status_code == 201
+
+
+def test_summary_em_cache_e_invalidado_por_transacao(backend, senior):
+    user, client = senior
+    portfolio = Portfolio.objects.create(nome="Pc", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="CCH", nome="Cache", tipo="ACAO")
+    _comprar(client, portfolio, asset, "1.00")
+    url = f"/api/portfolios/{portfolio.id}/summary/"
+
+    primeira = client.get(url)
+    segunda = client.get(url)
+    assert (primeira["X-Cache"], segunda["X-Cache"]) == ("MISS", "HIT")
+    assert primeira.json() == segunda.json()
+
+    _comprar(client, portfolio, asset, "2.00")
+    terceira = client.get(url)
+    assert terceira["X-Cache"] == "MISS"
+    assert terceira.json()["totais"]["quantidade"] == 3.0
+    assert cache_respostas.estatisticas() == {"hits": 1, "misses": 2}
+
+
+def test_lista_de_holdings_em_cache_por_host(backend, senior):
+    user, client = senior
+    portfolio = Portfolio.objects.create(nome="Pl", host="alpha", criado_por=user)
+    asset = Asset.objects.create(ticker="CCL", nome="Cache L", tipo="ACAO")
+    holding = Holding.objects.create(portfolio=portfolio, asset=asset)
+
+    assert client.get("/api/holdings/")["X-Cache"] == "MISS"
+    assert client.get("/api/holdings/")["X-Cache"] == "HIT"
+
+    # alteração em outro host não invalida a lista do host alpha
+    outro = Portfolio.objects.create(nome="Pb", host="beta", criado_por=user)
+    Holding.objects.create(portfolio=outro, asset=asset)
+    assert client.get("/api/holdings/")["X-Cache"] == "HIT"
+
+    holding.quantidade_total = Decimal("5.00")
+    holding.save()
+    resp = client.get("/api/holdings/")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.json()["results"][0]["quantidade_total"] == "5.00"
+
+
+@pytest.mark.django_db
+def test_invalidacao_repete_no_commit(django_capture_on_commit_callbacks):
+    escopo = cache_respostas.escopo_portfolio("p1")
+    antes = cache_respostas.chave([escopo], "x")
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        cache_respostas.invalidar(escopo)
+        durante = cache_respostas.chave([escopo], "x")
+        assert durante != antes
+
+    assert len(callbacks) == 1
+    callbacks[0]()
+    # uma resposta guardada por outro processo antes do commit fica inacessível
+    assert cache_respostas.chave([escopo], "x") not in (antes, durante)
+
+
+@override_settings(PRECOS_LRU_TTL=30, CACHE_RESPOSTAS_TIMEOUT=300)
+def test_summary_com_as_of_expira_com_o_ttl_dos_precos(senior, monkeypatch):
+    user, client = senior
+    portfolio = Portfolio.objects.create(nome="Pt", host="alpha", criado_por=user)
+    timeouts = []
+    guardar = cache_respostas.cache.set
+
+    def registrar(chave, valor, timeout):
+        timeouts.append(timeout)
+        guardar(chave, valor, timeout=timeout)
+
+    monkeypatch.setattr(cache_respostas.cache, "set", registrar)
+    url = f"/api/portfolios/{portfolio.id}/summary/"
+    assert client.get(url)["X-Cache"] == "MISS"
+    assert client.get(url, {"as_of": "2025-11-11"})["X-Cache"] == "MISS"
+    assert timeouts == [300, 30]
+
+    with override_settings(PRECOS_LRU_TTL=0):
+        client.get(url, {"as_of": "2025-11-12"})
+    assert timeouts[-1] == 300
@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.holdings.serializers import HoldingSerializer
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Transaction
+from apps.transactions.serializers import TransactionSerializer
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+def _cliente(username, role, host):
+    user = User.objects.create_user(username=username, password="pass")
+    UserProfile.objects.filter(user=user).update(role=role, host=host)
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return user, client
+
+
+@pytest.fixture
+def junior_alpha(db):
+    return _cliente("junior_export", UserProfile.ROLE_INVESTIDOR_JUNIOR, "alpha")
+
+
+def _popular(user, host, holdings, transacoes_por_holding=0):
+    portfolio = Portfolio.objects.create(nome=f"Exp {host}", host=host, criado_por=user)
+    ativos = Asset.objects.bulk_create(
+        Asset(ticker=f"{host[:2].upper()}{i}", nome=f"Exp {i}", tipo="ACAO")
+        for i in range(holdings)
+    )
+    criados = Holding.objects.bulk_create(
+        Holding(
+            portfolio=portfolio,
+            asset=ativo,
+            quantidade_total=Decimal("10.00"),
+            preco_medio=Decimal("5.25"),
+        )
+        for ativo in ativos
+    )
+    Transaction.objects.bulk_create(
+        (
+            Transaction(
+                holding=holding,
+                tipo="COMPRA",
+                quantidade=Decimal("1.00"),
+                preco=Decimal("5.25"),
+                data=date(2025, 1, 1 + i % 28),
+                criado_por=user,
+            )
+            for holding in criados
+            for i in range(transacoes_por_holding)
+        ),
+        batch_size=1000,
+    )
+    return portfolio
+
+
+def _corpo(resp):
+    return b"".join(resp.streaming_content).decode("utf-8")
+
+
+def test_export_csv_de_holdings_tem_a_saida_do_serializer(junior_alpha):
+    user, client = junior_alpha
+    _popular(user, "alpha", 3)
+    outro, _ = _cliente("outro_export", UserProfile.ROLE_INVESTIDOR_SENIOR, "beta")
+    _popular(outro, "beta", 2)
+
+    resp = client.get("/api/holdings/export/?format=csv")
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "text/csv; charset=utf-8"
+    assert resp["Content-Disposition"] == 'attachment; filename="holdings.csv"'
+    linhas = list(csv.DictReader(io.StringIO(_corpo(resp))))
+    esperado = HoldingSerializer(
+        Holding.objects.filter(portfolio__host="alpha").order_by("id"), many=True
+    ).data
+    assert linhas == [{k: str(v) for k, v in item.items()} for item in esperado]
+
+
+def test_export_ndjson_de_transacoes_respeita_escopo_e_filtros(junior_alpha):
+    user, client = junior_alpha
+    _popular(user, "alpha", 2, transacoes_por_holding=3)
+    _popular(user, "beta", 2, transacoes_por_holding=3)
+
+    resp = client.get("/api/transactions/export/?format=ndjson&data_fim=2025-01-02")
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/x-ndjson"
+    linhas = [json.loads(linha) for linha in _corpo(resp).splitlines()]
+    esperado = TransactionSerializer(
+        Transaction.objects.filter(
+            holding__portfolio__host="alpha", data__lte=date(2025, 1, 2)
+        ).order_by("id"),
+        many=True,
+    ).data
+    assert linhas == [dict(item) for item in esperado]
+    assert len(linhas) == 4
+
+
+def test_export_csv_achata_expansoes_e_so_cabecalho_sem_linhas(junior_alpha):
+    user, client = junior_alpha
+    _popular(user, "alpha", 1, transacoes_por_holding=1)
+
+    resp = client.get(
+        "/api/transactions/export/?fields=id,criado_por&expand=criado_por"
+    )
+    assert _corpo(resp).splitlines() == [
+        "id,criado_por.id,criado_por.username",
+        f"{Transaction.objects.get().id},{user.id},junior_export",
+    ]
+
+    resp = client.get("/api/transactions/export/?format=csv&tipo=VENDA")
+    assert _corpo(resp).splitlines() == [
+        "id,holding,asset,tipo,quantidade,preco,data,criado_por,criado_em"
+    ]
+
+
+def test_export_com_formato_desconhecido_da_400_em_json(junior_alpha):
+    _user, client = junior_alpha
+
+    resp = client.get("/api/holdings/export/?format=xlsx")
+
+    assert resp.status_code == 400
+    assert resp["Content-Type"] == "application/json"
+    assert "format" in resp.json()
+
+
+def test_export_exige_autenticacao(db):
+    assert APIClient().get("/api/transactions/export/").status_code == 403
+
+
+def _pico_de_memoria(client, url):
+    tracemalloc.start()
+    try:
+        resp = client.get(url)
+        tamanho = sum(len(pedaco) for pedaco in resp.streaming_content)
+        _atual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return tamanho, pico
+
+
+@override_settings(EXPORTACAO_LOTE=100)
+def test_memoria_da_exportacao_nao_cresce_com_o_numero_de_linhas(junior_alpha):
+    """O pico de memória com 8x mais linhas fica no mesmo patamar.
+
+    Versão reduzida da medição com 1M de linhas de `benchmarks.exportacao`.
+    """
+    user, client = junior_alpha
+    portfolio = _popular(user, "alpha", 10, transacoes_por_holding=50)
+    url = "/api/transactions/export/?format=ndjson"
+    _pico_de_memoria(client, url)  # aquecimento: imports e caches do Django
+    tamanho_pequeno, pico_pequeno = _pico_de_memoria(client, url)
+
+    holdings = list(Holding.objects.filter(portfolio=portfolio))
+    Transaction.objects.bulk_create(
+        (
+            Transaction(
+                holding=holdings[i % len(holdings)],
+                tipo="COMPRA",
+                quantidade=Decimal("1.00"),
+                preco=Decimal("5.25"),
+                data=date(2025, 2, 1),
+                criado_por=user,
+            )
+            for i in range(3500)
+        ),
+        batch_size=1000,
+    )
+    tamanho_grande, pico_grande = _pico_de_memoria(client, url)
+
+    assert tamanho_grande > 7 * tamanho_pequeno
+    assert pico_grande < 1.5 * pico_pequeno
+    # o corpo inteiro nunca fica em memória
+    assert pico_grande < tamanho_grande
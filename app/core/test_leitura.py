@@ -0,0 +1,154 @@
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.holdings.serializers import HoldingSerializer
+from apps.portifolios.models import Portfolio
+from apps.portifolios.serializers import PortfolioSerializer
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def senior_alpha(db):
+    user = User.objects.create_user(username="senior_leitura", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_SENIOR
+    profile.host = "alpha"
+    profile.save()
+    client = APIClient()
+    client.login(username="senior_leitura", password="pass")
+    return user, client
+
+
+def _criar_portfolios(user, quantidade):
+    portfolios = []
+    for i in range(quantidade):
+        dono = User.objects.create_user(username=f"dono_leitura{i}", password="x")
+        portfolios.append(
+            Portfolio.objects.create(nome=f"P{i}", host="alpha", criado_por=dono)
+        )
+    return portfolios
+
+
+def _criar_holdings(portfolio, quantidade):
+    for i in range(quantidade):
+        asset = Asset.objects.create(ticker=f"LEV{i}", nome=f"Leve {i}", tipo="ACAO")
+        Holding.objects.create(
+            portfolio=portfolio,
+            asset=asset,
+            quantidade_total=Decimal("3.50"),
+            preco_medio=Decimal("7.10"),
+        )
+
+
+def test_lista_de_portfolios_igual_a_do_serializer_de_model(senior_alpha):
+    user, client = senior_alpha
+    _criar_portfolios(user, 3)
+
+    resp = client.get("/api/portfolios/")
+
+    assert resp.status_code == 200
+    esperado = PortfolioSerializer(Portfolio.objects.order_by("id"), many=True).data
+    assert resp.json()["results"] == [dict(item) for item in esperado]
+
+
+def test_lista_de_portfolios_nao_faz_n_mais_1_em_criado_por(senior_alpha):
+    user, client = senior_alpha
+    _criar_portfolios(user, 2)
+    with CaptureQueriesContext(connection) as poucos:
+        assert client.get("/api/portfolios/").status_code == 200
+
+    for i in range(2, 8):
+        dono = User.objects.create_user(username=f"outro_leitura{i}", password="x")
+        Portfolio.objects.create(nome=f"P{i}", host="alpha", criado_por=dono)
+    with CaptureQueriesContext(connection) as muitos:
+        assert client.get("/api/portfolios/").status_code == 200
+
+    assert len(muitos) == len(poucos)
+
+
+def test_detalhe_de_portfolio_igual_ao_do_serializer_de_model(senior_alpha):
+    user, client = senior_alpha
+    (portfolio,) = _criar_portfolios(user, 1)
+
+    resp = client.get(f"/api/portfolios/{portfolio.id}/")
+
+    assert resp.status_code == 200
+    assert resp.json() == dict(PortfolioSerializer(portfolio).data)
+
+
+def test_detalhe_fora_do_escopo_ou_invalido_da_404(senior_alpha):
+    _user, client = senior_alpha
+    outro = User.objects.create_user(username="beta_leitura", password="x")
+    portfolio = Portfolio.objects.create(nome="B", host="beta", criado_por=outro)
+
+    assert client.get(f"/api/portfolios/{portfolio.id}/").status_code == 404
+    assert client.get("/api/portfolios/nao-e-uuid/").status_code == 404
+
+
+def test_lista_de_holdings_igual_a_do_serializer_de_model(senior_alpha):
+    user, client = senior_alpha
+    (portfolio,) = _criar_portfolios(user, 1)
+    _criar_holdings(portfolio, 3)
+
+    resp = client.get("/api/holdings/")
+
+    assert resp.status_code == 200
+    esperado = HoldingSerializer(Holding.objects.order_by("id"), many=True).data
+    assert resp.json()["results"] == [dict(item) for item in esperado]
+
+
+def test_fields_limita_os_campos_e_expand_aninha_a_relacao(senior_alpha):
+    user, client = senior_alpha
+    (portfolio,) = _criar_portfolios(user, 1)
+    _criar_holdings(portfolio, 1)
+    holding = Holding.objects.get()
+
+    resp = client.get("/api/holdings/?fields=id,asset,preco_medio&expand=asset")
+
+    assert resp.status_code == 200
+    assert resp.json()["results"] == [
+        {
+            "id": holding.id,
+            "asset": {
+                "id": holding.asset_id,
+                "ticker": "LEV0",
+                "nome": "Leve 0",
+                "tipo": "ACAO",
+            },
+            "preco_medio": "7.10",
+        }
+    ]
+
+
+def test_fields_sem_id_ainda_pagina_por_cursor(senior_alpha):
+    user, client = senior_alpha
+    (portfolio,) = _criar_portfolios(user, 1)
+    _criar_holdings(portfolio, 3)
+
+    pagina = client.get("/api/holdings/?fields=asset&page_size=2").json()
+    seguinte = client.get(pagina["next"]).json()
+
+    assert [h["asset"] for h in pagina["results"] + seguinte["results"]] == [
+        "LEV0 - Leve 0",
+        "LEV1 - Leve 1",
+        "LEV2 - Leve 2",
+    ]
+    assert set(pagina["results"][0]) == {"asset"}
+
+
+def test_campo_ou_expansao_desconhecidos_dao_400(senior_alpha):
+    _user, client = senior_alpha
+
+    resp = client.get("/api/portfolios/?fields=nome,senha")
+    assert resp.status_code == 400
+    assert resp.json() == {"fields": ["Campo desconhecido: senha"]}
+
+    resp = client.get("/api/holdings/?expand=quantidade_total")
+    assert resp.status_code == 400
+    assert "expand" in resp.json()
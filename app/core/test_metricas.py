@@ -0,0 +1,73 @@
+import pytest
+from apps.accounts.models import UserProfile
+from apps.portifolios.models import Portfolio
+from core import metricas
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+def _cliente(username, role, host=""):
+    user = User.objects.create_user(username=username, password="pass")
+    UserProfile.objects.filter(user=user).update(role=role, host=host)
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return user, client
+
+
+@pytest.fixture
+def admin_client(db):
+    user, client = _cliente("admin_metricas", UserProfile.ROLE_ADMIN_SUPER)
+    Portfolio.objects.create(nome="Pm", host="alpha", criado_por=user)
+    return client
+
+
+def test_metrics_exporta_latencia_consultas_e_tamanho(admin_client):
+    resp = admin_client.get("/api/portfolios/")
+    assert resp.status_code == 200
+
+    texto = admin_client.get("/metrics").content.decode()
+
+    rotulos = '{view="portfolios-list",method="GET"}'
+    assert f"http_request_duration_seconds_count{rotulos} 1" in texto
+    assert (
+        'http_request_duration_seconds_bucket{view="portfolios-list",'
+        'method="GET",le="+Inf"} 1'
+    ) in texto
+    assert f"http_response_bytes_total{rotulos} {len(resp.content)}" in texto
+    consultas = next(
+        linha
+        for linha in texto.splitlines()
+        if linha.startswith(f"http_db_queries_total{rotulos}")
+    )
+    assert int(consultas.split()[-1]) >= 2
+    assert 'cache_respostas_total{resultado="hit"} 0' in texto
+
+
+def test_metrics_so_para_admin(db):
+    _user, junior = _cliente("junior_metricas", UserProfile.ROLE_INVESTIDOR_JUNIOR)
+
+    assert junior.get("/metrics").status_code == 403
+    assert APIClient().get("/metrics").status_code == 403
+    assert junior.get("/metrics/slow/").status_code == 403
+
+
+@override_settings(METRICAS_LENTAS=2)
+def test_guarda_apenas_as_requisicoes_mais_lentas_com_sql():
+    for latencia in (0.3, 0.1, 0.5, 0.2):
+        metricas.registrar("v", "GET", 200, latencia, 1, 0.01, 10, [f"SQL {latencia}"])
+
+    lentas = metricas.requisicoes_lentas()
+
+    assert [r["latencia"] for r in lentas] == [0.5, 0.3]
+    assert lentas[0]["sql"] == ["SQL 0.5"]
+
+
+def test_slow_lista_requisicoes_com_sql(admin_client):
+    admin_client.get("/api/portfolios/")
+
+    lentas = admin_client.get("/metrics/slow/").json()
+
+    listagem = next(r for r in lentas if r["view"] == "portfolios-list")
+    assert listagem["consultas"] == len(listagem["sql"])
+    assert any("portifolios_portfolio" in sql for sql in listagem["sql"])
@@ -0,0 +1,49 @@
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from core.pagination import CursorPaginacao
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def client(db):
+    user = User.objects.create_user(username="junior_pag", password="pass")
+    profile = UserProfile.objects.get(user=user)
+    profile.role = UserProfile.ROLE_INVESTIDOR_JUNIOR
+    profile.host = "alpha"
+    profile.save()
+    client = APIClient()
+    client.login(username="junior_pag", password="pass")
+    return client
+
+
+def _ativos(quantidade):
+    Asset.objects.bulk_create(
+        Asset(ticker=f"PG{i}", nome=f"Pag {i}", tipo="ACAO") for i in range(quantidade)
+    )
+
+
+def test_cursor_percorre_todas_as_paginas_sem_count(client):
+    _ativos(25)
+
+    tickers = []
+    url = "/api/assets/"
+    paginas = 0
+    while url:
+        data = client.get(url).json()
+        assert "count" not in data
+        tickers += [item["ticker"] for item in data["results"]]
+        url = data["next"]
+        paginas += 1
+
+    assert paginas == 3
+    assert tickers == [f"PG{i}" for i in range(25)]
+
+
+def test_page_size_escolhido_pelo_cliente_e_limitado(client):
+    _ativos(CursorPaginacao.max_page_size + 5)
+
+    assert len(client.get("/api/assets/?page_size=7").json()["results"]) == 7
+    limitado = client.get("/api/assets/?page_size=100000").json()
+    assert len(limitado["results"]) == CursorPaginacao.max_page_size
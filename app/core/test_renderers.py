@@ -0,0 +1,107 @@
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from core import renderers
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+pytestmark = pytest.mark.skipif(renderers.orjson is None, reason="sem orjson")
+
+DADOS = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "preco": Decimal("21.30"),
+    "quantidade": Decimal("3"),
+    "texto": 'ação \u2028 \x1f "aspas" / barra',
+    "lazy": gettext_lazy("Compra"),
+    "quando": datetime(2025, 11, 11, 10, 30, 15, 123456, tzinfo=timezone.utc),
+    "dia": date(2025, 11, 11),
+    "linhas": ReturnDict(  # type: ignore[call-overload]
+        {"a": [1, 2.5, None, True]}, serializer=None
+    ),
+    7: "chave inteira",
+    "grande": 2**70,
+}
+
+
+def _renderizar(dados, acelerado):
+    with override_settings(JSON_ACELERADO=acelerado):
+        return renderers.JSONRapidoRenderer().render(dados)
+
+
+def test_orjson_e_biblioteca_padrao_geram_os_mesmos_bytes_do_drf():
+    esperado = JSONRenderer().render(DADOS)
+
+    assert _renderizar(DADOS, acelerado=True) == esperado
+    assert _renderizar(DADOS, acelerado=False) == esperado
+
+
+@override_settings(JSON_DECIMAL="texto")
+@pytest.mark.parametrize("acelerado", [True, False])
+def test_decimal_como_texto(acelerado):
+    saida = _renderizar({"preco": Decimal("21.30")}, acelerado)
+
+    assert saida == b'{"preco":"21.30"}'
+
+
+def test_indentacao_usa_biblioteca_padrao():
+    saida = renderers.JSONRapidoRenderer().render(
+        {"a": 1}, "application/json; indent=2"
+    )
+
+    assert saida == b'{\n  "a": 1\n}'
+
+
+@pytest.mark.parametrize("acelerado", [True, False])
+def test_parser_le_json_e_mantem_erros_do_drf(acelerado):
+    parser = renderers.JSONRapidoParser()
+    with override_settings(JSON_ACELERADO=acelerado):
+        assert parser.parse(BytesIO(b'{"a": [1, 2.5, "\\u00e7"]}')) == {
+            "a": [1, 2.5, "ç"]
+        }
+        assert parser.parse(BytesIO(b'{"n": 123456789012345678901234}')) == {
+            "n": 123456789012345678901234
+        }
+        with pytest.raises(ParseError, match="JSON parse error"):
+            parser.parse(BytesIO(b'{"a": NaN}'))
+
+
+@pytest.mark.parametrize(
+    "valor",
+    [
+        Decimal("12345678901234567890"),
+        Decimal("1E-7"),
+        Decimal("0.00001"),
+        Decimal("0.0001"),
+        Decimal("-0.00"),
+    ],
+)
+def test_decimal_que_viraria_float_com_expoente_sai_como_no_drf(valor):
+    esperado = JSONRenderer().render({"v": valor})
+
+    assert _renderizar({"v": valor}, acelerado=True) == esperado
+    assert _renderizar({"v": valor}, acelerado=False) == esperado
+
+
+@pytest.mark.parametrize("valor", [Decimal("NaN"), Decimal("Infinity")])
+@pytest.mark.parametrize("acelerado", [True, False])
+def test_decimal_nao_finito_e_recusado_como_no_drf(valor, acelerado):
+    with pytest.raises(ValueError, match="Out of range float"):
+        JSONRenderer().render({"v": valor})
+    with pytest.raises(ValueError, match="Out of range float"):
+        _renderizar({"v": valor}, acelerado)
+
+
+def test_float_nativo_fora_da_faixa_sai_no_formato_do_orjson():
+    dados = [1e16, 1e-7, 0.0001, float("nan"), float("inf")]
+
+    # floats nativos não são inspecionados; a biblioteca padrão segue o DRF
+    assert _renderizar(dados, acelerado=True) == b"[1e16,1e-7,0.0001,null,null]"
+    assert _renderizar(dados[:3], acelerado=False) == JSONRenderer().render(dados[:3])
+    with pytest.raises(ValueError):
+        _renderizar(dados, acelerado=False)
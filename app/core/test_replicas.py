@@ -0,0 +1,136 @@
+from decimal import Decimal
+from io import StringIO
+from urllib.parse import quote
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.models import Portfolio
+from core import replicas
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+# transaction=True: a réplica é outra conexão e só vê o que foi confirmado
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+
+
+@pytest.fixture(scope="module", autouse=True)
+def replica_local(django_db_setup, django_db_blocker, tmp_path_factory):
+    """Réplica `replica`: cópia do banco de testes aberta somente leitura."""
+    arquivo = tmp_path_factory.mktemp("replica") / "replica.sqlite3"
+    configuracao = override_settings(REPLICA_DB="replica", REPLICA_ARQUIVO=arquivo)
+    configuracao.enable()
+    connections.settings["replica"] = {
+        **connections.settings["default"],
+        "NAME": f"file:{quote(str(arquivo))}?mode=ro",
+        "OPTIONS": {"timeout": 20},
+        # espelho: fica fora do flush entre os testes
+        "TEST": {"MIRROR": "default"},
+    }
+    yield arquivo
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+    configuracao.disable()
+
+
+def _copiar():
+    call_command("copy_replica", stdout=StringIO())
+    # o cliente de teste não fecha as conexões entre requisições
+    connections["replica"].close()
+
+
+def _cliente(username="junior_replica", host="alpha"):
+    user = User.objects.create_user(username=username, password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host=host
+    )
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return user, client
+
+
+def _nomes(client):
+    return sorted(p["nome"] for p in client.get("/api/portfolios/").json()["results"])
+
+
+def test_get_le_da_replica_e_escrita_fixa_a_sessao_no_primario():
+    user, client = _cliente()
+    _copiar()
+    Portfolio.objects.create(nome="P1", host="alpha", criado_por=user)
+
+    antes_da_copia = _nomes(client)
+    resp = client.post("/api/portfolios/", {"nome": "P2", "host": "alpha"})
+    depois_de_escrever = _nomes(client)
+    client.cookies[replicas.COOKIE] = "0"
+    fixacao_vencida = _nomes(client)
+    _copiar()
+
+    assert antes_da_copia == []
+    assert resp.status_code == 201
+    assert replicas.COOKIE in resp.cookies
+    assert depois_de_escrever == ["P1", "P2"]
+    assert fixacao_vencida == []
+    assert _nomes(client) == ["P1", "P2"]
+
+
+def test_objeto_lido_da_replica_e_gravado_no_primario():
+    user, _client = _cliente()
+    asset = Asset.objects.create(ticker="RPL1", nome="Rpl", tipo="ACAO")
+    portfolio = Portfolio.objects.create(nome="P1", host="alpha", criado_por=user)
+    Holding.objects.create(portfolio=portfolio, asset=asset)
+    _copiar()
+
+    with replicas.na_replica():
+        holding = Holding.objects.get()
+        lido = holding.asset
+        holding.quantidade_total = Decimal("4.00")
+        holding.save()
+        lido.nome = "Novo"
+        lido.save()
+        with transaction.atomic():
+            criado = Asset.objects.create(ticker="RPL2", nome="Rpl2", tipo="ACAO")
+            dentro_da_transacao = Asset.objects.filter(pk=criado.pk).exists()
+
+    assert holding._state.db == "default"
+    assert Holding.objects.get().quantidade_total == Decimal("4.00")
+    assert Asset.objects.get(pk=asset.pk).nome == "Novo"
+    assert dentro_da_transacao
+
+
+def test_resposta_em_cache_e_calculada_no_primario():
+    user, client = _cliente()
+    portfolio = Portfolio.objects.create(nome="P1", host="alpha", criado_por=user)
+    _copiar()
+    asset = Asset.objects.create(ticker="RPL3", nome="Rpl3", tipo="ACAO")
+    Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal("2.00"),
+        preco_medio=Decimal("5.00"),
+    )
+
+    resumo = client.get(f"/api/portfolios/{portfolio.pk}/summary/").json()
+
+    assert resumo["totais"]["valor_total"] == 10.0
+
+
+def test_exportacao_em_streaming_le_da_replica():
+    user, client = _cliente()
+    asset = Asset.objects.create(ticker="RPL4", nome="Rpl4", tipo="ACAO")
+    portfolio = Portfolio.objects.create(nome="P1", host="alpha", criado_por=user)
+    Holding.objects.create(portfolio=portfolio, asset=asset)
+    _copiar()
+    Holding.objects.create(
+        portfolio=Portfolio.objects.create(nome="P2", host="alpha", criado_por=user),
+        asset=asset,
+    )
+
+    resp = client.get("/api/holdings/export/?format=ndjson")
+    linhas = b"".join(resp.streaming_content).decode().splitlines()
+
+    assert len(linhas) == 1
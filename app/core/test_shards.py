@@ -0,0 +1,286 @@
+import json
+import sqlite3
+import time
+from decimal import Decimal
+
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from apps.holdings.models import Holding
+from apps.portifolios.admin import PortfolioAdminForm
+from apps.portifolios.models import Portfolio
+from apps.transactions.models import Lot, Transaction
+from apps.transactions.services import reconstruir_holdings, reconstruir_lotes
+from core.shards import em_todos_os_bancos
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+SHARDS = {"beta": "shard_beta", "gama": "shard_gama"}
+BANCOS = ["default", "shard_beta", "shard_gama"]
+
+# transaction=True: cada banco é uma conexão separada e os shards só enxergam
+# o `default` (anexado) depois do commit.
+pytestmark = pytest.mark.django_db(transaction=True, databases=BANCOS)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def bancos_fragmentados(django_db_setup, django_db_blocker, tmp_path_factory):
+    """Dois shards em arquivos SQLite temporários, migrados para o módulo."""
+    pasta = tmp_path_factory.mktemp("shards")
+    configuracao = override_settings(SHARDS=SHARDS)
+    configuracao.enable()
+    for alias in sorted(set(SHARDS.values())):
+        connections.settings[alias] = {
+            **connections.settings["default"],
+            "NAME": str(pasta / f"{alias}.sqlite3"),
+        }
+    with django_db_blocker.unblock():
+        # reabre o `default` para que a conexão nova passe para WAL
+        connections["default"].close()
+        for alias in sorted(set(SHARDS.values())):
+            call_command("migrate", database=alias, verbosity=0)
+    yield pasta
+    for alias in sorted(set(SHARDS.values())):
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+    configuracao.disable()
+    with django_db_blocker.unblock():
+        with connections["default"].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode = DELETE")
+
+
+def _cliente(username, role, host=""):
+    user = User.objects.create_user(username=username, password="pass")
+    UserProfile.objects.filter(user=user).update(role=role, host=host)
+    client = APIClient()
+    client.login(username=username, password="pass")
+    return user, client
+
+
+def _carteira(host, nome, user, asset, quantidade="3.00"):
+    portfolio = Portfolio.objects.create(nome=nome, host=host, criado_por=user)
+    Holding.objects.create(
+        portfolio=portfolio,
+        asset=asset,
+        quantidade_total=Decimal(quantidade),
+        preco_medio=Decimal("10.00"),
+    )
+    return portfolio
+
+
+def _nomes(banco):
+    return set(Portfolio.objects.using(banco).values_list("nome", flat=True))
+
+
+@pytest.fixture
+def asset():
+    return Asset.objects.create(ticker="SHD1", nome="Shd", tipo="ACAO")
+
+
+def test_dados_do_host_vao_para_o_shard_e_o_resto_fica_no_default(
+    asset, bancos_fragmentados
+):
+    user, senior = _cliente("senior_beta", UserProfile.ROLE_INVESTIDOR_SENIOR, "beta")
+
+    resp = senior.post(
+        "/api/portfolios/", {"nome": "B1", "host": "beta"}, format="json"
+    )
+    assert resp.status_code == 201
+    portfolio_id = resp.json()["id"]
+    resp = senior.post(
+        f"/api/portfolios/{portfolio_id}/transactions/",
+        {
+            "asset": asset.id,
+            "tipo": "COMPRA",
+            "quantidade": "10",
+            "preco": "5",
+            "data": "2025-01-02",
+        },
+        format="json",
+    )
+    assert resp.status_code == 201
+    _carteira("alpha", "A1", user, asset)
+
+    assert _nomes("shard_beta") == {"B1"}
+    assert _nomes("default") == {"A1"}
+    holding = Holding.objects.using("shard_beta").get()
+    assert holding.quantidade_total == Decimal("10.00")
+    assert Transaction.objects.using("shard_beta").count() == 1
+    assert not Transaction.objects.using("default").exists()
+    # tabelas compartilhadas não existem no arquivo do shard
+    shard = sqlite3.connect(bancos_fragmentados / "shard_beta.sqlite3")
+    tabelas = {nome for (nome,) in shard.execute("SELECT name FROM sqlite_master")}
+    shard.close()
+    assert "holdings_holding" in tabelas
+    assert "assets_asset" not in tabelas
+    assert "auth_user" not in tabelas
+
+
+def test_usuario_le_apenas_o_shard_do_proprio_host(asset):
+    user, junior = _cliente("junior_beta", UserProfile.ROLE_INVESTIDOR_JUNIOR, "beta")
+    beta = _carteira("beta", "B1", user, asset)
+    _carteira("gama", "G1", user, asset)
+    _carteira("alpha", "A1", user, asset)
+
+    portfolios = junior.get("/api/portfolios/").json()["results"]
+    holdings = junior.get("/api/holdings/?expand=asset").json()["results"]
+    resumo = junior.get(f"/api/portfolios/{beta.id}/summary/").json()
+
+    assert [p["nome"] for p in portfolios] == ["B1"]
+    # o JOIN com `assets_asset` vem do `default` anexado ao shard
+    assert [h["asset"]["ticker"] for h in holdings] == ["SHD1"]
+    assert resumo["totais"]["valor_total"] == 30.0
+
+
+def test_admin_junta_todos_os_bancos_na_ordem_da_paginacao(asset):
+    user, admin = _cliente("admin_shards", UserProfile.ROLE_ADMIN_SUPER)
+    criados = [
+        _carteira(host, f"{host}{i}", user, asset, quantidade=f"{i + 1}.00")
+        for host in ("alpha", "beta", "gama")
+        for i in range(3)
+    ]
+
+    ids, url = [], "/api/portfolios/?page_size=4"
+    while url:
+        pagina = admin.get(url).json()
+        ids.extend(p["id"] for p in pagina["results"])
+        url = pagina["next"]
+    detalhe = admin.get(f"/api/portfolios/{criados[-1].id}/")
+    lote = admin.post(
+        "/api/portfolios/summary/batch/",
+        {"ids": [str(p.id) for p in criados]},
+        format="json",
+    )
+    resumos = json.loads(b"".join(lote.streaming_content))["resultados"]
+    exportado = admin.get("/api/holdings/export/?format=ndjson")
+    linhas = b"".join(exportado.streaming_content).decode().splitlines()
+
+    assert ids == sorted(str(p.id) for p in criados)
+    assert detalhe.json()["nome"] == "gama2"
+    assert len(resumos) == 9
+    quantidades = sorted(r["totais"]["quantidade"] for r in resumos)
+    assert quantidades == [1.0] * 3 + [2.0] * 3 + [3.0] * 3
+    assert len(linhas) == 9
+
+
+def test_host_so_muda_dentro_do_mesmo_banco(asset):
+    user, admin = _cliente("admin_mover", UserProfile.ROLE_ADMIN_SUPER)
+    beta = _carteira("beta", "B1", user, asset)
+    alpha = _carteira("alpha", "A1", user, asset)
+    url = f"/api/portfolios/{beta.id}/"
+
+    movido = admin.patch(url, {"host": "gama"}, format="json")
+    renomeado = admin.patch(url, {"nome": "B2", "host": "beta"}, format="json")
+    # `alpha` e `delta` ficam ambos no `default`
+    no_default = admin.patch(
+        f"/api/portfolios/{alpha.id}/", {"host": "delta"}, format="json"
+    )
+    dados = {"nome": "B2", "criado_por": user.pk}
+    formulario = PortfolioAdminForm({**dados, "host": "gama"}, instance=beta)
+    mesmo_banco = PortfolioAdminForm({**dados, "host": "beta"}, instance=beta)
+
+    assert movido.status_code == 400
+    assert "host" in movido.json()
+    assert renomeado.status_code == 200
+    assert no_default.status_code == 200
+    assert _nomes("shard_beta") == {"B2"}
+    assert not Portfolio.objects.using("shard_gama").exists()
+    assert Portfolio.objects.using("default").get().host == "delta"
+    assert Holding.objects.using("shard_beta").count() == 1
+    assert "host" in formulario.errors
+    assert mesmo_banco.is_valid(), mesmo_banco.errors
+
+
+def test_excluir_ativo_ou_usuario_chega_aos_shards(asset):
+    user, _client = _cliente("dono_cascata", UserProfile.ROLE_INVESTIDOR_SENIOR)
+    outro, _outro_client = _cliente("outro_cascata", UserProfile.ROLE_ADMIN_SUPER)
+    beta = _carteira("beta", "B1", outro, asset)
+    Transaction.objects.create(
+        holding=Holding.objects.using("shard_beta").get(portfolio=beta),
+        tipo="COMPRA",
+        quantidade=Decimal("1.00"),
+        preco=Decimal("5.00"),
+        data="2025-01-02",
+        criado_por=outro,
+    )
+    _carteira("gama", "G1", user, Asset.objects.create(ticker="SHD2", tipo="ACAO"))
+    _carteira("alpha", "A1", user, asset)
+
+    asset.delete()
+    user.delete()
+
+    assert not Holding.objects.using("shard_beta").exists()
+    assert not Transaction.objects.using("shard_beta").exists()
+    assert not Lot.objects.using("shard_beta").exists()
+    assert _nomes("shard_beta") == {"B1"}
+    assert not Portfolio.objects.using("shard_gama").exists()
+    assert not Holding.objects.using("shard_gama").exists()
+    assert not Portfolio.objects.using("default").exists()
+
+
+def test_em_todos_os_bancos_conta_e_busca_em_cada_shard(asset):
+    user, _client = _cliente("dono_shards", UserProfile.ROLE_INVESTIDOR_SENIOR)
+    gama = _carteira("gama", "G1", user, asset)
+    _carteira("beta", "B1", user, asset)
+
+    todos = em_todos_os_bancos(Portfolio.objects.all())
+
+    assert todos.count() == 2
+    assert todos.get(pk=gama.pk)._state.db == "shard_gama"
+    assert [p.nome for p in todos.order_by("-nome")] == ["G1", "B1"]
+    with pytest.raises(Portfolio.DoesNotExist):
+        todos.get(nome="A1")
+
+
+def test_reconstruir_holdings_percorre_todos_os_shards(asset):
+    user, _client = _cliente("rebuild_shards", UserProfile.ROLE_INVESTIDOR_SENIOR)
+    for host in ("alpha", "beta", "gama"):
+        _carteira(host, host, user, asset, quantidade="7.00")
+
+    resultado = reconstruir_holdings(verificar=True)
+
+    # sem transações, os três holdings deveriam estar zerados
+    assert resultado["holdings"] == 3
+    assert resultado["divergentes"] == 3
+
+
+def test_reconstrucao_de_um_portfolio_num_shard_fica_no_banco_dele(asset):
+    user, _client = _cliente("rebuild_um", UserProfile.ROLE_INVESTIDOR_SENIOR)
+    beta = _carteira("beta", "B1", user, asset, quantidade="7.00")
+    _carteira("alpha", "A1", user, asset, quantidade="7.00")
+    with CaptureQueriesContext(connections["default"]) as no_default:
+        holdings = reconstruir_holdings(portfolio=beta)
+        lotes = reconstruir_lotes(portfolio=beta)
+
+    assert holdings["divergentes"] == 1
+    assert lotes["portfolios"] == 1
+    assert Holding.objects.using("shard_beta").get().quantidade_total == 0
+    assert Holding.objects.using("default").get().quantidade_total == Decimal("7")
+    assert not [q for q in no_default if "holdings_holding" in q["sql"]]
+
+
+def test_escrita_de_um_tenant_nao_espera_a_trava_de_outro_shard(
+    asset, bancos_fragmentados
+):
+    _user, senior = _cliente("senior_gama", UserProfile.ROLE_INVESTIDOR_SENIOR, "gama")
+    outro = sqlite3.connect(bancos_fragmentados / "shard_beta.sqlite3")
+    outro.isolation_level = None
+    outro.execute("BEGIN IMMEDIATE")
+    try:
+        inicio = time.perf_counter()
+        resp = senior.post(
+            "/api/portfolios/", {"nome": "G1", "host": "gama"}, format="json"
+        )
+        duracao = time.perf_counter() - inicio
+    finally:
+        outro.execute("ROLLBACK")
+        outro.close()
+
+    assert resp.status_code == 201
+    assert duracao < 5
+    assert _nomes("shard_gama") == {"G1"}
@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection, connections
+from django.test import override_settings
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="PRAGMAs só existem no SQLite"
+)
+
+
+def _nova_conexao():
+    conexao = connections.create_connection("default")
+    conexao.ensure_connection()
+    return conexao
+
+
+def _pragma(conexao, nome):
+    with conexao.cursor() as cursor:
+        cursor.execute(f"PRAGMA {nome}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+@override_settings(
+    SQLITE_PRAGMAS={"cache_size": "-4096", "temp_store": "MEMORY", "synchronous": "1"}
+)
+def test_perfil_aplica_pragmas_em_conexoes_novas():
+    conexao = _nova_conexao()
+    try:
+        assert _pragma(conexao, "cache_size") == -4096
+        assert _pragma(conexao, "temp_store") == 2  # MEMORY
+        assert _pragma(conexao, "synchronous") == 1  # NORMAL
+    finally:
+        conexao.close()
+
+
+@pytest.mark.django_db
+def test_sem_perfil_mantem_padroes_do_sqlite():
+    conexao = _nova_conexao()
+    try:
+        assert _pragma(conexao, "temp_store") == 0
+    finally:
+        conexao.close()
+
+
+@pytest.mark.django_db
+@override_settings(SQLITE_PRAGMAS={"cache_size": "1; DROP TABLE auth_user"})
+def test_valor_invalido_e_recusado():
+    with pytest.raises(ValueError):
+        _nova_conexao()
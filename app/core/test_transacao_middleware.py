@@ -0,0 +1,81 @@
+import pytest
+from apps.accounts.models import UserProfile
+from apps.assets.models import Asset
+from core.middleware import TransacaoMiddleware, requisicao_atomica
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+# transaction=True: sem a transação externa do teste, `in_atomic_block` mostra
+# só o que a requisição abriu.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def _senior():
+    user = User.objects.create_user(username="senior_tx_mw", password="pass")
+    UserProfile.objects.filter(user=user).update(
+        role=UserProfile.ROLE_INVESTIDOR_SENIOR, host="alpha"
+    )
+    client = APIClient()
+    client.login(username="senior_tx_mw", password="pass")
+    return client
+
+
+def _estados_das_consultas(chamar):
+    estados = []
+
+    def registrar(execute, sql, params, many, context):
+        estados.append(connection.in_atomic_block)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(registrar):
+        chamar()
+    return estados
+
+
+def test_get_roda_em_autocommit_e_post_em_transacao():
+    client = _senior()
+
+    leitura = _estados_das_consultas(lambda: client.get("/api/assets/"))
+    escrita = _estados_das_consultas(
+        lambda: client.post(
+            "/api/portfolios/", {"nome": "Ptx", "host": "alpha"}, format="json"
+        )
+    )
+
+    assert leitura and not any(leitura)
+    assert escrita and all(escrita[-2:])
+
+
+def _view_que_grava_e_falha(request):
+    Asset.objects.create(ticker="ROLL", nome="Rollback", tipo="ACAO")
+    resposta = HttpResponse(status=400)
+    resposta.exception = True  # como o DRF marca exceções tratadas
+    return resposta
+
+
+def test_excecao_tratada_pelo_drf_desfaz_a_transacao():
+    middleware = TransacaoMiddleware(lambda request: None)
+
+    resposta = middleware.process_view(
+        RequestFactory().post("/"), _view_que_grava_e_falha, (), {}
+    )
+
+    assert resposta.status_code == 400
+    assert not Asset.objects.filter(ticker="ROLL").exists()
+
+
+def test_view_marcada_e_atomica_mesmo_em_get():
+    middleware = TransacaoMiddleware(lambda request: None)
+    estados = []
+
+    def view(request):
+        estados.append(connection.in_atomic_block)
+        return HttpResponse()
+
+    assert middleware.process_view(RequestFactory().get("/"), view, (), {}) is None
+    middleware.process_view(RequestFactory().get("/"), requisicao_atomica(view), (), {})
+
+    assert estados == [True]
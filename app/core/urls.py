@@ -3,9 +3,14 @@ from django.urls import include, path
 from rest_framework import routers
 
 from apps.portifolios.views import PortfolioViewSet
-from apps.transactions.views import TransactionCreateView
+from apps.transactions.views import (
+    TransactionBulkImportView,
+    TransactionCreateView,
+    TransactionExportView,
+)
 from apps.assets.views import AssetViewSet
 from apps.holdings.views import HoldingViewSet
+from core.metricas import metricas_view, requisicoes_lentas_view
 
 
 router = routers.DefaultRouter()
@@ -17,11 +22,23 @@ router.register(r"holdings", HoldingViewSet, basename="holdings")
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
+    path(
+        "api/transactions/export/",
+        TransactionExportView.as_view(),
+        name="transactions-export",
+    ),
+    path("metrics", metricas_view, name="metrics"),
+    path("metrics/slow/", requisicoes_lentas_view, name="metrics-slow"),
     path(
         "api/portfolios/<uuid:pk>/transactions/",
         TransactionCreateView.as_view(),
         name="portfolio-transactions",
     ),
+    path(
+        "api/portfolios/<uuid:pk>/transactions/bulk/",
+        TransactionBulkImportView.as_view(),
+        name="portfolio-transactions-bulk",
+    ),
 ]
 
 # Nota: o endpoint de teste `test_atomic_view` é usado apenas pelos testes.